@@ -5,3 +5,7 @@ class ApiConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
 
     name = 'api'
+
+    def ready(self):
+        import api.checks  # noqa: F401
+        import api.signals  # noqa: F401
@@ -0,0 +1,157 @@
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.utils.functional import cached_property
+from rest_framework.permissions import SAFE_METHODS
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.exceptions import AuthenticationFailed
+from rest_framework_simplejwt.models import TokenUser
+from rest_framework_simplejwt.settings import api_settings
+from rest_framework_simplejwt.tokens import AccessToken
+
+from api.cache import get_cache
+
+USER_KEY = 'api:auth-user:{}:{}'
+USER_TOKENS_KEY = 'api:auth-user-tokens:{}'
+AUTH_VERSION_KEY = 'api:auth-version:{}'
+
+
+def invalidate_cached_user(user_id):
+    """Удаление из кэша пользователя для всех его токенов."""
+    cache = get_cache()
+    tokens_key = USER_TOKENS_KEY.format(user_id)
+    issued = cache.get(tokens_key) or ()
+    cache.delete_many(
+        [USER_KEY.format(user_id, iat) for iat in issued] + [tokens_key]
+    )
+
+
+class CachedJWTAuthentication(JWTAuthentication):
+    """
+    JWT-аутентификация, получающая пользователя из кэша по id и времени
+    выдачи токена вместо запроса к базе данных на каждый запрос.
+    Запись удаляется при изменении или удалении пользователя
+    (см. api/signals.py) и живет не дольше AUTH_USER_CACHE_TIMEOUT.
+    """
+
+    def get_user(self, validated_token):
+        user_id = validated_token.get(api_settings.USER_ID_CLAIM)
+        iat = validated_token.get('iat')
+        if user_id is None or iat is None:
+            return super().get_user(validated_token)
+        cache = get_cache()
+        key = USER_KEY.format(user_id, iat)
+        user = cache.get(key)
+        if user is not None:
+            return user
+        user = super().get_user(validated_token)
+        tokens_key = USER_TOKENS_KEY.format(user_id)
+        issued = set(cache.get(tokens_key) or ())
+        issued.add(iat)
+        cache.set_many(
+            {key: user, tokens_key: issued},
+            settings.AUTH_USER_CACHE_TIMEOUT
+        )
+        return user
+
+
+class RoleAccessToken(AccessToken):
+    """Токен доступа с ролью пользователя и версией прав доступа."""
+
+    @classmethod
+    def for_user(cls, user):
+        token = super().for_user(user)
+        token['role'] = user.role
+        token['is_superuser'] = user.is_superuser
+        token['auth_version'] = user.auth_version
+        return token
+
+
+class RoleTokenUser(TokenUser):
+    """
+    Пользователь, восстановленный из утверждений токена: достаточно для
+    проверок в api/permissions.py без загрузки строки User.
+    """
+
+    @cached_property
+    def role(self):
+        return self.token.get('role', 'user')
+
+    @property
+    def is_admin(self):
+        return self.role == 'admin' or self.is_superuser
+
+    @property
+    def is_moderator(self):
+        return self.role == 'moderator'
+
+
+def set_auth_state(user):
+    get_cache().set(
+        AUTH_VERSION_KEY.format(user.pk),
+        (user.auth_version, user.is_active),
+        settings.AUTH_USER_CACHE_TIMEOUT
+    )
+
+
+def get_auth_state(user_id):
+    """
+    Версия прав доступа и признак активности пользователя. Запись
+    обновляется сигналами при сохранении пользователя в общем кэше
+    (см. api/checks.py) и живет не дольше AUTH_USER_CACHE_TIMEOUT, чтобы
+    изменение в обход сигналов (например, queryset.update()) вступало в
+    силу через ограниченное время.
+    """
+    cache = get_cache()
+    key = AUTH_VERSION_KEY.format(user_id)
+    state = cache.get(key)
+    if state is None:
+        state = get_user_model().objects.filter(pk=user_id).values_list(
+            'auth_version', 'is_active'
+        ).first()
+        if state is None:
+            return None
+        cache.set(key, tuple(state), settings.AUTH_USER_CACHE_TIMEOUT)
+    return state
+
+
+def get_user_instance(user):
+    """Полный объект User для пользователя запроса."""
+    if isinstance(user, RoleTokenUser):
+        return get_user_model().objects.get(pk=user.pk)
+    return user
+
+
+class RoleClaimsJWTAuthentication(CachedJWTAuthentication):
+    """
+    Для безопасных методов пользователь восстанавливается из утверждений
+    токена (RoleTokenUser) без запросов к базе данных. Токен отклоняется,
+    если версия прав доступа пользователя изменилась после его выдачи
+    (смена роли, блокировка), и пользователю нужно получить новый токен.
+    Для остальных методов используется полный объект User.
+    """
+
+    def authenticate(self, request):
+        self.stateless = request.method in SAFE_METHODS
+        return super().authenticate(request)
+
+    def get_user(self, validated_token):
+        if 'auth_version' not in validated_token:
+            return super().get_user(validated_token)
+        state = get_auth_state(validated_token[api_settings.USER_ID_CLAIM])
+        if state is None:
+            raise AuthenticationFailed(
+                'Пользователь не найден.', code='user_not_found'
+            )
+        auth_version, is_active = state
+        if not is_active:
+            raise AuthenticationFailed(
+                'Пользователь заблокирован.', code='user_inactive'
+            )
+        if auth_version != validated_token['auth_version']:
+            raise AuthenticationFailed(
+                'Права доступа изменились, получите новый токен.',
+                code='token_revoked'
+            )
+        if self.stateless:
+            return RoleTokenUser(validated_token)
+        return super().get_user(validated_token)
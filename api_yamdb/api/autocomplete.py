@@ -0,0 +1,147 @@
+import threading
+from bisect import bisect_left, insort
+from functools import partial
+
+from django.db import transaction
+
+from api.cache import get_versions
+from reviews.models import Category, Genre, Title
+
+MODEL_TYPES = {
+    Title: 'title',
+    Genre: 'genre',
+    Category: 'category',
+}
+
+# Пространства имен версий кэша (см. api/cache.py), от которых зависит
+# индекс: по ним другие процессы узнают, что индекс нужно перестроить.
+NAMESPACES = tuple(MODEL_TYPES.values())
+
+
+def normalize(value):
+    return ' '.join(value.casefold().split())
+
+
+def get_keys(name):
+    """Ключи для поиска по началу названия и по началу каждого слова."""
+    name = normalize(name)
+    keys = [name]
+    for position, char in enumerate(name):
+        if char == ' ':
+            keys.append(name[position + 1:])
+    return keys
+
+
+def get_item(obj):
+    item_type = MODEL_TYPES[type(obj)]
+    if item_type == 'title':
+        return {'type': item_type, 'id': obj.pk, 'name': obj.name}
+    return {'type': item_type, 'slug': obj.slug, 'name': obj.name}
+
+
+class PrefixIndex:
+    """
+    Отсортированный список ключей (ключ, тип, pk) и поиск по префиксу
+    через bisect. Индекс строится при первом запросе и обновляется
+    по сигналам сохранения и удаления моделей.
+    """
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.keys = []
+        self.items = {}
+        self.versions = None
+
+    def build(self):
+        keys = []
+        items = {}
+        for model in MODEL_TYPES:
+            for obj in model.objects.all().order_by().iterator():
+                item = get_item(obj)
+                ident = (item['type'], obj.pk)
+                items[ident] = item
+                keys.extend((key, *ident) for key in get_keys(obj.name))
+        keys.sort()
+        self.keys = keys
+        self.items = items
+
+    def ensure_built(self):
+        versions = get_versions(NAMESPACES)
+        if versions != self.versions:
+            self.build()
+            self.versions = versions
+
+    def remove(self, ident):
+        item = self.items.pop(ident, None)
+        if item is None:
+            return
+        for key in get_keys(item['name']):
+            position = bisect_left(self.keys, (key, *ident))
+            if (
+                position < len(self.keys)
+                and self.keys[position] == (key, *ident)
+            ):
+                del self.keys[position]
+
+    def remember_versions(self, obj):
+        """Версии до изменения объекта (сигналы pre_save и pre_delete)."""
+        if self.versions is not None:
+            obj._autocomplete_versions = get_versions(NAMESPACES)
+
+    def update(self, obj, deleted=False):
+        """
+        Изменение одного объекта без перестройки индекса. Применяется после
+        фиксации транзакции, когда версия кэша уже сброшена (см.
+        bump_version_on_commit): при откате индекс не меняется.
+        """
+        ident = (MODEL_TYPES[type(obj)], obj.pk)
+        item = None if deleted else get_item(obj)
+        previous = getattr(obj, '_autocomplete_versions', None)
+        transaction.on_commit(partial(self.apply, ident, item, previous))
+
+    def apply(self, ident, item, previous):
+        """
+        Новые версии принимаются, только если индекс был актуален до
+        изменения и с тех пор изменилось лишь пространство имен объекта.
+        Иначе данные менял и другой процесс (например, через bulk_create
+        без сигналов), и индекс перестраивается при следующем поиске.
+        """
+        namespace = ident[0]
+        with self.lock:
+            if self.versions is None:
+                return
+            versions = get_versions(NAMESPACES)
+            if previous != self.versions or any(
+                before != after
+                for name, before, after in zip(NAMESPACES, previous, versions)
+                if name != namespace
+            ):
+                self.versions = None
+                return
+            self.remove(ident)
+            if item is not None:
+                self.items[ident] = item
+                for key in get_keys(item['name']):
+                    insort(self.keys, (key, *ident))
+            self.versions = versions
+
+    def search(self, prefix, limit):
+        prefix = normalize(prefix)
+        results = []
+        seen = set()
+        with self.lock:
+            self.ensure_built()
+            position = bisect_left(self.keys, (prefix,))
+            while position < len(self.keys) and len(results) < limit:
+                key, *ident = self.keys[position]
+                if not key.startswith(prefix):
+                    break
+                ident = tuple(ident)
+                if ident not in seen:
+                    seen.add(ident)
+                    results.append(self.items[ident])
+                position += 1
+        return results
+
+
+index = PrefixIndex()
@@ -0,0 +1,188 @@
+import hashlib
+import threading
+import time
+
+from django.conf import settings
+from django.core.cache import caches
+from django.db import transaction
+from django.utils.cache import get_conditional_response
+from django.utils.http import http_date, quote_etag
+from rest_framework.response import Response
+
+VERSION_KEY = 'api:version:{}'
+RESPONSE_KEY = 'api:response:{}:{}:{}'
+
+# Версии отзывов одного произведения и комментариев одного отзыва (см.
+# api/signals.py): запись отзыва к другому произведению их не меняет.
+TITLE_REVIEWS_NAMESPACE = 'review:title:{}'
+REVIEW_COMMENTS_NAMESPACE = 'comment:review:{}'
+
+# Меняется только при массовой загрузке, после которой версии отдельных
+# произведений и отзывов перебрать нельзя.
+BULK_LOAD_NAMESPACE = 'bulk_load'
+
+
+def get_cache():
+    return caches[settings.API_CACHE_ALIAS]
+
+
+def get_versions(namespaces):
+    """
+    Текущие версии пространств имен кэша. Версия - время последнего
+    изменения в наносекундах; отсутствующая версия (например, вытесненная
+    из кэша) заменяется текущим временем, чтобы не совпасть со старыми
+    записями.
+    """
+    cache = get_cache()
+    keys = [VERSION_KEY.format(namespace) for namespace in namespaces]
+    versions = cache.get_many(keys)
+    for key in keys:
+        if key not in versions:
+            cache.add(key, time.time_ns(), None)
+            versions[key] = cache.get(key)
+    return [versions[key] for key in keys]
+
+
+def bump_version(namespace):
+    """Инвалидация всех ответов, зависящих от пространства имен."""
+    cache = get_cache()
+    key = VERSION_KEY.format(namespace)
+    previous = cache.get(key) or 0
+    cache.set(key, max(time.time_ns(), previous + 1), None)
+
+
+# Пространства имен, версии которых сбрасываются после фиксации
+# транзакции (см. bump_version_on_commit).
+pending = threading.local()
+
+
+def bump_version_on_commit(namespace):
+    """
+    Инвалидация после фиксации транзакции, один раз на пространство имен:
+    каскадное удаление сотен строк меняет версию однажды, а ответ,
+    закэшированный до фиксации, ее не переживет. Пространства имен
+    отмененной транзакции сбрасываются вместе со следующими.
+    """
+    if not hasattr(pending, 'namespaces'):
+        pending.namespaces = set()
+    pending.namespaces.add(namespace)
+    transaction.on_commit(bump_pending_versions)
+
+
+def bump_pending_versions():
+    while pending.namespaces:
+        bump_version(pending.namespaces.pop())
+
+
+class ConditionalResponse(Exception):
+    """Досрочный ответ (304 или 412) на условный запрос."""
+
+    def __init__(self, response):
+        super().__init__()
+        self.response = response
+
+
+class ConditionalGetMixin:
+    """
+    Заголовки ETag и Last-Modified для действий `conditional_actions`.
+
+    Валидаторы вычисляются из версий `get_cache_dependencies()` без
+    обращения к базе данных, поэтому запрос с актуальными If-None-Match
+    или If-Modified-Since получает ответ 304 до выполнения основного
+    запроса и сериализации.
+    """
+
+    conditional_actions = ('list', 'retrieve')
+    cache_dependencies = ()
+
+    def get_cache_dependencies(self):
+        """
+        Пространства имен валидаторов; вложенный viewset может заменить их
+        версиями своего родителя из URL.
+        """
+        return self.cache_dependencies
+
+    def get_validators(self, request):
+        versions = get_versions(self.get_cache_dependencies())
+        etag = hashlib.md5(':'.join((
+            self.basename,
+            request.accepted_renderer.format,
+            request.build_absolute_uri(),
+            *(str(version) for version in versions)
+        )).encode()).hexdigest()
+        last_modified = max(versions, default=0) // 10 ** 9
+        return quote_etag(etag), last_modified
+
+    def initial(self, request, *args, **kwargs):
+        super().initial(request, *args, **kwargs)
+        self.validators = None
+        if (
+            request.method in ('GET', 'HEAD')
+            and self.action in self.conditional_actions
+        ):
+            self.validators = self.get_validators(request)
+            etag, last_modified = self.validators
+            response = get_conditional_response(
+                request._request, etag=etag, last_modified=last_modified
+            )
+            if response is not None:
+                raise ConditionalResponse(response)
+
+    def handle_exception(self, exc):
+        if isinstance(exc, ConditionalResponse):
+            return exc.response
+        return super().handle_exception(exc)
+
+    def finalize_response(self, request, response, *args, **kwargs):
+        response = super().finalize_response(
+            request, response, *args, **kwargs
+        )
+        if getattr(self, 'validators', None) and response.status_code in (
+            200, 304
+        ):
+            etag, last_modified = self.validators
+            response['ETag'] = etag
+            response['Last-Modified'] = http_date(last_modified)
+        return response
+
+
+class CachedResponseMixin:
+    """
+    Кэширование ответов list для анонимных GET-запросов; для других
+    действий (например, retrieve) viewset вызывает get_cached_response сам.
+
+    Ключ строится из полного адреса с параметрами запроса (включая фильтры)
+    и версий пространств имен `cache_dependencies`; при изменении записей
+    соответствующих моделей версия увеличивается (см. api/signals.py),
+    и старые ответы перестают использоваться.
+    """
+
+    cache_dependencies = ()
+
+    def list(self, request, *args, **kwargs):
+        return self.get_cached_response(
+            super().list, request, *args, **kwargs
+        )
+
+    def get_cached_response(self, handler, request, *args, **kwargs):
+        if request.method != 'GET' or request.user.is_authenticated:
+            return handler(request, *args, **kwargs)
+        cache = get_cache()
+        versions = get_versions(self.cache_dependencies)
+        key = RESPONSE_KEY.format(
+            self.basename,
+            ':'.join(str(version) for version in versions),
+            hashlib.md5(request.build_absolute_uri().encode()).hexdigest()
+        )
+        cached = cache.get(key)
+        if cached is not None:
+            data, status = cached
+            return Response(data, status=status)
+        response = handler(request, *args, **kwargs)
+        if response.status_code == 200:
+            cache.set(
+                key,
+                (response.data, response.status_code),
+                settings.API_CACHE_TIMEOUT
+            )
+        return response
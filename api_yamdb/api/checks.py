@@ -0,0 +1,51 @@
+from django.conf import settings
+from django.core.checks import Error, Tags, Warning, register
+
+# Кэши, содержимое которых видит только один процесс.
+PROCESS_LOCAL_CACHES = (
+    'django.core.cache.backends.locmem.LocMemCache',
+    'django.core.cache.backends.dummy.DummyCache',
+)
+
+DATABASE_CACHE = 'django.core.cache.backends.db.DatabaseCache'
+
+
+@register(Tags.caches)
+def check_shared_api_cache(app_configs, **kwargs):
+    """
+    Версии кэша ответов и ETag, состояние отзыва токенов и корзины
+    ограничения частоты должны быть общими для всех процессов сервера:
+    с кэшем в памяти процесса изменение, сделанное в одном процессе,
+    остальные не увидят.
+    """
+    backend = settings.CACHES[settings.API_CACHE_ALIAS]['BACKEND']
+    if backend not in PROCESS_LOCAL_CACHES:
+        return []
+    return [Error(
+        f'API_CACHE_ALIAS "{settings.API_CACHE_ALIAS}" uses the '
+        f'process-local backend {backend}.',
+        hint=(
+            'Use a cache shared by all server processes: the database '
+            'cache, Memcached or Redis (CACHE_BACKEND, CACHE_LOCATION).'
+        ),
+        id='api.E001',
+    )]
+
+
+@register(Tags.caches, deploy=True)
+def check_fast_api_cache(app_configs, **kwargs):
+    """
+    Кэш в базе данных общий, но каждое чтение версий, состояния токена и
+    корзины ограничения частоты становится SQL-запросом, а запись -
+    еще и COUNT(*) по таблице (manage.py check --deploy).
+    """
+    backend = settings.CACHES[settings.API_CACHE_ALIAS]['BACKEND']
+    if backend != DATABASE_CACHE:
+        return []
+    return [Warning(
+        f'API_CACHE_ALIAS "{settings.API_CACHE_ALIAS}" uses the database '
+        'cache, every cache read is an SQL query.',
+        hint='Use Memcached or Redis in production (CACHE_BACKEND, '
+             'CACHE_LOCATION).',
+        id='api.W001',
+    )]
@@ -1,6 +1,8 @@
 import django_filters
+from rest_framework.filters import BaseFilterBackend
 
 from reviews.models import Title
+from reviews.search import search
 
 
 class TitleFilter(django_filters.FilterSet):
@@ -27,3 +29,15 @@ class TitleFilter(django_filters.FilterSet):
             'year',
             'name'
         )
+
+
+class FullTextSearchFilter(BaseFilterBackend):
+    """Полнотекстовый поиск по параметру `search` (см. reviews/search.py)."""
+
+    search_param = 'search'
+
+    def filter_queryset(self, request, queryset, view):
+        query = request.query_params.get(self.search_param, '').strip()
+        if not query:
+            return queryset
+        return search(queryset, query)
@@ -0,0 +1,217 @@
+import threading
+import time
+from contextlib import ExitStack
+
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from django.db import connections
+from django.http import Http404, HttpResponse
+
+# Границы корзин гистограммы длительности запросов, в секундах.
+BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+
+UNMATCHED_ROUTE = 'unmatched'
+
+
+class QueryTimer:
+    """Счетчик SQL-запросов и их длительности (execute_wrapper)."""
+
+    def __init__(self):
+        self.count = 0
+        self.duration = 0.0
+
+    def __call__(self, execute, sql, params, many, context):
+        start = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.count += 1
+            self.duration += time.perf_counter() - start
+
+
+class RouteStats:
+    __slots__ = (
+        'requests', 'duration', 'buckets', 'queries', 'db_duration',
+        'serialize_duration', 'render_duration'
+    )
+
+    def __init__(self):
+        self.requests = 0
+        self.duration = 0.0
+        self.buckets = [0] * len(BUCKETS)
+        self.queries = 0
+        self.db_duration = 0.0
+        self.serialize_duration = 0.0
+        self.render_duration = 0.0
+
+
+class MetricsRegistry:
+    """
+    Метрики запросов по маршрутам (имя URL, например `titles-list`) и
+    методам. Хранятся в памяти процесса: при нескольких процессах
+    сервера каждый отдает свои значения.
+    """
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.routes = {}
+
+    def observe(self, route, method, duration, queries, db_duration,
+                serialize_duration, render_duration):
+        with self.lock:
+            stats = self.routes.get((route, method))
+            if stats is None:
+                stats = self.routes[(route, method)] = RouteStats()
+            stats.requests += 1
+            stats.duration += duration
+            for index, bound in enumerate(BUCKETS):
+                if duration <= bound:
+                    stats.buckets[index] += 1
+            stats.queries += queries
+            stats.db_duration += db_duration
+            stats.serialize_duration += serialize_duration
+            stats.render_duration += render_duration
+
+    def clear(self):
+        with self.lock:
+            self.routes.clear()
+
+    def render(self):
+        """Текстовый формат Prometheus (version 0.0.4)."""
+        with self.lock:
+            routes = sorted(self.routes.items())
+            lines = []
+            for name, kind, help_text, value in (
+                ('api_requests_total', 'counter',
+                 'Number of requests.', 'requests'),
+                ('api_request_duration_seconds', 'histogram',
+                 'Request latency.', None),
+                ('api_db_queries_total', 'counter',
+                 'Number of SQL queries.', 'queries'),
+                ('api_db_duration_seconds_total', 'counter',
+                 'Time spent in SQL queries.', 'db_duration'),
+                ('api_serialize_duration_seconds_total', 'counter',
+                 'Time spent in serializer.data.', 'serialize_duration'),
+                ('api_render_duration_seconds_total', 'counter',
+                 'Time spent rendering responses.', 'render_duration'),
+            ):
+                lines.append(f'# HELP {name} {help_text}')
+                lines.append(f'# TYPE {name} {kind}')
+                for (route, method), stats in routes:
+                    labels = f'route="{route}",method="{method}"'
+                    if value is not None:
+                        lines.append(
+                            f'{name}{{{labels}}} {getattr(stats, value)}'
+                        )
+                        continue
+                    for bound, count in zip(BUCKETS, stats.buckets):
+                        lines.append(
+                            f'{name}_bucket{{{labels},le="{bound}"}} {count}'
+                        )
+                    lines.append(
+                        f'{name}_bucket{{{labels},le="+Inf"}} '
+                        f'{stats.requests}'
+                    )
+                    lines.append(f'{name}_sum{{{labels}}} {stats.duration}')
+                    lines.append(f'{name}_count{{{labels}}} {stats.requests}')
+        return '\n'.join(lines) + '\n'
+
+
+registry = MetricsRegistry()
+
+
+class MetricsMiddleware:
+    """
+    Длительность запроса, количество и время SQL-запросов, время
+    serializer.data (см. SerializerTimingMixin) и рендеринга ответа
+    (кодирование в JSON) по маршрутам; значения отдаются в /metrics и в
+    заголовке Server-Timing.
+
+    При API_METRICS_ENABLED = False middleware исключается из цепочки
+    при загрузке (MiddlewareNotUsed) и не влияет на запросы.
+    """
+
+    def __init__(self, get_response):
+        if not settings.API_METRICS_ENABLED:
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+
+    def __call__(self, request):
+        timer = QueryTimer()
+        request._serialize_duration = 0.0
+        request._render_duration = 0.0
+        start = time.perf_counter()
+        with ExitStack() as stack:
+            for connection in connections.all():
+                stack.enter_context(connection.execute_wrapper(timer))
+            response = self.get_response(request)
+        duration = time.perf_counter() - start
+        match = getattr(request, 'resolver_match', None)
+        route = match.url_name if match and match.url_name else (
+            UNMATCHED_ROUTE
+        )
+        registry.observe(
+            route,
+            request.method,
+            duration,
+            timer.count,
+            timer.duration,
+            request._serialize_duration,
+            request._render_duration
+        )
+        response['Server-Timing'] = ', '.join((
+            f'db;dur={timer.duration * 1000:.2f};'
+            f'desc="{timer.count} queries"',
+            f'serialize;dur={request._serialize_duration * 1000:.2f}',
+            f'render;dur={request._render_duration * 1000:.2f}',
+            f'total;dur={duration * 1000:.2f}',
+        ))
+        return response
+
+    def process_template_response(self, request, response):
+        """Время рендеринга ответа DRF (вызывается перед render())."""
+        start = time.perf_counter()
+
+        def finish(response):
+            request._render_duration = time.perf_counter() - start
+
+        response.add_post_render_callback(finish)
+        return response
+
+
+def time_serialization(request, to_representation):
+    def timed(instance):
+        start = time.perf_counter()
+        try:
+            return to_representation(instance)
+        finally:
+            request._serialize_duration += time.perf_counter() - start
+
+    return timed
+
+
+class SerializerTimingMixin:
+    """
+    Время serializer.data для метрик: у сериализатора из get_serializer()
+    засекается to_representation (у списка - один раз на весь список).
+    Это основная работа DRF в представлении, а рендеринг ответа - только
+    кодирование готовых данных в JSON.
+    """
+
+    def get_serializer(self, *args, **kwargs):
+        serializer = super().get_serializer(*args, **kwargs)
+        request = getattr(self.request, '_request', None)
+        if hasattr(request, '_serialize_duration'):
+            serializer.to_representation = time_serialization(
+                request, serializer.to_representation
+            )
+        return serializer
+
+
+def metrics(request):
+    """Метрики в текстовом формате Prometheus."""
+    if not settings.API_METRICS_ENABLED:
+        raise Http404
+    return HttpResponse(
+        registry.render(), content_type='text/plain; version=0.0.4'
+    )
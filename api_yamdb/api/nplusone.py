@@ -0,0 +1,135 @@
+import logging
+import re
+import sys
+from collections import Counter
+from contextlib import ExitStack, contextmanager
+
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from django.db import connections
+from rest_framework.fields import Field
+from rest_framework.serializers import ListSerializer
+
+logger = logging.getLogger(__name__)
+
+IN_LIST = re.compile(r'IN \((?:%s, )*%s\)')
+SPACES = re.compile(r'\s+')
+
+
+class NPlusOneError(Exception):
+    """Повторяющиеся запросы одной формы в пределах запроса к API."""
+
+
+def normalize_sql(sql):
+    """
+    Форма запроса: параметры в SQL Django и так заменены на %s, остается
+    свернуть списки IN (...) разной длины и пробелы.
+    """
+    return SPACES.sub(' ', IN_LIST.sub('IN (...)', sql)).strip()
+
+
+def find_serializer_field():
+    """
+    Поле сериализатора, при чтении которого выполняется запрос: ближайший
+    по стеку вызовов объект Field с именем, например
+    `ReviewSerializer.author` или `TitleSerializerGet.genre`.
+    """
+    frame = sys._getframe(1)
+    while frame is not None:
+        field = frame.f_locals.get('self')
+        if isinstance(field, Field) and field.field_name:
+            parent = field.parent
+            if isinstance(parent, ListSerializer):
+                parent = parent.parent
+            return f'{type(parent).__name__}.{field.field_name}'
+        frame = frame.f_back
+    return None
+
+
+def get_cache_tables(connection):
+    """
+    Таблицы кэша в базе данных (DatabaseCache): чтение версий и ответов
+    из кэша повторяется в запросе намеренно и N+1 не считается.
+    """
+    return tuple(
+        connection.ops.quote_name(params['LOCATION'])
+        for params in settings.CACHES.values()
+        if params['BACKEND'].endswith('.DatabaseCache')
+    )
+
+
+class QueryShapeCollector:
+    """Подсчет выполненных запросов по формам (execute_wrapper)."""
+
+    def __init__(self, threshold):
+        self.threshold = threshold
+        self.counts = Counter()
+        self.fields = {}
+
+    def __call__(self, execute, sql, params, many, context):
+        cache_tables = get_cache_tables(context['connection'])
+        if any(table in sql for table in cache_tables):
+            return execute(sql, params, many, context)
+        shape = normalize_sql(sql)
+        self.counts[shape] += 1
+        if self.counts[shape] == 2:
+            self.fields[shape] = find_serializer_field()
+        return execute(sql, params, many, context)
+
+    def get_repeats(self):
+        """Список (форма, количество, поле) для повторов от threshold."""
+        return [
+            (shape, count, self.fields.get(shape))
+            for shape, count in self.counts.items()
+            if count >= self.threshold
+        ]
+
+
+def format_repeats(label, repeats):
+    return f'N+1 queries in {label}:\n' + '\n'.join(
+        f'  {count} x {shape}' + (f' (field: {field})' if field else '')
+        for shape, count, field in repeats
+    )
+
+
+@contextmanager
+def detect_nplusone(label='block', mode='raise', threshold=None):
+    """
+    Поиск повторяющихся запросов одной формы в блоке: при mode='raise'
+    выбрасывает NPlusOneError, при mode='log' пишет предупреждение.
+    """
+    collector = QueryShapeCollector(
+        threshold or settings.NPLUSONE_THRESHOLD
+    )
+    with ExitStack() as stack:
+        for connection in connections.all():
+            stack.enter_context(connection.execute_wrapper(collector))
+        yield collector
+    repeats = collector.get_repeats()
+    if not repeats:
+        return
+    message = format_repeats(label, repeats)
+    if mode == 'raise':
+        raise NPlusOneError(message)
+    logger.warning(message)
+
+
+class NPlusOneMiddleware:
+    """
+    Поиск N+1 запросов в каждом запросе к приложению. Режим задается
+    настройкой NPLUSONE_DETECTION: 'log' (разработка), 'raise' (тесты) или
+    None - middleware отключается при загрузке.
+    """
+
+    def __init__(self, get_response):
+        if not settings.NPLUSONE_DETECTION:
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+
+    def __call__(self, request):
+        with detect_nplusone(
+            f'{request.method} {request.path}',
+            settings.NPLUSONE_DETECTION
+        ):
+            response = self.get_response(request)
+        return response
@@ -0,0 +1,288 @@
+import hashlib
+import json
+from base64 import b64decode, b64encode
+from collections import OrderedDict
+from functools import partial
+
+from django.conf import settings
+from django.core.paginator import Paginator
+from django.db.models import F, Q
+from rest_framework.exceptions import NotFound, ValidationError
+from rest_framework.filters import OrderingFilter
+from rest_framework.pagination import PageNumberPagination
+from rest_framework.response import Response
+from rest_framework.utils.urls import remove_query_param, replace_query_param
+
+from api.cache import get_cache, get_versions
+
+COUNT_KEY = 'api:count:{}:{}:{}'
+
+
+class CountedPaginator(Paginator):
+    """Paginator с заранее известным количеством объектов."""
+
+    def __init__(self, object_list, per_page, count=None, **kwargs):
+        super().__init__(object_list, per_page, **kwargs)
+        if count is not None:
+            self.count = count
+
+
+class CachedCountPagination(PageNumberPagination):
+    """
+    Постраничная пагинация без COUNT(*) на каждой странице.
+
+    Без фильтров количество берется из счетчика представления
+    (`get_known_count()`, например Title.score_count для отзывов) или из
+    кэша, ключ которого включает версии `cache_dependencies`
+    (см. api/cache.py), поэтому оно точное. С фильтрами количество
+    проверяется запросом с LIMIT: если строк больше API_COUNT_LIMIT
+    (и больше, чем до конца запрошенной страницы), возвращается нижняя
+    граница и `count_exact: false`.
+    """
+
+    count_neutral_params = ('ordering', 'fields', 'omit', 'format')
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.count_exact = True
+        self.django_paginator_class = partial(
+            CountedPaginator, count=self.get_count(queryset, request, view)
+        )
+        return super().paginate_queryset(queryset, request, view)
+
+    def get_count(self, queryset, request, view):
+        """Количество объектов или None - посчитать через COUNT(*)."""
+        params = set(request.query_params).difference(
+            self.count_neutral_params,
+            (self.page_query_param, self.page_size_query_param)
+        )
+        page = request.query_params.get(self.page_query_param, 1)
+        if page in self.last_page_strings:
+            return None
+        if params:
+            return self.get_probed_count(queryset, request, page)
+        get_known_count = getattr(view, 'get_known_count', None)
+        if get_known_count is not None:
+            return get_known_count()
+        return self.get_cached_count(queryset, view)
+
+    def get_probed_count(self, queryset, request, page):
+        try:
+            page = max(int(page), 1)
+        except (TypeError, ValueError):
+            page = 1
+        limit = max(
+            settings.API_COUNT_LIMIT, page * self.get_page_size(request)
+        ) + 1
+        count = queryset.order_by()[:limit].count()
+        if count == limit:
+            self.count_exact = False
+        return count
+
+    def get_cached_count(self, queryset, view):
+        dependencies = getattr(view, 'cache_dependencies', ())
+        if not dependencies:
+            return None
+        versions = get_versions(dependencies)
+        key = COUNT_KEY.format(
+            view.basename,
+            ':'.join(str(version) for version in versions),
+            hashlib.md5(
+                repr(sorted(view.kwargs.items())).encode()
+            ).hexdigest()
+        )
+        cache = get_cache()
+        count = cache.get(key)
+        if count is None:
+            count = queryset.count()
+            cache.set(key, count, settings.API_CACHE_TIMEOUT)
+        return count
+
+    def get_paginated_response(self, data):
+        return Response(OrderedDict([
+            ('count', self.page.paginator.count),
+            ('count_exact', self.count_exact),
+            ('next', self.get_next_link()),
+            ('previous', self.get_previous_link()),
+            ('results', data)
+        ]))
+
+
+class KeysetPagination(CachedCountPagination):
+    """
+    Постраничная пагинация с опциональным режимом курсора.
+
+    Без параметра `cursor` работает как CachedCountPagination.
+    С параметром `?cursor=` (в том числе пустым) страницы выбираются по
+    ключу из полей `cursor_ordering` (например, `(name, id)`) или из полей
+    `?ordering=` с добавленным `id`: условие `WHERE (name, id) > (...)`
+    вместо `COUNT(*)` и `OFFSET`, поэтому стоимость страницы не зависит от
+    ее номера. Порядок по релевантности поиска (`?search=`) ключом не
+    выражается, и курсор с ним отклоняется.
+    """
+
+    cursor_query_param = 'cursor'
+    cursor_ordering = ('id',)
+    ordering_query_param = OrderingFilter.ordering_param
+    invalid_cursor_message = 'Некорректный курсор.'
+    unordered_cursor_message = (
+        'Курсор нельзя использовать вместе с поиском, используйте '
+        'параметр page.'
+    )
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.cursor_mode = self.cursor_query_param in request.query_params
+        if not self.cursor_mode:
+            return super().paginate_queryset(queryset, request, view)
+
+        self.request = request
+        self.base_url = request.build_absolute_uri()
+        self.ordering = self.get_cursor_ordering(queryset, request, view)
+        page_size = self.get_page_size(request)
+        position, reverse = self.decode_cursor(request)
+
+        # Значения ключа читаются из аннотаций: поле сортировки может быть
+        # псевдонимом (review_count), которого нет у объекта.
+        queryset = queryset.annotate(**{
+            self.get_alias(index): F(field)
+            for index, (field, _) in enumerate(self.ordering)
+        }).order_by(*(
+            f'-{field}' if descending != reverse else field
+            for field, descending in self.ordering
+        ))
+        if position is not None:
+            queryset = queryset.filter(
+                self.get_keyset_filter(position, reverse)
+            )
+
+        results = list(queryset[:page_size + 1])
+        has_more = len(results) > page_size
+        results = results[:page_size]
+        if reverse:
+            results.reverse()
+
+        self.page_results = results
+        self.has_next = has_more if not reverse else True
+        self.has_previous = position is not None if not reverse else has_more
+        if not results:
+            self.has_next = self.has_previous = False
+        return results
+
+    def get_cursor_ordering(self, queryset, request, view):
+        """
+        Ключ курсора - кортеж пар (поле, по убыванию). При `?ordering=`
+        это поля, которые применил OrderingFilter, и `id` в том же
+        направлении, что и последнее поле (чтобы подошел тот же индекс).
+        """
+        if queryset.query.extra_order_by:
+            raise ValidationError(
+                {self.cursor_query_param: self.unordered_cursor_message}
+            )
+        if self.ordering_query_param not in request.query_params:
+            fields = getattr(view, 'cursor_ordering', self.cursor_ordering)
+        else:
+            fields = [
+                field for field in queryset.query.order_by
+                if isinstance(field, str)
+            ]
+        ordering = [
+            (field.lstrip('-'), field.startswith('-')) for field in fields
+        ]
+        if not any(field in ('id', 'pk') for field, _ in ordering):
+            ordering.append(('id', bool(ordering) and ordering[-1][1]))
+        return tuple(ordering)
+
+    def get_alias(self, index):
+        return f'cursor_key_{index}'
+
+    def get_keyset_filter(self, position, reverse):
+        """
+        Строит условие лексикографического сравнения ключа:
+        (a, b) > (x, y)  <=>  a >= x AND (a > x OR (a = x AND b > y)); для
+        полей по убыванию сравнение обратное. Избыточная граница a >= x
+        нужна СУБД для поиска по диапазону индекса: по одному условию с OR
+        SQLite просматривает весь индекс от начала.
+        """
+        condition = Q()
+        for index, (field, descending) in enumerate(self.ordering):
+            lookup = 'lt' if descending != reverse else 'gt'
+            term = Q(**{f'{field}__{lookup}': position[index]})
+            for (prev_field, _), prev_value in zip(
+                self.ordering[:index], position[:index]
+            ):
+                term &= Q(**{prev_field: prev_value})
+            condition |= term
+        if len(self.ordering) > 1:
+            field, descending = self.ordering[0]
+            lookup = 'lte' if descending != reverse else 'gte'
+            condition &= Q(**{f'{field}__{lookup}': position[0]})
+        return condition
+
+    def get_position(self, instance):
+        position = []
+        for index in range(len(self.ordering)):
+            value = getattr(instance, self.get_alias(index))
+            if hasattr(value, 'isoformat'):
+                value = value.isoformat()
+            position.append(value)
+        return position
+
+    def decode_cursor(self, request):
+        encoded = request.query_params.get(self.cursor_query_param)
+        if not encoded:
+            return None, False
+        try:
+            data = json.loads(b64decode(encoded.encode('ascii')))
+            position = data['p']
+            reverse = bool(data.get('r'))
+            ordering = data.get('o')
+        except (TypeError, ValueError, KeyError):
+            raise NotFound(self.invalid_cursor_message)
+        if (
+            not isinstance(position, list)
+            or len(position) != len(self.ordering)
+            or ordering != self.get_ordering_label()
+        ):
+            raise NotFound(self.invalid_cursor_message)
+        return position, reverse
+
+    def get_ordering_label(self):
+        """Сортировка, для которой выдан курсор: '-review_count,-id'."""
+        return ','.join(
+            f'-{field}' if descending else field
+            for field, descending in self.ordering
+        )
+
+    def encode_cursor(self, position, reverse=False):
+        data = {'p': position, 'o': self.get_ordering_label()}
+        if reverse:
+            data['r'] = 1
+        encoded = b64encode(
+            json.dumps(data, separators=(',', ':')).encode('utf-8')
+        ).decode('ascii')
+        url = remove_query_param(self.base_url, self.page_query_param)
+        return replace_query_param(url, self.cursor_query_param, encoded)
+
+    def get_next_link(self):
+        if not self.cursor_mode:
+            return super().get_next_link()
+        if not self.has_next:
+            return None
+        return self.encode_cursor(self.get_position(self.page_results[-1]))
+
+    def get_previous_link(self):
+        if not self.cursor_mode:
+            return super().get_previous_link()
+        if not self.has_previous:
+            return None
+        return self.encode_cursor(
+            self.get_position(self.page_results[0]), reverse=True
+        )
+
+    def get_paginated_response(self, data):
+        if not self.cursor_mode:
+            return super().get_paginated_response(data)
+        return Response(OrderedDict([
+            ('next', self.get_next_link()),
+            ('previous', self.get_previous_link()),
+            ('results', data)
+        ]))
@@ -0,0 +1,32 @@
+from rest_framework.renderers import JSONRenderer
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+
+class FastJSONRenderer(JSONRenderer):
+    """
+    JSONRenderer на базе orjson, если библиотека установлена; иначе, а также
+    для форматированного вывода (indent) и ensure_ascii используется
+    стандартный модуль json.
+    """
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if orjson is None or self.ensure_ascii or data is None:
+            return super().render(data, accepted_media_type, renderer_context)
+        if self.get_indent(accepted_media_type, renderer_context or {}):
+            return super().render(data, accepted_media_type, renderer_context)
+        ret = orjson.dumps(
+            data,
+            default=self.encoder_class().default,
+            option=orjson.OPT_NON_STR_KEYS
+        )
+        # Как и JSONRenderer, экранируем U+2028 и U+2029 для совместимости
+        # с JavaScript.
+        return ret.replace(
+            b'\xe2\x80\xa8', b'\\u2028'
+        ).replace(
+            b'\xe2\x80\xa9', b'\\u2029'
+        )
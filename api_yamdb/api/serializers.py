@@ -1,16 +1,60 @@
+from django.db import connection, transaction
+from django.utils.encoding import smart_str
 from rest_framework import serializers
+from rest_framework.relations import MANY_RELATION_KWARGS, ManyRelatedField
 from rest_framework.validators import UniqueValidator
 from rest_framework.exceptions import ValidationError
 from rest_framework.generics import get_object_or_404
 
 from reviews.models import (
+    Affiliation,
     Category,
     Comment,
     Genre,
     Review,
     Title,
+    TitleStatistics,
     User
 )
+from api.cache import bump_version
+from api.signals import CACHE_NAMESPACES
+from api.sparse import SparseFieldsSerializerMixin
+
+
+class BulkManyRelatedField(ManyRelatedField):
+    """Список слагов, проверяемый одним запросом вместо запроса на слаг."""
+
+    def to_internal_value(self, data):
+        if isinstance(data, str) or not hasattr(data, '__iter__'):
+            self.fail('not_a_list', input_type=type(data).__name__)
+        if not self.allow_empty and len(data) == 0:
+            self.fail('empty')
+        slug_field = self.child_relation.slug_field
+        try:
+            objects = self.child_relation.get_queryset().in_bulk(
+                data, field_name=slug_field
+            )
+        except (TypeError, ValueError):
+            self.child_relation.fail('invalid')
+        for slug in data:
+            if slug not in objects:
+                self.child_relation.fail(
+                    'does_not_exist', slug_name=slug_field,
+                    value=smart_str(slug)
+                )
+        return [objects[slug] for slug in data]
+
+
+class BulkSlugRelatedField(serializers.SlugRelatedField):
+    """SlugRelatedField, при many=True проверяющее слаги одним запросом."""
+
+    @classmethod
+    def many_init(cls, *args, **kwargs):
+        list_kwargs = {'child_relation': cls(*args, **kwargs)}
+        for key in kwargs:
+            if key in MANY_RELATION_KWARGS:
+                list_kwargs[key] = kwargs[key]
+        return BulkManyRelatedField(**list_kwargs)
 
 
 class UserSerializer(serializers.ModelSerializer):
@@ -86,14 +130,17 @@ class GetTokenSerializer(serializers.Serializer):
     confirmation_code = serializers.CharField()
 
 
-class TitleSerializer(serializers.ModelSerializer):
+class TitleSerializer(
+    SparseFieldsSerializerMixin,
+    serializers.ModelSerializer
+):
     """Сериализация объектов типа Title (произведения)."""
 
     category = serializers.SlugRelatedField(
         slug_field='slug',
         queryset=Category.objects.all()
     )
-    genre = serializers.SlugRelatedField(
+    genre = BulkSlugRelatedField(
         many=True,
         slug_field='slug',
         queryset=Genre.objects.all()
@@ -102,10 +149,21 @@ class TitleSerializer(serializers.ModelSerializer):
 
     class Meta:
         model = Title
-        fields = '__all__'
+        fields = (
+            'id',
+            'name',
+            'year',
+            'rating',
+            'description',
+            'genre',
+            'category',
+        )
 
 
-class CategorySerializer(serializers.ModelSerializer):
+class CategorySerializer(
+    SparseFieldsSerializerMixin,
+    serializers.ModelSerializer
+):
     """Сериализация объектов типа Category (категории)."""
 
     lookup_field = 'slug'
@@ -115,7 +173,10 @@ class CategorySerializer(serializers.ModelSerializer):
         fields = ('name', 'slug',)
 
 
-class GenreSerializer(serializers.ModelSerializer):
+class GenreSerializer(
+    SparseFieldsSerializerMixin,
+    serializers.ModelSerializer
+):
     """Сериализация объектов типа Genre (жанры)."""
 
     lookup_field = 'slug'
@@ -131,17 +192,234 @@ class GenreSerializer(serializers.ModelSerializer):
 class TitleSerializerGet(TitleSerializer):
     """Отдельная сериализация для метода GET
        (получение списка произведений с рейтингом).
+       Рейтинг и количество отзывов (score_count) хранятся в модели Title
+       и обновляются при записи отзывов.
     """
 
-    rating = serializers.IntegerField(
-        source='reviews__score__avg',
-        read_only=True
-    )
     category = CategorySerializer()
     genre = GenreSerializer(many=True, read_only=True)
+    review_count = serializers.IntegerField(
+        source='score_count', read_only=True
+    )
+
+    class Meta(TitleSerializer.Meta):
+        fields = TitleSerializer.Meta.fields + ('review_count',)
+
+
+class TitleStatisticsSerializer(serializers.ModelSerializer):
+    """Сводка по оценкам произведения: гистограмма, среднее и медиана."""
+
+    scores = serializers.SerializerMethodField()
+    mean = serializers.FloatField(read_only=True)
+    median = serializers.FloatField(read_only=True)
+    review_count = serializers.IntegerField(read_only=True)
+
+    class Meta:
+        model = TitleStatistics
+        fields = (
+            'scores',
+            'mean',
+            'median',
+            'review_count',
+            'last_review',
+        )
+
+    def get_scores(self, obj):
+        return {
+            str(score): number for score, number in obj.histogram.items()
+        }
+
+
+class TitleBulkListSerializer(serializers.ListSerializer):
+    """
+    Массовое создание и изменение произведений.
+
+    Слаги категорий и жанров всех элементов проверяются двумя запросами,
+    произведения и их жанры записываются через bulk_create/bulk_update
+    в одной транзакции. Ошибки возвращаются списком по элементам
+    (пустой словарь - элемент без ошибок), и тогда ничего не
+    записывается. bulk-методы не отправляют сигналы, поэтому версии кэша
+    (api/signals.py) увеличиваются здесь.
+    """
+
+    lookup_fields = ('id', 'category', 'genre')
+
+    def to_internal_value(self, data):
+        if not isinstance(data, list) or not data:
+            return super().to_internal_value(data)
+        items, field_errors = self.validate_items(data)
+        category_slugs = {
+            item['category'] for item in items if 'category' in item
+        }
+        genre_slugs = {
+            slug for item in items for slug in item.get('genre', ())
+        }
+        categories = Category.objects.in_bulk(
+            category_slugs, field_name='slug'
+        )
+        genres = Genre.objects.in_bulk(genre_slugs, field_name='slug')
+        titles = {}
+        if self.instance is not None:
+            titles = self.instance.in_bulk(
+                {item['id'] for item in items if 'id' in item}
+            )
+        errors = [
+            {**self.resolve_item(item, categories, genres, titles), **error}
+            for item, error in zip(items, field_errors)
+        ]
+        if any(errors):
+            raise ValidationError(errors)
+        return items
+
+    def validate_items(self, data):
+        """
+        Проверка полей всех элементов; возвращает значения и ошибки по
+        элементам. Для элемента с ошибками значениями служат его поля из
+        lookup_fields, прошедшие проверку, чтобы ошибки в слагах и id
+        возвращались вместе с ошибками остальных полей.
+        """
+        items, errors = [], []
+        for raw in data:
+            try:
+                items.append(self.child.run_validation(raw))
+                errors.append({})
+            except ValidationError as error:
+                items.append(self.validate_lookups(raw, error.detail))
+                errors.append(error.detail)
+        return items, errors
+
+    def validate_lookups(self, raw, detail):
+        item = {}
+        if not isinstance(raw, dict):
+            return item
+        for name in self.lookup_fields:
+            if name not in raw or name in detail:
+                continue
+            try:
+                item[name] = self.child.fields[name].run_validation(raw[name])
+            except ValidationError:
+                pass
+        return item
+
+    def resolve_item(self, item, categories, genres, titles):
+        """Замена id и слагов элемента объектами; возвращает ошибки."""
+        error = {}
+        if self.instance is not None:
+            if 'id' not in item:
+                error['id'] = ['Обязательное поле.']
+            elif item['id'] not in titles:
+                error['id'] = [f'Произведение {item["id"]} не найдено.']
+            else:
+                item['title'] = titles[item['id']]
+        if 'category' in item:
+            if item['category'] in categories:
+                item['category'] = categories[item['category']]
+            else:
+                error['category'] = [
+                    f'Категория {item["category"]} не найдена.'
+                ]
+        if 'genre' in item:
+            missing = [slug for slug in item['genre'] if slug not in genres]
+            if missing:
+                error['genre'] = [f'Жанры не найдены: {", ".join(missing)}.']
+            else:
+                item['genre'] = [genres[slug] for slug in item['genre']]
+        return error
+
+    def get_affiliations(self, items):
+        return [
+            Affiliation(title=item['title'], genre=genre)
+            for item in items if 'genre' in item
+            for genre in dict.fromkeys(item['genre'])
+        ]
+
+    def create(self, validated_data):
+        fields = ('name', 'year', 'description', 'category')
+        titles = [
+            Title(**{field: item[field] for field in fields if field in item})
+            for item in validated_data
+        ]
+        with transaction.atomic():
+            self.insert_titles(titles)
+            for title, item in zip(titles, validated_data):
+                item['title'] = title
+            Affiliation.objects.bulk_create(
+                self.get_affiliations(validated_data)
+            )
+        self.bump_versions()
+        return titles
+
+    def insert_titles(self, titles):
+        """
+        Запись произведений с получением их id. Без RETURNING в SQLite id
+        берутся последними добавленными: SQLite допускает одну пишущую
+        транзакцию, поэтому чужие строки между ними не появятся, а id
+        растут по порядку. В других СУБД без RETURNING (MySQL) вставки
+        параллельных транзакций могут чередоваться, и произведения
+        сохраняются по одному.
+        """
+        if connection.features.can_return_rows_from_bulk_insert:
+            Title.objects.bulk_create(titles)
+        elif connection.vendor == 'sqlite':
+            Title.objects.bulk_create(titles)
+            ids = Title.objects.order_by('-pk').values_list(
+                'pk', flat=True
+            )[:len(titles)]
+            for title, pk in zip(titles, reversed(ids)):
+                title.pk = pk
+        else:
+            for title in titles:
+                title.save(force_insert=True)
+
+    def update(self, instance, validated_data):
+        fields = set()
+        for item in validated_data:
+            for field in ('name', 'year', 'description', 'category'):
+                if field in item:
+                    setattr(item['title'], field, item[field])
+                    fields.add(field)
+        titles = [item['title'] for item in validated_data]
+        with transaction.atomic():
+            if fields:
+                Title.objects.bulk_update(titles, fields)
+            Affiliation.objects.filter(title__in=[
+                item['title'] for item in validated_data if 'genre' in item
+            ]).delete()
+            Affiliation.objects.bulk_create(
+                self.get_affiliations(validated_data)
+            )
+        self.bump_versions()
+        return titles
+
+    def bump_versions(self):
+        bump_version(CACHE_NAMESPACES[Title])
+        bump_version(CACHE_NAMESPACES[Affiliation])
+
+
+class TitleBulkSerializer(serializers.ModelSerializer):
+    """Элемент массовой загрузки произведений: жанры и категория - слаги."""
+
+    id = serializers.IntegerField(required=False)
+    category = serializers.SlugField()
+    genre = serializers.ListField(child=serializers.SlugField())
+
+    class Meta:
+        model = Title
+        fields = (
+            'id',
+            'name',
+            'year',
+            'description',
+            'genre',
+            'category',
+        )
+        list_serializer_class = TitleBulkListSerializer
 
 
-class ReviewSerializer(serializers.ModelSerializer):
+class ReviewSerializer(
+    SparseFieldsSerializerMixin,
+    serializers.ModelSerializer
+):
     """Сериализация объектов типа Review (Отзывы на произведения)."""
 
     title = serializers.SlugRelatedField(
@@ -178,9 +456,13 @@ class ReviewSerializer(serializers.ModelSerializer):
     class Meta:
         model = Review
         fields = '__all__'
+        read_only_fields = ('comment_count',)
 
 
-class CommentSerializer(serializers.ModelSerializer):
+class CommentSerializer(
+    SparseFieldsSerializerMixin,
+    serializers.ModelSerializer
+):
     """Сериализация объектов типа Comment (комментарий к отзыву)."""
 
     review = serializers.SlugRelatedField(
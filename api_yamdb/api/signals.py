@@ -0,0 +1,188 @@
+from django.db.backends.signals import connection_created
+from django.db.models.signals import (
+    m2m_changed,
+    post_delete,
+    post_save,
+    pre_delete,
+    pre_save
+)
+from django.dispatch import receiver
+
+from api import autocomplete, slow_queries
+from api.authentication import (
+    AUTH_VERSION_KEY,
+    invalidate_cached_user,
+    set_auth_state
+)
+from api.cache import (
+    BULK_LOAD_NAMESPACE,
+    REVIEW_COMMENTS_NAMESPACE,
+    TITLE_REVIEWS_NAMESPACE,
+    bump_version,
+    bump_version_on_commit,
+    get_cache
+)
+from reviews.models import (
+    Affiliation,
+    Category,
+    Comment,
+    Genre,
+    Review,
+    Title,
+    User
+)
+from reviews.signals import bulk_loaded, is_deleting
+
+CACHE_NAMESPACES = {
+    Title: 'title',
+    Category: 'category',
+    Genre: 'genre',
+    Affiliation: 'affiliation',
+    Review: 'review',
+    Comment: 'comment',
+    User: 'user',
+}
+
+AUTHOR_NAMESPACE = 'author'
+
+
+def invalidate_cached_responses(sender, **kwargs):
+    bump_version_on_commit(CACHE_NAMESPACES[sender])
+
+
+# Только для моделей из CACHE_NAMESPACES: получатель без sender отключил бы
+# быстрое удаление (без загрузки объектов) при любом каскадном удалении.
+for model in CACHE_NAMESPACES:
+    post_save.connect(invalidate_cached_responses, sender=model)
+    post_delete.connect(invalidate_cached_responses, sender=model)
+
+
+@receiver(bulk_loaded)
+def invalidate_after_bulk_load(sender, **kwargs):
+    """Массовая загрузка не отправляет сигналы моделей: сбрасываем весь
+       кэш API.
+    """
+    for namespace in (
+        *CACHE_NAMESPACES.values(), AUTHOR_NAMESPACE, BULK_LOAD_NAMESPACE
+    ):
+        bump_version(namespace)
+
+
+@receiver(post_save, sender=Title)
+@receiver(post_delete, sender=Title)
+def invalidate_title_reviews(sender, instance, **kwargs):
+    """Отзывы показывают название произведения."""
+    bump_version_on_commit(TITLE_REVIEWS_NAMESPACE.format(instance.pk))
+
+
+@receiver(post_save, sender=Review)
+@receiver(post_delete, sender=Review)
+def invalidate_review_lists(sender, instance, **kwargs):
+    """Комментарии показывают текст отзыва."""
+    bump_version_on_commit(TITLE_REVIEWS_NAMESPACE.format(instance.title_id))
+    bump_version_on_commit(REVIEW_COMMENTS_NAMESPACE.format(instance.pk))
+
+
+@receiver(post_save, sender=Comment)
+@receiver(post_delete, sender=Comment)
+def invalidate_comment_lists(sender, instance, created=False, signal=None,
+                             **kwargs):
+    """
+    Добавление и удаление комментария меняют и Review.comment_count в
+    списке отзывов; при каскадном удалении отзыва его версии сбрасывает
+    сам отзыв.
+    """
+    if is_deleting(Review, instance.review_id):
+        return
+    bump_version_on_commit(
+        REVIEW_COMMENTS_NAMESPACE.format(instance.review_id)
+    )
+    if created or signal is post_delete:
+        # Отзыв уже загружен, если комментарий получен через него (API).
+        bump_version_on_commit(
+            TITLE_REVIEWS_NAMESPACE.format(instance.review.title_id)
+        )
+
+
+@receiver(m2m_changed, sender=Affiliation)
+def invalidate_cached_genres(sender, action, **kwargs):
+    if action.startswith('post_'):
+        bump_version_on_commit(CACHE_NAMESPACES[Affiliation])
+
+
+@receiver(pre_save, sender=Title)
+@receiver(pre_save, sender=Genre)
+@receiver(pre_save, sender=Category)
+@receiver(pre_delete, sender=Title)
+@receiver(pre_delete, sender=Genre)
+@receiver(pre_delete, sender=Category)
+def remember_autocomplete_versions(sender, instance, **kwargs):
+    autocomplete.index.remember_versions(instance)
+
+
+@receiver(post_save, sender=Title)
+@receiver(post_save, sender=Genre)
+@receiver(post_save, sender=Category)
+def update_autocomplete_index(sender, instance, **kwargs):
+    autocomplete.index.update(instance)
+
+
+@receiver(post_delete, sender=Title)
+@receiver(post_delete, sender=Genre)
+@receiver(post_delete, sender=Category)
+def remove_from_autocomplete_index(sender, instance, **kwargs):
+    autocomplete.index.update(instance, deleted=True)
+
+
+@receiver(post_save, sender=User)
+@receiver(post_delete, sender=User)
+def invalidate_authenticated_user(sender, instance, **kwargs):
+    invalidate_cached_user(instance.pk)
+
+
+@receiver(pre_save, sender=User)
+def bump_auth_version(sender, instance, **kwargs):
+    """
+    Смена роли, статуса суперпользователя или блокировка отзывают ранее
+    выданные токены с утверждением о роли. Заодно отмечается смена
+    username, который показывается в отзывах и комментариях.
+    """
+    instance._username_changed = False
+    if instance.pk is None:
+        return
+    previous = User.objects.filter(pk=instance.pk).values_list(
+        'role', 'is_superuser', 'is_active', 'username'
+    ).first()
+    if previous is None:
+        return
+    if previous[:3] != (
+        instance.role, instance.is_superuser, instance.is_active
+    ):
+        instance.auth_version += 1
+    instance._username_changed = previous[3] != instance.username
+
+
+@receiver(post_save, sender=User)
+def invalidate_author_names(sender, instance, **kwargs):
+    """
+    Списки отзывов и комментариев зависят от пользователей только через
+    имя автора, поэтому их версия `author` меняется только при смене
+    username, а не при каждом сохранении пользователя.
+    """
+    if getattr(instance, '_username_changed', False):
+        bump_version_on_commit(AUTHOR_NAMESPACE)
+
+
+@receiver(post_save, sender=User)
+def update_auth_state(sender, instance, **kwargs):
+    set_auth_state(instance)
+
+
+@receiver(post_delete, sender=User)
+def remove_auth_state(sender, instance, **kwargs):
+    get_cache().delete(AUTH_VERSION_KEY.format(instance.pk))
+
+
+@receiver(connection_created)
+def install_slow_query_log(sender, connection, **kwargs):
+    slow_queries.install(connection)
@@ -0,0 +1,106 @@
+import json
+import logging
+import threading
+import time
+from contextvars import ContextVar
+from datetime import datetime
+
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from django.db import DatabaseError
+
+logger = logging.getLogger(__name__)
+
+# Представление, в котором выполняется запрос (задается middleware).
+current_view = ContextVar('slow_query_view', default=None)
+
+state = threading.local()
+
+
+def explain(connection, sql, params):
+    """План запроса: EXPLAIN QUERY PLAN для SQLite, EXPLAIN для остальных."""
+    prefix = 'EXPLAIN QUERY PLAN' if connection.vendor == 'sqlite' else (
+        'EXPLAIN'
+    )
+    state.explaining = True
+    try:
+        with connection.cursor() as cursor:
+            cursor.execute(f'{prefix} {sql}', params)
+            return [
+                ' '.join(str(column) for column in row)
+                for row in cursor.fetchall()
+            ]
+    except DatabaseError as exc:
+        return [f'EXPLAIN failed: {exc}']
+    finally:
+        state.explaining = False
+
+
+def log_query(connection, sql, params, many, duration):
+    plan = None
+    if not many and sql.lstrip()[:6].upper() == 'SELECT':
+        plan = explain(connection, sql, params)
+    logger.warning(json.dumps({
+        'time': datetime.now().isoformat(timespec='seconds'),
+        'duration_ms': round(duration * 1000, 2),
+        'database': connection.alias,
+        'view': current_view.get(),
+        'sql': sql,
+        # У executemany параметров по строке на запись, в журнал не пишутся.
+        'params': None if many else params,
+        'plan': plan,
+    }, ensure_ascii=False, default=str))
+
+
+def log_slow_queries(execute, sql, params, many, context):
+    """
+    execute_wrapper: запрос дольше SLOW_QUERY_THRESHOLD_MS миллисекунд
+    пишется в журнал с параметрами, представлением и планом выполнения.
+    """
+    if getattr(state, 'explaining', False):
+        return execute(sql, params, many, context)
+    start = time.perf_counter()
+    result = execute(sql, params, many, context)
+    duration = time.perf_counter() - start
+    threshold = settings.SLOW_QUERY_THRESHOLD_MS
+    if threshold is not None and duration * 1000 >= threshold:
+        log_query(context['connection'], sql, params, many, duration)
+    return result
+
+
+def install(connection):
+    """
+    Подключение журнала к соединению (сигнал connection_created).
+    Обертка ставится первой в списке: connection.execute_wrapper() снимает
+    последнюю обертку, и подключение посреди такого блока (первый запрос
+    открывает соединение) не должно сдвинуть чужую обертку.
+    """
+    if settings.SLOW_QUERY_THRESHOLD_MS is None:
+        return
+    if log_slow_queries not in connection.execute_wrappers:
+        connection.execute_wrappers.insert(0, log_slow_queries)
+
+
+class SlowQueryMiddleware:
+    """
+    Имя маршрута и представления для записей журнала медленных запросов,
+    например `GET titles-list api.views.TitleViewSet`.
+    """
+
+    def __init__(self, get_response):
+        if settings.SLOW_QUERY_THRESHOLD_MS is None:
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+
+    def __call__(self, request):
+        token = current_view.set(f'{request.method} {request.path}')
+        try:
+            return self.get_response(request)
+        finally:
+            current_view.reset(token)
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        current_view.set(
+            f'{request.method} {request.resolver_match.view_name} '
+            f'{view_func.__module__}.{view_func.__name__}'
+        )
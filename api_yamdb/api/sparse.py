@@ -0,0 +1,119 @@
+from rest_framework.exceptions import ValidationError
+from rest_framework.permissions import SAFE_METHODS
+from rest_framework.serializers import ListSerializer
+
+FIELDS_PARAM = 'fields'
+OMIT_PARAM = 'omit'
+
+
+def parse_field_list(value):
+    return {name.strip() for name in value.split(',') if name.strip()}
+
+
+def get_sparse_fields(request, available):
+    """
+    Поля ответа по параметрам `?fields=` и `?omit=` (через запятую) или
+    None, если параметры не переданы. Применяется только к чтению:
+    при записи сериализатор должен проверять все поля.
+    """
+    if request is None or request.method not in SAFE_METHODS:
+        return None
+    params = request.query_params
+    fields = parse_field_list(params.get(FIELDS_PARAM, ''))
+    omit = parse_field_list(params.get(OMIT_PARAM, ''))
+    if not fields and not omit:
+        return None
+    unknown = (fields | omit).difference(available)
+    if unknown:
+        raise ValidationError({
+            FIELDS_PARAM: f'Неизвестные поля: {", ".join(sorted(unknown))}.'
+        })
+    return [
+        name for name in available
+        if (not fields or name in fields) and name not in omit
+    ]
+
+
+class SparseFieldsSerializerMixin:
+    """
+    Сериализатор возвращает только поля из `?fields=` без полей из `?omit=`.
+    Вложенные сериализаторы параметры запроса не учитывают.
+    """
+
+    def get_fields(self):
+        fields = super().get_fields()
+        parent = self.parent
+        if isinstance(parent, ListSerializer):
+            parent = parent.parent
+        if parent is not None:
+            return fields
+        names = get_sparse_fields(self.context.get('request'), fields)
+        if names is None:
+            return fields
+        return {name: fields[name] for name in names}
+
+
+class SparseFieldsViewMixin:
+    """
+    Запрос к базе только за данными запрошенных полей.
+
+    Связанные объекты загружаются через `select_related_fields`
+    (ForeignKey) и `prefetch_related_fields` (ManyToMany) только если
+    соответствующее поле есть в ответе; при `?fields=`/`?omit=` столбцы
+    таблицы, не нужные ни ответу, ни сортировке, откладываются через
+    only().
+    """
+
+    select_related_fields = ()
+    prefetch_related_fields = ()
+
+    def get_sparse_sources(self):
+        """Атрибуты модели, нужные полям ответа, или None - нужны все."""
+        serializer_class = self.get_serializer_class()
+        if not issubclass(serializer_class, SparseFieldsSerializerMixin):
+            return None
+        fields = serializer_class().fields
+        names = get_sparse_fields(self.request, fields)
+        if names is None:
+            return None
+        return {fields[name].source.split('.')[0] for name in names}
+
+    def filter_queryset(self, queryset):
+        """
+        Вызывается и для списка, и в get_object(), поэтому работает и с
+        представлениями, переопределяющими get_queryset().
+        """
+        queryset = super().filter_queryset(queryset)
+        sources = self.get_sparse_sources()
+        select = [
+            field for field in self.select_related_fields
+            if sources is None or field in sources
+        ]
+        prefetch = [
+            field for field in self.prefetch_related_fields
+            if sources is None or field in sources
+        ]
+        if select:
+            queryset = queryset.select_related(*select)
+        if prefetch:
+            queryset = queryset.prefetch_related(*prefetch)
+        if sources is None:
+            return queryset
+        opts = queryset.model._meta
+        columns = {field.name for field in opts.concrete_fields}
+        # Внешние ключи не откладываются: это короткие целые столбцы, а
+        # связанный менеджер (title.reviews) читает их у каждого объекта.
+        relations = {
+            field.name for field in opts.concrete_fields if field.is_relation
+        }
+        ordering = {
+            field.lstrip('-') for field in (
+                *queryset.query.order_by,
+                *opts.ordering,
+                *getattr(self, 'cursor_ordering', ())
+            )
+            if isinstance(field, str)
+        }
+        return queryset.only(
+            opts.pk.name, *columns.intersection(sources | ordering | relations)
+        )
@@ -0,0 +1,117 @@
+import logging
+import time
+
+from django.core.exceptions import ImproperlyConfigured
+from rest_framework.permissions import SAFE_METHODS
+from rest_framework.settings import api_settings
+from rest_framework.throttling import BaseThrottle
+
+from api.cache import get_cache
+
+logger = logging.getLogger(__name__)
+
+BUCKET_KEY = 'api:throttle:{}:{}'
+LOCK_KEY = 'api:throttle-lock:{}:{}'
+
+# Блокировка корзины на время чтения и записи: время жизни в секундах (на
+# случай падения процесса) и пауза между попытками захвата. Захват
+# повторяется, пока не истечет время жизни: к этому моменту блокировка
+# упавшего процесса освободится сама.
+LOCK_TIMEOUT = 5
+LOCK_WAIT = 0.005
+
+PERIODS = {'s': 1, 'm': 60, 'h': 60 * 60, 'd': 60 * 60 * 24}
+
+
+def parse_rate(rate):
+    """'10/min' -> (емкость 10, пополнение 10 / 60 токенов в секунду)."""
+    number, period = rate.split('/')
+    capacity = int(number)
+    return capacity, capacity / PERIODS[period[0]]
+
+
+class TokenBucketThrottle(BaseThrottle):
+    """
+    Ограничение частоты запросов по алгоритму token bucket.
+
+    Скорость берется из DEFAULT_THROTTLE_RATES по `scope` (или по атрибуту
+    `throttle_scope` представления): 'N/период' - корзина на N запросов,
+    пополняемая N токенами за период. Состояние корзины - пара
+    (токены, время) в кэше API, общем для всех процессов (см.
+    api/checks.py). Чтение и запись корзины выполняются под блокировкой,
+    захватываемой атомарным cache.add(), поэтому одновременные запросы
+    клиента не потратят один и тот же токен. Занятая блокировка - не
+    повод отклонить запрос: если ее не удалось захватить за LOCK_TIMEOUT,
+    это записывается в лог, а токен списывается без блокировки.
+    Ограничиваются только изменяющие запросы.
+    """
+
+    scope = None
+    timer = time.time
+
+    def get_rate(self, view):
+        scope = self.scope or getattr(view, 'throttle_scope', None)
+        if scope is None:
+            return None, None
+        try:
+            return scope, api_settings.DEFAULT_THROTTLE_RATES[scope]
+        except KeyError:
+            raise ImproperlyConfigured(
+                f'No throttle rate set for scope "{scope}"'
+            )
+
+    def get_ident(self, request):
+        if request.user and request.user.is_authenticated:
+            return f'user:{request.user.pk}'
+        return f'ip:{super().get_ident(request)}'
+
+    def allow_request(self, request, view):
+        if request.method in SAFE_METHODS:
+            return True
+        scope, rate = self.get_rate(view)
+        if rate is None:
+            return True
+        capacity, refill = parse_rate(rate)
+        cache = get_cache()
+        ident = self.get_ident(request)
+        key = BUCKET_KEY.format(scope, ident)
+        lock = LOCK_KEY.format(scope, ident)
+        if not self.acquire(cache, lock):
+            logger.warning(
+                f'Throttle lock {lock} was not acquired in {LOCK_TIMEOUT} s, '
+                f'updating the bucket without it.'
+            )
+            return self.take_token(cache, key, capacity, refill)
+        try:
+            return self.take_token(cache, key, capacity, refill)
+        finally:
+            cache.delete(lock)
+
+    def acquire(self, cache, lock):
+        deadline = time.monotonic() + LOCK_TIMEOUT
+        while not cache.add(lock, 1, LOCK_TIMEOUT):
+            if time.monotonic() >= deadline:
+                return False
+            time.sleep(LOCK_WAIT)
+        return True
+
+    def take_token(self, cache, key, capacity, refill):
+        now = self.timer()
+        tokens, updated = cache.get(key, (capacity, now))
+        tokens = min(capacity, tokens + (now - updated) * refill)
+        self.wait_time = 0
+        if tokens < 1:
+            self.wait_time = (1 - tokens) / refill
+            cache.set(key, (tokens, now), int(capacity / refill) + 1)
+            return False
+        cache.set(key, (tokens - 1, now), int(capacity / refill) + 1)
+        return True
+
+    def wait(self):
+        return self.wait_time
+
+
+class AuthTokenBucketThrottle(TokenBucketThrottle):
+    """Ограничение для регистрации и получения токена."""
+
+    scope = 'auth'
@@ -11,6 +11,7 @@ from api.views import (
     TitleViewSet,
     CategoryViewSet,
     GenreViewSet,
+    autocomplete,
     signup,
     get_token
 )
@@ -53,6 +54,7 @@ auth_path = [
 ]
 
 urlpatterns = [
+    path('v1/autocomplete/', autocomplete),
     path('v1/', include(router_v1.urls)),
     path('v1/', include(auth_path))
 ]
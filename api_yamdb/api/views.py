@@ -9,26 +9,26 @@ from rest_framework import (
 from rest_framework.decorators import (
     action,
     api_view,
-    permission_classes
+    permission_classes,
+    throttle_classes
 )
 from rest_framework.response import Response
-from rest_framework.pagination import PageNumberPagination
 from rest_framework.permissions import AllowAny
-from rest_framework_simplejwt.tokens import AccessToken
 from rest_framework.filters import SearchFilter
-from django.core.mail import send_mail
 from django.contrib.auth.tokens import default_token_generator
 from django.shortcuts import get_object_or_404
-from django.db.models import Avg
 from django.db import IntegrityError
+from django.db.models import F
 from django_filters.rest_framework import DjangoFilterBackend
 from django.conf import settings
 
+from reviews.jobs import enqueue
 from reviews.models import (
     Category,
     Genre,
     Review,
     Title,
+    TitleStatistics,
     User
 )
 from api.serializers import (
@@ -40,17 +40,33 @@ from api.serializers import (
     TitleSerializer,
     CommentSerializer,
     ReviewSerializer,
-    TitleSerializerGet
+    TitleBulkSerializer,
+    TitleSerializerGet,
+    TitleStatisticsSerializer
 )
 from api.permissions import (
     IsAdmin,
     IsAdminOrReadOnly,
     IsAdminAuthorOrReadOnly
 )
-from api.filters import TitleFilter
+from api.authentication import RoleAccessToken, get_user_instance
+from api.autocomplete import index as autocomplete_index
+from api.cache import (
+    BULK_LOAD_NAMESPACE,
+    REVIEW_COMMENTS_NAMESPACE,
+    TITLE_REVIEWS_NAMESPACE,
+    CachedResponseMixin,
+    ConditionalGetMixin
+)
+from api.filters import FullTextSearchFilter, TitleFilter
+from api.metrics import SerializerTimingMixin
+from api.pagination import CachedCountPagination, KeysetPagination
+from api.sparse import SparseFieldsViewMixin
+from api.throttling import AuthTokenBucketThrottle, TokenBucketThrottle
 
 
 class CreateDestroyListViewSet(
+    SerializerTimingMixin,
     mixins.CreateModelMixin,
     mixins.DestroyModelMixin,
     mixins.ListModelMixin,
@@ -59,7 +75,7 @@ class CreateDestroyListViewSet(
     pass
 
 
-class UserViewSet(viewsets.ModelViewSet):
+class UserViewSet(SerializerTimingMixin, viewsets.ModelViewSet):
     """Администратор получает список пользователей, может создавать
     пользователя. Пользователь по url 'users/me/' может получать и изменять
      свои данные, кроме поля 'Роль'."""
@@ -71,7 +87,8 @@ class UserViewSet(viewsets.ModelViewSet):
     filter_backends = (filters.SearchFilter,)
     search_fields = ('username',)
     lookup_field = 'username'
-    pagination_class = PageNumberPagination
+    pagination_class = CachedCountPagination
+    cache_dependencies = ('user',)
 
     @action(
         methods=('get', 'patch'),
@@ -80,7 +97,7 @@ class UserViewSet(viewsets.ModelViewSet):
         permission_classes=(permissions.IsAuthenticated,)
     )
     def user_own_account(self, request):
-        user = request.user
+        user = get_user_instance(request.user)
         if request.method == 'GET':
             serializer = self.get_serializer(user)
             return Response(serializer.data, status=status.HTTP_200_OK)
@@ -96,10 +113,12 @@ class UserViewSet(viewsets.ModelViewSet):
 
 @api_view(['POST'])
 @permission_classes([AllowAny])
+@throttle_classes([AuthTokenBucketThrottle])
 def signup(request):
     """
     Пользователь отправляет свои 'username' и 'email' на 'auth/signup/ и
-    получает код подтверждения на email.
+    получает код подтверждения на email. Письмо ставится в очередь и
+    отправляется обработчиком run_jobs, не задерживая ответ.
     """
 
     serializer = SignUpSerializer(data=request.data)
@@ -112,12 +131,12 @@ def signup(request):
             email=email
         )
         confirmation_code = default_token_generator.make_token(user)
-        send_mail(
-            'Код подтверждения',
-            f'Ваш код подтверждения: {confirmation_code}',
-            settings.DOMAIN_NAME,
-            [user.email],
-            fail_silently=False,
+        enqueue(
+            'send_mail',
+            subject='Код подтверждения',
+            message=f'Ваш код подтверждения: {confirmation_code}',
+            from_email=settings.DOMAIN_NAME,
+            recipient_list=[user.email],
         )
         return Response(serializer.data, status=status.HTTP_200_OK)
     except IntegrityError:
@@ -129,6 +148,7 @@ def signup(request):
 
 @api_view(['POST'])
 @permission_classes([AllowAny])
+@throttle_classes([AuthTokenBucketThrottle])
 def get_token(request):
     """
     Пользователь отправляет свои 'username' и 'confirmation_code'
@@ -141,24 +161,80 @@ def get_token(request):
     confirmation_code = serializer.validated_data['confirmation_code']
     user = get_object_or_404(User, username=username)
     if default_token_generator.check_token(user, confirmation_code):
-        token = str(AccessToken.for_user(user))
+        token = str(RoleAccessToken.for_user(user))
         return Response({'token': token}, status=status.HTTP_200_OK)
     raise serializers.ValidationError('Введен неверный код.')
 
 
-class TitleViewSet(viewsets.ModelViewSet):
+AUTOCOMPLETE_LIMIT = 10
+
+AUTOCOMPLETE_MAX_LIMIT = 50
+
+
+TITLE_BATCH_MAX_IDS = 200
+
+
+@api_view(['GET'])
+@permission_classes([AllowAny])
+def autocomplete(request):
+    """
+    Подсказки по началу названия произведения, жанра или категории
+    (параметр 'q'). Ответ строится из индекса в памяти без запросов к БД.
+    """
+
+    query = request.query_params.get('q', '').strip()
+    try:
+        limit = min(
+            int(request.query_params.get('limit', AUTOCOMPLETE_LIMIT)),
+            AUTOCOMPLETE_MAX_LIMIT
+        )
+    except ValueError:
+        raise serializers.ValidationError(
+            {'limit': 'Значение должно быть целым числом.'}
+        )
+    if not query or limit < 1:
+        return Response([], status=status.HTTP_200_OK)
+    return Response(
+        autocomplete_index.search(query, limit),
+        status=status.HTTP_200_OK
+    )
+
+
+class TitleViewSet(
+    SerializerTimingMixin,
+    SparseFieldsViewMixin,
+    ConditionalGetMixin,
+    CachedResponseMixin,
+    viewsets.ModelViewSet
+):
     """
-    С помощью аннотации добавляем поле рейтинга к каждому объекту модели.
-    Метод Avg (среднее арифметическое).
+    Рейтинг произведения не вычисляется при запросе: он хранится в поле
+    Title.rating и обновляется при создании, изменении и удалении отзывов.
+    Категория загружается через JOIN, жанры - одним запросом на страницу;
+    с `?fields=`/`?omit=` - только если эти поля есть в ответе.
+    Количество отзывов - счетчик score_count, поэтому сортировка
+    `?ordering=-review_count` использует индекс.
     """
 
-    queryset = Title.objects.all().annotate(
-        Avg('reviews__score')
+    queryset = Title.objects.alias(
+        review_count=F('score_count')
     ).order_by('name')
+    select_related_fields = ('category',)
+    prefetch_related_fields = ('genre',)
     serializer_class = TitleSerializer
     permission_classes = (IsAdminOrReadOnly,)
-    filter_backends = (DjangoFilterBackend,)
+    filter_backends = (
+        DjangoFilterBackend,
+        FullTextSearchFilter,
+        filters.OrderingFilter
+    )
+    ordering_fields = ('name', 'review_count')
     filterset_class = TitleFilter
+    pagination_class = KeysetPagination
+    cursor_ordering = ('name', 'id')
+    cache_dependencies = (
+        'title', 'category', 'genre', 'affiliation', 'review'
+    )
 
     def get_serializer_class(self):
         """
@@ -170,14 +246,103 @@ class TitleViewSet(viewsets.ModelViewSet):
             return TitleSerializerGet
         return TitleSerializer
 
+    def retrieve(self, request, *args, **kwargs):
+        return self.get_cached_response(
+            super().retrieve, request, *args, **kwargs
+        )
+
+    def list(self, request, *args, **kwargs):
+        if 'ids' in request.query_params:
+            return self.get_cached_response(
+                self.batch_list, request, *args, **kwargs
+            )
+        return super().list(request, *args, **kwargs)
+
+    def get_batch_ids(self, request):
+        try:
+            ids = [
+                int(value) for value in request.query_params['ids'].split(',')
+                if value.strip()
+            ]
+        except ValueError:
+            raise serializers.ValidationError(
+                {'ids': 'Укажите id произведений через запятую.'}
+            )
+        ids = list(dict.fromkeys(ids))
+        if not ids or len(ids) > TITLE_BATCH_MAX_IDS:
+            raise serializers.ValidationError({
+                'ids': f'Укажите от 1 до {TITLE_BATCH_MAX_IDS} id '
+                       'произведений.'
+            })
+        return ids
+
+    def batch_list(self, request, *args, **kwargs):
+        """
+        Несколько произведений по `?ids=1,2,3` одним ответом без пагинации:
+        два запроса (произведения с категориями и жанры) независимо от
+        количества id. Ненайденные id перечисляются в `missing`.
+        """
+        ids = self.get_batch_ids(request)
+        titles = self.filter_queryset(self.get_queryset()).in_bulk(ids)
+        serializer = self.get_serializer(
+            [titles[pk] for pk in ids if pk in titles], many=True
+        )
+        return Response({
+            'results': serializer.data,
+            'missing': [pk for pk in ids if pk not in titles],
+        }, status=status.HTTP_200_OK)
+
+    @action(methods=('post', 'patch'), detail=False, url_path='bulk')
+    def bulk(self, request):
+        """
+        Массовое создание (POST) или изменение (PATCH, у каждого элемента
+        есть `id`) произведений списком; см. TitleBulkListSerializer.
+        """
+        partial = request.method == 'PATCH'
+        serializer = TitleBulkSerializer(
+            self.get_queryset() if partial else None,
+            data=request.data,
+            many=True,
+            partial=partial
+        )
+        serializer.is_valid(raise_exception=True)
+        ids = [title.pk for title in serializer.save()]
+        titles = self.get_queryset().select_related(
+            'category'
+        ).prefetch_related('genre').in_bulk(ids)
+        return Response(
+            TitleSerializer(
+                [titles[pk] for pk in ids], many=True
+            ).data,
+            status=status.HTTP_200_OK if partial else status.HTTP_201_CREATED
+        )
+
+    @action(methods=('get',), detail=True, url_path='stats')
+    def stats(self, request, pk=None):
+        """
+        Гистограмма оценок, среднее, медиана, количество отзывов и время
+        последнего отзыва из заранее посчитанной сводки TitleStatistics.
+        """
+        title = get_object_or_404(
+            Title.objects.select_related('statistics'), pk=pk
+        )
+        try:
+            statistics = title.statistics
+        except TitleStatistics.DoesNotExist:
+            statistics = TitleStatistics(title=title)
+        serializer = TitleStatisticsSerializer(statistics)
+        return Response(serializer.data, status=status.HTTP_200_OK)
+
 
 class CategoryViewSet(
+    CachedResponseMixin,
     CreateDestroyListViewSet
 ):
     """Класс взаимодействия с моделью Category."""
 
     queryset = Category.objects.all()
     serializer_class = CategorySerializer
+    cache_dependencies = ('category',)
     permission_classes = (IsAdminOrReadOnly,)
     filter_backends = (DjangoFilterBackend, SearchFilter)
     search_fields = ('name',)
@@ -185,27 +350,55 @@ class CategoryViewSet(
 
 
 class GenreViewSet(
+    CachedResponseMixin,
     CreateDestroyListViewSet
 ):
     """Класс взаимодействия с моделью Genre."""
 
     queryset = Genre.objects.all()
     serializer_class = GenreSerializer
+    cache_dependencies = ('genre',)
     permission_classes = (IsAdminOrReadOnly,)
     filter_backends = (DjangoFilterBackend, SearchFilter)
     search_fields = ('name',)
     lookup_field = 'slug'
 
 
-class ReviewViewSet(viewsets.ModelViewSet):
+class ReviewViewSet(
+    SerializerTimingMixin,
+    SparseFieldsViewMixin,
+    ConditionalGetMixin,
+    viewsets.ModelViewSet
+):
     """Класс взаимодействия с моделью Review."""
 
     serializer_class = ReviewSerializer
     permission_classes = (IsAdminAuthorOrReadOnly,)
+    filter_backends = (FullTextSearchFilter, filters.OrderingFilter)
+    ordering_fields = ('pub_date', 'comment_count')
+    pagination_class = KeysetPagination
+    cursor_ordering = ('pub_date', 'id')
+    select_related_fields = ('title', 'author')
+    throttle_classes = (TokenBucketThrottle,)
+    throttle_scope = 'reviews'
 
     def get_queryset(self):
-        title = get_object_or_404(Title, pk=self.kwargs.get('title_id'))
-        return title.reviews.all()
+        self.title = get_object_or_404(Title, pk=self.kwargs.get('title_id'))
+        return self.title.reviews.all()
+
+    def get_known_count(self):
+        """Количество отзывов хранится в Title.score_count."""
+        return self.title.score_count
+
+    def get_cache_dependencies(self):
+        """Отзывы (с названием и количеством комментариев) одного
+           произведения и имена авторов.
+        """
+        return (
+            TITLE_REVIEWS_NAMESPACE.format(self.kwargs.get('title_id')),
+            'author',
+            BULK_LOAD_NAMESPACE
+        )
 
     def perform_create(self, serializer):
         title_id = self.kwargs.get('title_id')
@@ -213,15 +406,39 @@ class ReviewViewSet(viewsets.ModelViewSet):
         serializer.save(author=self.request.user, title=title)
 
 
-class CommentViewSet(viewsets.ModelViewSet):
+class CommentViewSet(
+    SerializerTimingMixin,
+    SparseFieldsViewMixin,
+    ConditionalGetMixin,
+    viewsets.ModelViewSet
+):
     """Класс взаимодействия с моделью Comment."""
 
     serializer_class = CommentSerializer
     permission_classes = (IsAdminAuthorOrReadOnly,)
+    pagination_class = KeysetPagination
+    cursor_ordering = ('pub_date', 'id')
+    select_related_fields = ('review', 'author')
+    throttle_classes = (TokenBucketThrottle,)
+    throttle_scope = 'comments'
 
     def get_queryset(self):
-        review = get_object_or_404(Review, pk=self.kwargs.get('review_id'))
-        return review.comments.all()
+        self.review = get_object_or_404(
+            Review, pk=self.kwargs.get('review_id')
+        )
+        return self.review.comments.all()
+
+    def get_known_count(self):
+        """Количество комментариев хранится в Review.comment_count."""
+        return self.review.comment_count
+
+    def get_cache_dependencies(self):
+        """Комментарии (с текстом отзыва) одного отзыва и имена авторов."""
+        return (
+            REVIEW_COMMENTS_NAMESPACE.format(self.kwargs.get('review_id')),
+            'author',
+            BULK_LOAD_NAMESPACE
+        )
 
     def perform_create(self, serializer):
         title_id = self.kwargs.get('title_id')
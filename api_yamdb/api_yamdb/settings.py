@@ -25,6 +25,9 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    'api.metrics.MetricsMiddleware',
+    'api.nplusone.NPlusOneMiddleware',
+    'api.slow_queries.SlowQueryMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
@@ -62,6 +65,87 @@ DATABASES = {
     }
 }
 
+# Кэш API (ответы и версии их пространств имен, состояние аутентификации,
+# ограничение частоты запросов) должен быть общим для всех процессов
+# сервера. На production это Memcached или Redis (переменные окружения
+# CACHE_BACKEND и CACHE_LOCATION): с кэшем в базе данных каждое чтение
+# версий, состояния токена и корзины ограничения частоты - SQL-запрос.
+# По умолчанию (для разработки) кэш хранится в таблице базы данных,
+# которая создается командой `python manage.py createcachetable`. Кэш в
+# памяти процесса (LocMemCache) используется только в тестах, см.
+# api/checks.py.
+DATABASE_CACHE_BACKEND = 'django.core.cache.backends.db.DatabaseCache'
+
+CACHES = {
+    'default': {
+        'BACKEND': os.getenv('CACHE_BACKEND', DATABASE_CACHE_BACKEND),
+        'LOCATION': os.getenv('CACHE_LOCATION', 'api_cache'),
+    }
+}
+
+if CACHES['default']['BACKEND'] == DATABASE_CACHE_BACKEND:
+    # При 300 записях по умолчанию таблица постоянно прореживается, и
+    # вместе с ответами вытесняются версии и состояние аутентификации.
+    CACHES['default']['OPTIONS'] = {
+        'MAX_ENTRIES': int(os.getenv('CACHE_MAX_ENTRIES', 100000)),
+    }
+
+# Кэш ответов API для анонимных GET-запросов (см. api/cache.py).
+API_CACHE_ALIAS = 'default'
+
+API_CACHE_TIMEOUT = 60 * 5
+
+# Метрики запросов (/metrics и заголовок Server-Timing, см. api/metrics.py).
+# При False middleware отключается при запуске.
+API_METRICS_ENABLED = False
+
+# Поиск N+1 запросов (см. api/nplusone.py): 'log', 'raise' или None.
+# Запрос считается повторяющимся, если выполнен NPLUSONE_THRESHOLD раз.
+NPLUSONE_DETECTION = 'log' if DEBUG else None
+
+NPLUSONE_THRESHOLD = 3
+
+# Журнал медленных SQL-запросов (см. api/slow_queries.py и команду
+# slow_queries_report): запросы дольше SLOW_QUERY_THRESHOLD_MS миллисекунд
+# пишутся с планом выполнения в SLOW_QUERY_LOG. None отключает журнал.
+SLOW_QUERY_THRESHOLD_MS = 100
+
+SLOW_QUERY_LOG = os.path.join(BASE_DIR, 'slow_queries.log')
+
+LOGGING = {
+    'version': 1,
+    'disable_existing_loggers': False,
+    'formatters': {
+        'message': {'format': '%(message)s'},
+    },
+    'handlers': {
+        'slow_queries': {
+            'class': 'logging.handlers.RotatingFileHandler',
+            'filename': SLOW_QUERY_LOG,
+            'maxBytes': 5 * 1024 * 1024,
+            'backupCount': 5,
+            'encoding': 'utf-8',
+            'delay': True,
+            'formatter': 'message',
+        },
+    },
+    'loggers': {
+        'api.slow_queries': {
+            'handlers': ['slow_queries'],
+            'level': 'WARNING',
+            'propagate': False,
+        },
+    },
+}
+
+# Граница точного подсчета количества объектов в отфильтрованных списках
+# (см. api/pagination.py).
+API_COUNT_LIMIT = 1000
+
+# Время жизни пользователя и состояния отзыва токенов в кэше
+# JWT-аутентификации, в секундах.
+AUTH_USER_CACHE_TIMEOUT = 60
+
 AUTH_PASSWORD_VALIDATORS = [
     {
         'NAME': 'django.contrib.auth.password_validation.UserAttributeSimilarityValidator',
@@ -98,11 +182,28 @@ REST_FRAMEWORK = {
     'DEFAULT_PERMISSION_CLASSES': [
         'rest_framework.permissions.IsAuthenticated',
     ],
-    'DEFAULT_PAGINATION_CLASS': 'rest_framework.pagination.PageNumberPagination',
+    'DEFAULT_PAGINATION_CLASS': 'api.pagination.CachedCountPagination',
     'PAGE_SIZE': 10,
     'DEFAULT_AUTHENTICATION_CLASSES': (
-        'rest_framework_simplejwt.authentication.JWTAuthentication',
-    )
+        'api.authentication.RoleClaimsJWTAuthentication',
+    ),
+    # Быстрые JSON-рендерер и парсер (orjson при наличии, иначе json).
+    'DEFAULT_RENDERER_CLASSES': (
+        'api.renderers.FastJSONRenderer',
+        'rest_framework.renderers.BrowsableAPIRenderer',
+    ),
+    'DEFAULT_PARSER_CLASSES': (
+        'api.parsers.FastJSONParser',
+        'rest_framework.parsers.FormParser',
+        'rest_framework.parsers.MultiPartParser',
+    ),
+    # Token bucket (api/throttling.py): 'N/период' - до N запросов подряд,
+    # затем N запросов за период.
+    'DEFAULT_THROTTLE_RATES': {
+        'auth': '10/min',
+        'reviews': '30/min',
+        'comments': '60/min',
+    },
 }
 
 SIMPLE_JWT = {
@@ -117,3 +218,12 @@ EMAIL_FILE_PATH = os.path.join(BASE_DIR, 'sent_emails')
 DEFAULT_AUTO_FIELD = 'django.db.models.AutoField'
 
 DOMAIN_NAME = 'noreply@yamdb.com'
+
+# Очередь фоновых задач (reviews/jobs.py, команда run_jobs).
+JOBS_EAGER = False
+
+JOBS_MAX_ATTEMPTS = 5
+
+JOBS_RETRY_DELAY = 30
+
+JOBS_LEASE = 60 * 5
@@ -6,7 +6,8 @@ from reviews.models import (
     Category,
     Genre,
     Review,
-    Comment
+    Comment,
+    Job
 )
 
 admin.site.register(User)
@@ -15,3 +16,4 @@ admin.site.register(Category)
 admin.site.register(Genre)
 admin.site.register(Review)
 admin.site.register(Comment)
+admin.site.register(Job)
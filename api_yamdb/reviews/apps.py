@@ -1,5 +1,12 @@
 from django.apps import AppConfig
+from django.db.models.signals import post_migrate
 
 
 class ReviewsConfig(AppConfig):
     name = 'reviews'
+
+    def ready(self):
+        import reviews.signals  # noqa: F401
+        from reviews.search import create_search_indexes
+
+        post_migrate.connect(create_search_indexes, sender=self)
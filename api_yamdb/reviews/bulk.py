@@ -0,0 +1,50 @@
+from contextlib import contextmanager
+
+from django.core.management.color import no_style
+from django.db import connection
+
+CHUNK_SIZE = 5000
+
+# Размер пакета одного INSERT для разных СУБД; для SQLite дополнительно
+# действует ограничение на число параметров запроса (см. bulk_batch_size).
+BATCH_SIZES = {
+    'sqlite': 500,
+    'postgresql': 5000,
+    'mysql': 2000,
+}
+DEFAULT_BATCH_SIZE = 1000
+
+
+def get_batch_size(model, objs):
+    batch_size = BATCH_SIZES.get(connection.vendor, DEFAULT_BATCH_SIZE)
+    fields = list(model._meta.concrete_fields)
+    return max(
+        1, min(batch_size, connection.ops.bulk_batch_size(fields, objs))
+    )
+
+
+@contextmanager
+def keep_auto_now(model):
+    """
+    bulk_create перезаписывает поля с auto_now_add текущим временем;
+    на время загрузки отключаем это, чтобы сохранить даты из выгрузки.
+    """
+    fields = [
+        field for field in model._meta.concrete_fields
+        if getattr(field, 'auto_now_add', False)
+    ]
+    for field in fields:
+        field.auto_now_add = False
+    try:
+        yield
+    finally:
+        for field in fields:
+            field.auto_now_add = True
+
+
+def reset_sequences(models):
+    statements = connection.ops.sequence_reset_sql(no_style(), models)
+    if statements:
+        with connection.cursor() as cursor:
+            for sql in statements:
+                cursor.execute(sql)
@@ -0,0 +1,146 @@
+import logging
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.mail import send_mail
+from django.db.models import F, Q
+from django.utils import timezone
+
+from reviews.models import Job
+
+logger = logging.getLogger(__name__)
+
+TASKS = {}
+
+
+def task(name):
+    """Регистрация функции как задачи очереди под именем `name`."""
+    def decorator(func):
+        TASKS[name] = func
+        return func
+    return decorator
+
+
+@task('send_mail')
+def send_mail_task(subject, message, from_email, recipient_list):
+    send_mail(
+        subject,
+        message,
+        from_email,
+        recipient_list,
+        fail_silently=False,
+    )
+
+
+def enqueue(name, **payload):
+    """
+    Постановка задачи в очередь. При JOBS_EAGER задача выполняется сразу
+    (используется в тестах).
+    """
+    if name not in TASKS:
+        raise KeyError(f'Unknown task: {name}')
+    if settings.JOBS_EAGER:
+        TASKS[name](**payload)
+        return None
+    return Job.objects.create(task=name, payload=payload)
+
+
+def get_retry_delay(attempts):
+    """Экспоненциальная задержка перед повтором, не больше часа."""
+    return timedelta(
+        seconds=min(settings.JOBS_RETRY_DELAY * 2 ** (attempts - 1), 3600)
+    )
+
+
+# Сколько готовых задач просматривается при захвате: первые из них могут
+# успеть захватить другие обработчики.
+CLAIM_CANDIDATES = 10
+
+
+def claim_job():
+    """
+    Захват одной готовой к запуску задачи непосредственно перед ее
+    выполнением. Задача захватывается условным UPDATE, поэтому несколько
+    обработчиков не выполнят ее дважды; аренда JOBS_LEASE отсчитывается от
+    запуска задачи, а не от начала пачки, и задача, обработчик которой
+    завис или упал, снова становится доступной после ее истечения.
+    Попытка засчитывается при захвате: задача, на которой обработчик
+    падает, не повторяется бесконечно (см. fail_abandoned_jobs).
+    """
+    now = timezone.now()
+    lease = now + timedelta(seconds=settings.JOBS_LEASE)
+    due = Q(
+        status__in=(Job.PENDING, Job.RUNNING),
+        run_at__lte=now,
+        attempts__lt=settings.JOBS_MAX_ATTEMPTS
+    )
+    for job in Job.objects.filter(due)[:CLAIM_CANDIDATES]:
+        if Job.objects.filter(due, pk=job.pk).update(
+            status=Job.RUNNING, run_at=lease, attempts=F('attempts') + 1
+        ):
+            job.status = Job.RUNNING
+            job.run_at = lease
+            job.attempts += 1
+            return job
+    return None
+
+
+def fail_abandoned_jobs():
+    """
+    Задачи, аренда которых истекла после последней допустимой попытки
+    (обработчик падал на них JOBS_MAX_ATTEMPTS раз), помечаются неудачными.
+    """
+    count = Job.objects.filter(
+        status=Job.RUNNING,
+        run_at__lte=timezone.now(),
+        attempts__gte=settings.JOBS_MAX_ATTEMPTS
+    ).update(status=Job.FAILED, last_error='Lease expired.')
+    if count:
+        logger.error(f'{count} jobs failed after their lease expired.')
+    return count
+
+
+def get_leased(job):
+    """
+    Задача, пока ее аренда принадлежит этому обработчику: после истечения
+    аренды задачу мог захватить (и удалить) другой обработчик.
+    """
+    return Job.objects.filter(pk=job.pk, status=Job.RUNNING, run_at=job.run_at)
+
+
+def run_job(job):
+    try:
+        TASKS[job.task](**job.payload)
+    except Exception as error:
+        last_error = f'{type(error).__name__}: {error}'
+        if job.attempts >= settings.JOBS_MAX_ATTEMPTS:
+            changes = {'status': Job.FAILED}
+            logger.error(f'Job {job.pk} ({job.task}) failed: {error}')
+        else:
+            changes = {
+                'status': Job.PENDING,
+                'run_at': timezone.now() + get_retry_delay(job.attempts),
+            }
+            logger.warning(
+                f'Job {job.pk} ({job.task}) attempt {job.attempts} '
+                f'failed, retry at {changes["run_at"]}: {error}'
+            )
+        get_leased(job).update(last_error=last_error, **changes)
+        return False
+    get_leased(job).delete()
+    return True
+
+
+def run_pending(limit=100):
+    """Выполнение готовых задач; возвращает (успешных, неуспешных)."""
+    done = failed = 0
+    fail_abandoned_jobs()
+    for _ in range(limit):
+        job = claim_job()
+        if job is None:
+            break
+        if run_job(job):
+            done += 1
+        else:
+            failed += 1
+    return done, failed
@@ -0,0 +1,262 @@
+import json
+import os
+import platform
+import statistics
+import subprocess
+import time
+from contextlib import ExitStack
+from datetime import datetime
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, connections
+from django.test import Client
+from django.test.utils import override_settings
+
+from api.authentication import RoleAccessToken
+from api.metrics import QueryTimer
+from reviews.models import Category, Comment, Genre, Review, Title, User
+
+BENCHMARK_USER = 'benchmark_admin'
+
+# Маршруты и адреса; адреса заполняются id и слагами из базы (get_context):
+# отзывы и комментарии берутся у самых популярных произведения и отзыва.
+ENDPOINTS = (
+    ('titles-list', '/api/v1/titles/'),
+    ('titles-list-deep-page', '/api/v1/titles/?page={last_page}'),
+    ('titles-list-category', '/api/v1/titles/?category={category}'),
+    ('titles-list-genre', '/api/v1/titles/?genre={genre}'),
+    ('titles-list-ordered', '/api/v1/titles/?ordering=-review_count'),
+    ('titles-list-sparse', '/api/v1/titles/?fields=id,name,rating'),
+    ('titles-batch', '/api/v1/titles/?ids={title_ids}'),
+    ('titles-detail', '/api/v1/titles/{title}/'),
+    ('reviews-list', '/api/v1/titles/{title}/reviews/'),
+    ('reviews-list-ordered',
+     '/api/v1/titles/{title}/reviews/?ordering=-comment_count'),
+    ('reviews-detail', '/api/v1/titles/{review_title}/reviews/{review}/'),
+    ('comments-list',
+     '/api/v1/titles/{review_title}/reviews/{review}/comments/'),
+    ('categories-list', '/api/v1/categories/'),
+    ('genres-list', '/api/v1/genres/'),
+    ('autocomplete', '/api/v1/autocomplete/?q={prefix}'),
+)
+
+
+def get_context():
+    """Значения для адресов ENDPOINTS из текущей базы."""
+    title = Title.objects.order_by('-score_count', 'id').first()
+    review = Review.objects.order_by('-comment_count', 'id').first()
+    if title is None or review is None or not Comment.objects.exists():
+        raise CommandError(
+            'The database has no titles, reviews or comments, generate data '
+            'with "python manage.py generate_data" first.'
+        )
+    page_size = settings.REST_FRAMEWORK['PAGE_SIZE']
+    return {
+        'title': title.pk,
+        'review': review.pk,
+        'review_title': review.title_id,
+        'title_ids': ','.join(
+            str(pk) for pk in Title.objects.order_by('-score_count', 'id')
+            .values_list('pk', flat=True)[:50]
+        ),
+        'last_page': max(
+            1, (Title.objects.count() + page_size - 1) // page_size
+        ),
+        'category': Category.objects.order_by('id').first().slug,
+        'genre': Genre.objects.order_by('id').first().slug,
+        'prefix': title.name[:3],
+    }
+
+
+def get_commit():
+    try:
+        return subprocess.run(
+            ('git', 'rev-parse', '--short', 'HEAD'),
+            capture_output=True, text=True, check=True,
+            cwd=settings.BASE_DIR
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def percentile(values, percent):
+    """Перцентиль с линейной интерполяцией, как statistics.quantiles."""
+    return statistics.quantiles(values, n=100, method='inclusive')[
+        percent - 1
+    ]
+
+
+def summarize(durations, queries, db_durations):
+    durations = [duration * 1000 for duration in durations]
+    return {
+        'requests': len(durations),
+        'p50_ms': round(percentile(durations, 50), 3),
+        'p95_ms': round(percentile(durations, 95), 3),
+        'p99_ms': round(percentile(durations, 99), 3),
+        'mean_ms': round(statistics.fmean(durations), 3),
+        'max_ms': round(max(durations), 3),
+        'queries': round(statistics.fmean(queries), 2),
+        'max_queries': max(queries),
+        'db_mean_ms': round(statistics.fmean(db_durations) * 1000, 3),
+    }
+
+
+class Command(BaseCommand):
+    help = (
+        'Benchmark the main API endpoints in-process with the Django test '
+        'client: latency percentiles and SQL queries per request, saved as '
+        'JSON for comparison between commits.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--requests', type=int, default=100,
+            help='Measured requests per endpoint.'
+        )
+        parser.add_argument(
+            '--warmup', type=int, default=5,
+            help='Unmeasured requests per endpoint before measuring.'
+        )
+        parser.add_argument(
+            '--anonymous', action='store_true',
+            help='Send anonymous requests, which are served from the API '
+                 'response cache after the first one. By default requests '
+                 'are authenticated as an admin and reach the database.'
+        )
+        parser.add_argument(
+            '--endpoint', action='append', dest='endpoints',
+            help='Benchmark only the given endpoint, can be repeated.'
+        )
+        parser.add_argument(
+            '--output',
+            help='JSON file for results, defaults to '
+                 'benchmarks/<commit>.json.'
+        )
+        parser.add_argument(
+            '--compare',
+            help='JSON file of a previous run to compare percentiles with.'
+        )
+
+    def handle(self, *args, **options):
+        if options['requests'] < 2:
+            raise CommandError('--requests must be at least 2.')
+        endpoints = [
+            (name, path) for name, path in ENDPOINTS
+            if not options['endpoints'] or name in options['endpoints']
+        ]
+        if not endpoints:
+            raise CommandError(
+                'Unknown endpoints, choose from: '
+                + ', '.join(name for name, _ in ENDPOINTS)
+            )
+        context = get_context()
+        headers = {} if options['anonymous'] else self.get_auth_headers()
+        # Отладочные средства (журнал запросов DEBUG, поиск N+1) искажают
+        # время ответа, поэтому отключаются, как на production.
+        with override_settings(DEBUG=False, NPLUSONE_DETECTION=None):
+            client = Client(**headers)
+            results = {
+                name: self.measure(
+                    client, name, path.format(**context), options
+                )
+                for name, path in endpoints
+            }
+        report = self.get_report(results, options)
+        self.save(report, options['output'])
+        if options['compare']:
+            self.compare(report, options['compare'])
+
+    def get_auth_headers(self):
+        """Токен с ролью, как выдает API: права проверяются без User."""
+        user, _ = User.objects.get_or_create(
+            username=BENCHMARK_USER,
+            defaults={
+                'email': f'{BENCHMARK_USER}@example.com',
+                'role': 'admin',
+            }
+        )
+        token = RoleAccessToken.for_user(user)
+        return {'HTTP_AUTHORIZATION': f'Bearer {token}'}
+
+    def measure(self, client, name, path, options):
+        for _ in range(options['warmup']):
+            client.get(path)
+        durations, queries, db_durations = [], [], []
+        for _ in range(options['requests']):
+            timer = QueryTimer()
+            with ExitStack() as stack:
+                for database in connections.all():
+                    stack.enter_context(database.execute_wrapper(timer))
+                start = time.perf_counter()
+                response = client.get(path)
+                durations.append(time.perf_counter() - start)
+            queries.append(timer.count)
+            db_durations.append(timer.duration)
+        if response.status_code != 200:
+            raise CommandError(
+                f'{name}: GET {path} returned {response.status_code}.'
+            )
+        result = {
+            'path': path,
+            'bytes': len(response.content),
+            **summarize(durations, queries, db_durations),
+        }
+        self.stdout.write(
+            f'{name:<24} p50 {result["p50_ms"]:>8.2f} ms  '
+            f'p95 {result["p95_ms"]:>8.2f} ms  '
+            f'p99 {result["p99_ms"]:>8.2f} ms  '
+            f'{result["queries"]:>5.1f} queries'
+        )
+        return result
+
+    def get_report(self, results, options):
+        return {
+            'commit': get_commit(),
+            'created': datetime.now().isoformat(timespec='seconds'),
+            'python': platform.python_version(),
+            'database': connection.vendor,
+            'cache': settings.CACHES[settings.API_CACHE_ALIAS]['BACKEND'],
+            'anonymous': options['anonymous'],
+            'requests': options['requests'],
+            'warmup': options['warmup'],
+            'dataset': {
+                model.__name__: model.objects.count()
+                for model in (Title, Review, Comment, User)
+            },
+            'endpoints': results,
+        }
+
+    def save(self, report, path):
+        if path is None:
+            path = os.path.join(
+                'benchmarks', f'{report["commit"] or "results"}.json'
+            )
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        with open(path, 'w', encoding='utf-8') as output:
+            json.dump(report, output, indent=2, ensure_ascii=False)
+        self.stdout.write(f'Results saved to {path}.')
+
+    def compare(self, report, path):
+        try:
+            with open(path, encoding='utf-8') as previous_file:
+                previous = json.load(previous_file)
+        except (OSError, ValueError) as error:
+            raise CommandError(f'Cannot read {path}: {error}')
+        self.stdout.write(
+            f'Compared with {previous.get("commit") or path} '
+            f'(p50 / p95 / queries):'
+        )
+        for name, result in report['endpoints'].items():
+            before = previous.get('endpoints', {}).get(name)
+            if before is None:
+                continue
+            changes = ', '.join(
+                f'{before[key]:.2f} -> {result[key]:.2f} '
+                f'({(result[key] - before[key]) / before[key]:+.0%})'
+                if before[key] else f'{before[key]} -> {result[key]}'
+                for key in ('p50_ms', 'p95_ms', 'queries')
+            )
+            self.stdout.write(f'{name:<24} {changes}')
@@ -0,0 +1,84 @@
+import io
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from rest_framework.parsers import JSONParser
+from rest_framework.renderers import JSONRenderer
+
+from api.parsers import FastJSONParser
+from api.renderers import FastJSONRenderer, orjson
+from api.serializers import ReviewSerializer, TitleSerializerGet
+from reviews.models import Review, Title
+
+
+class Command(BaseCommand):
+    help = (
+        'Compare JSON rendering and parsing speed of the stdlib renderer '
+        'and the fast renderer on title and review pages from the database.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--page-size',
+            type=int,
+            default=100,
+            help='Number of objects on a rendered page.'
+        )
+        parser.add_argument(
+            '--repeat',
+            type=int,
+            default=200,
+            help='Number of times each page is rendered.'
+        )
+
+    def measure(self, func, repeat):
+        start = time.perf_counter()
+        for _ in range(repeat):
+            func()
+        return (time.perf_counter() - start) / repeat * 1000
+
+    def get_pages(self, page_size):
+        titles = Title.objects.select_related('category').prefetch_related(
+            'genre'
+        ).order_by('name')[:page_size]
+        reviews = Review.objects.select_related('author').order_by(
+            'pub_date', 'id'
+        )[:page_size]
+        return {
+            'titles': TitleSerializerGet(titles, many=True).data,
+            'reviews': ReviewSerializer(reviews, many=True).data,
+        }
+
+    def handle(self, *args, **options):
+        pages = self.get_pages(options['page_size'])
+        if not all(pages.values()):
+            raise CommandError(
+                'No titles or reviews found, load data with '
+                '"python manage.py import_csv_data" first.'
+            )
+        if orjson is None:
+            self.stdout.write(
+                'orjson is not installed, the fast renderer falls back '
+                'to the stdlib json module.'
+            )
+        repeat = options['repeat']
+        for name, data in pages.items():
+            page = {'next': None, 'previous': None, 'results': data}
+            body = JSONRenderer().render(page)
+            stdlib = self.measure(lambda: JSONRenderer().render(page), repeat)
+            fast = self.measure(
+                lambda: FastJSONRenderer().render(page), repeat
+            )
+            parse_stdlib = self.measure(
+                lambda: JSONParser().parse(io.BytesIO(body)), repeat
+            )
+            parse_fast = self.measure(
+                lambda: FastJSONParser().parse(io.BytesIO(body)), repeat
+            )
+            self.stdout.write(
+                f'{name} ({len(data)} objects, {len(body)} bytes): '
+                f'render {stdlib:.3f} ms -> {fast:.3f} ms '
+                f'(x{stdlib / fast:.1f}), '
+                f'parse {parse_stdlib:.3f} ms -> {parse_fast:.3f} ms '
+                f'(x{parse_stdlib / parse_fast:.1f})'
+            )
@@ -0,0 +1,190 @@
+import re
+from urllib.parse import parse_qs, urlsplit
+
+from django.db import connection
+from django.core.management.base import BaseCommand, CommandError
+from django.test.utils import CaptureQueriesContext
+from rest_framework.test import APIRequestFactory, force_authenticate
+
+from api.urls import router_v1
+from reviews.models import Category, Comment, Review, Title, User
+
+# Значение параметра cursor: курсор ссылки next первой страницы, чтобы
+# проверялось и условие WHERE по ключу курсора. Первая страница
+# запрашивается из одной строки: курсор не зависит от размера страницы,
+# а следующая страница есть и на небольших данных.
+NEXT_CURSOR = object()
+
+# Параметры запросов к спискам, план которых проверяется, по basename.
+# Для не перечисленных viewset проверяется список без параметров.
+QUERY_SHAPES = {
+    'titles': (
+        {},
+        {'category': lambda: Category.objects.values_list(
+            'slug', flat=True
+        ).first() or 'films'},
+        {'year': lambda: Title.objects.values_list(
+            'year', flat=True
+        ).first() or 2000},
+        {'ordering': '-review_count'},
+        {'cursor': ''},
+        {'cursor': NEXT_CURSOR},
+        {'ordering': '-review_count', 'cursor': ''},
+        {'ordering': '-review_count', 'cursor': NEXT_CURSOR},
+    ),
+    'reviews': (
+        {},
+        {'ordering': '-comment_count'},
+        {'cursor': ''},
+        {'cursor': NEXT_CURSOR},
+        {'ordering': '-comment_count', 'cursor': ''},
+        {'ordering': '-comment_count', 'cursor': NEXT_CURSOR},
+    ),
+    'comments': (
+        {},
+        {'cursor': ''},
+        {'cursor': NEXT_CURSOR},
+    ),
+}
+
+# Просмотр таблицы целиком, в том числе по индексу (SCAN t USING INDEX i):
+# в запросе с WHERE это значит, что условие не сужает диапазон индекса.
+FULL_SCAN = re.compile(
+    r'\bSCAN (?:TABLE )?(\w+)(?: USING (?:COVERING )?INDEX \w+)?$'
+)
+TEMP_SORT = re.compile(r'\bUSE TEMP B-TREE\b')
+URL_KWARG = re.compile(r'\(\?P<(\w+)>[^)]*\)')
+PREFETCH_ALIAS = '_prefetch_related_val_'
+
+
+def get_url_kwargs():
+    """Значения title_id и review_id для вложенных маршрутов."""
+    review = Review.objects.filter(comment_count__gt=0).first()
+    if review is None:
+        review = Review.objects.first()
+    if review is not None:
+        return {'title_id': review.title_id, 'review_id': review.pk}
+    title = Title.objects.first()
+    return {'title_id': title.pk if title else 0, 'review_id': 0}
+
+
+def get_next_cursor(response):
+    """Курсор из ссылки next или пустой курсор, если страница одна."""
+    link = getattr(response, 'data', {}).get('next')
+    if not link:
+        return ''
+    return parse_qs(urlsplit(link).query).get('cursor', [''])[0]
+
+
+def get_plan_problems(sql, plan, tables):
+    """
+    Полный просмотр таблицы из `tables` в запросе с условием WHERE и
+    сортировка во временном B-дереве. Просмотр без условия (например,
+    первая страница по первичному ключу) и просмотр подзапроса (COUNT(*)
+    по выборке с LIMIT) ограничены LIMIT, а prefetch_related выбирает
+    строки только для id одной страницы, поэтому их сортировка не растет
+    с размером таблицы; такие случаи ошибкой не считаются.
+    """
+    problems = []
+    prefetch = PREFETCH_ALIAS in sql
+    for line in plan:
+        match = FULL_SCAN.search(line)
+        if match and match.group(1) in tables and ' WHERE ' in sql:
+            problems.append(f'full scan of {match.group(1)}')
+        if TEMP_SORT.search(line) and not prefetch:
+            problems.append(line.split(' ', 3)[-1])
+    return problems
+
+
+class Command(BaseCommand):
+    help = (
+        'Run EXPLAIN QUERY PLAN for the list queries of every registered '
+        'API viewset and fail on full table scans and temporary sorts.'
+    )
+
+    def explain(self, sql):
+        with connection.cursor() as cursor:
+            cursor.execute(f'EXPLAIN QUERY PLAN {sql}')
+            return [
+                ' '.join(str(column) for column in row)
+                for row in cursor.fetchall()
+            ]
+
+    def get_queries(self, prefix, viewset, basename, params, user, kwargs):
+        params = {
+            key: value() if callable(value) else value
+            for key, value in params.items()
+        }
+        if params.get('cursor') is NEXT_CURSOR:
+            pagination_class = type(
+                'FirstRowPagination', (viewset.pagination_class,),
+                {'page_size': 1}
+            )
+            response, _ = self.call_view(
+                prefix, viewset, basename, {**params, 'cursor': ''}, user,
+                kwargs, pagination_class=pagination_class
+            )
+            params['cursor'] = get_next_cursor(response)
+        return params, self.call_view(
+            prefix, viewset, basename, params, user, kwargs
+        )[1]
+
+    def call_view(self, prefix, viewset, basename, params, user, kwargs,
+                  **initkwargs):
+        url_kwargs = {
+            key: kwargs[key] for key in URL_KWARG.findall(prefix)
+        }
+        path = URL_KWARG.sub(
+            lambda match: str(kwargs[match.group(1)]), prefix
+        )
+        request = APIRequestFactory().get(f'/api/v1/{path}/', params)
+        force_authenticate(request, user=user)
+        view = viewset.as_view(
+            {'get': 'list'}, basename=basename, **initkwargs
+        )
+        with CaptureQueriesContext(connection) as context:
+            response = view(request, **url_kwargs)
+        return response, [
+            query['sql'] for query in context.captured_queries
+            if query['sql'].startswith('SELECT')
+        ]
+
+    def handle(self, *args, **options):
+        if connection.vendor != 'sqlite':
+            raise CommandError(
+                'Query plan checks are implemented for SQLite only.'
+            )
+        if not Title.objects.exists() or not Comment.objects.exists():
+            self.stdout.write(
+                'The database has no titles or comments, nested routes are '
+                'checked only partially. Load data with '
+                '"python manage.py import_csv_data" first.'
+            )
+        # Несохраненный администратор: проверка прав без запросов к базе,
+        # а ответы не берутся из кэша анонимных запросов.
+        user = User(username='explain', role='admin', is_superuser=True)
+        kwargs = get_url_kwargs()
+        tables = set(connection.introspection.table_names())
+        failures = 0
+        for prefix, viewset, basename in router_v1.registry:
+            for params in QUERY_SHAPES.get(basename, ({},)):
+                params, queries = self.get_queries(
+                    prefix, viewset, basename, params, user, kwargs
+                )
+                label = basename + (f' {params}' if params else '')
+                for sql in queries:
+                    plan = self.explain(sql)
+                    problems = get_plan_problems(sql, plan, tables)
+                    if problems:
+                        failures += 1
+                        self.stdout.write(
+                            f'FAIL {label}: {"; ".join(problems)}\n'
+                            f'  {sql}\n  ' + '\n  '.join(plan)
+                        )
+                    elif options['verbosity'] > 1:
+                        self.stdout.write(
+                            f'OK {label}: {sql}\n  ' + '\n  '.join(plan)
+                        )
+        if failures:
+            raise CommandError(f'{failures} queries need an index.')
+        self.stdout.write('All query plans use indexes.')
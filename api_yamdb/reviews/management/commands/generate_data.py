@@ -0,0 +1,289 @@
+import random
+import time
+from datetime import datetime, timedelta, timezone
+from itertools import islice
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from django.db.models import Max
+
+from reviews.bulk import (
+    CHUNK_SIZE,
+    get_batch_size,
+    keep_auto_now,
+    reset_sequences
+)
+from reviews.models import (
+    Affiliation,
+    Category,
+    Comment,
+    Genre,
+    Review,
+    Title,
+    User
+)
+from reviews.signals import finish_bulk_load
+
+# Даты отзывов отсчитываются от фиксированного момента, чтобы набор данных
+# с тем же --seed не зависел от времени запуска.
+END_DATE = datetime(2024, 1, 1, tzinfo=timezone.utc)
+
+DATE_RANGE = timedelta(days=365 * 3)
+
+MAX_GENRES = 3
+
+# Число комментариев к отзыву - распределение Парето: у большинства
+# отзывов комментариев нет, у немногих - сотни.
+PARETO_ALPHA = 1.5
+
+MAX_COMMENTS = 1000
+
+WORDS = (
+    'dark', 'silent', 'last', 'lost', 'golden', 'broken', 'hidden', 'red',
+    'night', 'river', 'city', 'dream', 'storm', 'garden', 'shadow', 'road',
+    'story', 'winter', 'light', 'war', 'song', 'house', 'star', 'sea',
+)
+
+
+def zipf_weights(count, exponent):
+    """Веса рангов 1..count по закону Ципфа: 1 / rank ** exponent."""
+    return [1 / rank ** exponent for rank in range(1, count + 1)]
+
+
+def split_by_weights(total, weights, cap):
+    """
+    Распределение total по весам; значение ограничено cap (например,
+    числом пользователей: отзыв на произведение у автора один), поэтому
+    сумма может оказаться меньше total.
+    """
+    scale = total / sum(weights)
+    return [min(cap, round(weight * scale)) for weight in weights]
+
+
+def chunked(objects, chunk_size):
+    objects = iter(objects)
+    while True:
+        chunk = list(islice(objects, chunk_size))
+        if not chunk:
+            return
+        yield chunk
+
+
+def write_objects(model, objects):
+    with keep_auto_now(model), transaction.atomic():
+        model.objects.bulk_create(
+            objects, batch_size=get_batch_size(model, objects)
+        )
+
+
+def next_id(model):
+    return (model.objects.aggregate(last=Max('pk'))['last'] or 0) + 1
+
+
+def in_range(ids):
+    """Фильтр по диапазону id без списка IN на миллион значений."""
+    return {'pk__gte': ids.start, 'pk__lt': ids.stop}
+
+
+def random_text(rng, low, high):
+    return ' '.join(rng.choices(WORDS, k=rng.randint(low, high)))
+
+
+def random_date(rng, start=None):
+    """Случайный момент до END_DATE (после start, если задан)."""
+    start = start or END_DATE - DATE_RANGE
+    return start + (END_DATE - start) * rng.random()
+
+
+class Command(BaseCommand):
+    help = (
+        'Generate a synthetic dataset for benchmarks: title popularity, '
+        'genres and categories follow a Zipf distribution, comments per '
+        'review a Pareto distribution. The same --seed gives the same data.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--titles', type=int, default=1000)
+        parser.add_argument(
+            '--reviews', type=int, default=20000,
+            help='Approximate number of reviews.'
+        )
+        parser.add_argument(
+            '--comments', type=int, default=20000,
+            help='Approximate number of comments.'
+        )
+        parser.add_argument(
+            '--users', type=int,
+            help='Number of users, defaults to reviews / 10 (at least 100).'
+        )
+        parser.add_argument('--genres', type=int, default=30)
+        parser.add_argument('--categories', type=int, default=10)
+        parser.add_argument(
+            '--skew', type=float, default=1.0,
+            help='Zipf exponent of title, genre and category popularity.'
+        )
+        parser.add_argument('--seed', type=int, default=1)
+        parser.add_argument(
+            '--chunk-size', type=int, default=CHUNK_SIZE,
+            help='Number of rows written per transaction.'
+        )
+
+    def handle(self, *args, **options):
+        if options['users'] is None:
+            options['users'] = max(100, options['reviews'] // 10)
+        for name in ('titles', 'users', 'genres', 'categories',
+                     'chunk_size'):
+            if options[name] < 1:
+                raise CommandError(
+                    f'--{name.replace("_", "-")} must be positive.'
+                )
+        self.rng = random.Random(options['seed'])
+        self.options = options
+        started = time.monotonic()
+        users = self.write(User, self.generate_users())
+        categories = self.write(Category, self.generate_groups(
+            Category, 'category', options['categories']
+        ))
+        genres = self.write(Genre, self.generate_groups(
+            Genre, 'genre', options['genres']
+        ))
+        titles = self.write_titles(categories, genres)
+        reviews = self.write(Review, self.generate_reviews(titles, users))
+        self.write(Comment, self.generate_comments(reviews, users))
+        reset_sequences([User, Category, Genre, Title, Affiliation, Review,
+                         Comment])
+        self.stdout.write('Recalculating ratings and counters...')
+        finish_bulk_load(
+            Title.objects.filter(**in_range(titles)),
+            Review.objects.filter(**in_range(reviews))
+        )
+        self.stdout.write(self.style.SUCCESS(
+            f'Generated in {time.monotonic() - started:.1f}s.'
+        ))
+
+    def write(self, model, objects):
+        """Запись пачками; возвращает диапазон id созданных объектов."""
+        first = next_id(model)
+        started = time.monotonic()
+        rows = 0
+        for chunk in chunked(objects, self.options['chunk_size']):
+            write_objects(model, chunk)
+            rows += len(chunk)
+        self.report(model, rows, started)
+        return range(first, first + rows)
+
+    def report(self, model, rows, started):
+        elapsed = time.monotonic() - started
+        self.stdout.write(
+            f'{model.__name__}: {rows} rows in '
+            f'{elapsed:.1f}s ({rows / max(elapsed, 1e-6):.0f} rows/s)'
+        )
+
+    def generate_users(self):
+        first = next_id(User)
+        for pk in range(first, first + self.options['users']):
+            yield User(
+                pk=pk,
+                username=f'bench_user_{pk}',
+                email=f'bench_user_{pk}@example.com',
+                password='!'
+            )
+
+    def generate_groups(self, model, prefix, count):
+        first = next_id(model)
+        for pk in range(first, first + count):
+            yield model(
+                pk=pk,
+                name=f'{random_text(self.rng, 1, 2).title()} {pk}',
+                slug=f'{prefix}-{pk}'
+            )
+
+    def generate_titles(self, first, categories, genres):
+        rng = self.rng
+        skew = self.options['skew']
+        category_weights = zipf_weights(len(categories), skew)
+        genre_weights = zipf_weights(len(genres), skew)
+        for pk in range(first, first + self.options['titles']):
+            title = Title(
+                pk=pk,
+                name=f'{random_text(rng, 1, 4).title()} {pk}',
+                year=rng.randint(1900, END_DATE.year),
+                description=(
+                    random_text(rng, 5, 30) if rng.random() < 0.7 else None
+                ),
+                category_id=rng.choices(categories, category_weights)[0]
+            )
+            title_genres = set(rng.choices(
+                genres, genre_weights, k=rng.randint(1, MAX_GENRES)
+            ))
+            yield title, title_genres
+
+    def write_titles(self, categories, genres):
+        first = next_id(Title)
+        started = time.monotonic()
+        rows = 0
+        for chunk in chunked(
+            self.generate_titles(first, categories, genres),
+            self.options['chunk_size']
+        ):
+            write_objects(Title, [title for title, _ in chunk])
+            write_objects(Affiliation, [
+                Affiliation(title_id=title.pk, genre_id=genre)
+                for title, title_genres in chunk
+                for genre in sorted(title_genres)
+            ])
+            rows += len(chunk)
+        self.report(Title, rows, started)
+        return range(first, first + rows)
+
+    def generate_reviews(self, titles, users):
+        """
+        Число отзывов на произведение - по закону Ципфа от случайного ранга
+        популярности; оценки разбросаны вокруг "качества" произведения.
+        """
+        rng = self.rng
+        counts = split_by_weights(
+            self.options['reviews'],
+            zipf_weights(len(titles), self.options['skew']),
+            len(users)
+        )
+        rng.shuffle(counts)
+        pk = next_id(Review)
+        for title_id, count in zip(titles, counts):
+            quality = rng.gauss(7, 1.5)
+            for author_id in rng.sample(users, count):
+                pk += 1
+                yield Review(
+                    pk=pk - 1,
+                    title_id=title_id,
+                    author_id=author_id,
+                    score=min(10, max(1, round(rng.gauss(quality, 2)))),
+                    text=random_text(rng, 5, 60),
+                    pub_date=random_date(rng)
+                )
+
+    def generate_comments(self, reviews, users):
+        rng = self.rng
+        mean = self.options['comments'] / max(len(reviews), 1)
+        # Среднее (X - 1) для распределения Парето - 1 / (alpha - 1).
+        scale = mean * (PARETO_ALPHA - 1)
+        chunk_size = self.options['chunk_size']
+        pk = next_id(Comment)
+        for start in range(reviews.start, reviews.stop, chunk_size):
+            # Даты отзывов читаются из базы пачками, а не хранятся в памяти.
+            dates = Review.objects.filter(
+                pk__gte=start, pk__lt=min(start + chunk_size, reviews.stop)
+            ).order_by('pk').values_list('pk', 'pub_date')
+            for review_id, pub_date in dates:
+                # Случайное округление сохраняет среднее при малых значениях.
+                value = (rng.paretovariate(PARETO_ALPHA) - 1) * scale
+                count = int(value + rng.random())
+                for _ in range(min(count, MAX_COMMENTS)):
+                    pk += 1
+                    yield Comment(
+                        pk=pk - 1,
+                        review_id=review_id,
+                        author_id=rng.choice(users),
+                        text=random_text(rng, 3, 40),
+                        pub_date=random_date(rng, pub_date)
+                    )
@@ -1,56 +1,261 @@
 import csv
 import logging
+import os
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from itertools import islice
 
+import django
+from django.apps import apps
+from django.conf import settings
+from django.core.exceptions import ValidationError
 from django.core.management.base import BaseCommand, CommandError
+from django.db import DatabaseError, transaction
 
-from reviews.models import Category, Genre, Title, User, Review, Comment
+from reviews.bulk import (
+    CHUNK_SIZE,
+    get_batch_size,
+    keep_auto_now,
+    reset_sequences
+)
+from reviews.models import (
+    Affiliation,
+    Category,
+    Comment,
+    Genre,
+    Review,
+    Title,
+    User
+)
+from reviews.signals import finish_bulk_load
 
+CSV_PATH = os.path.join(settings.BASE_DIR, 'static', 'data')
+
+FOREIGN_KEY_FIELDS = ('category', 'author')
 
-logging.basicConfig(
-    level=logging.INFO,
-    filename='main.log',
-    format='%(asctime)s, %(levelname)s, %(name)s, %(message)s',
-    filemode='w',
-    encoding='utf-8'
+# Порядок важен: модели загружаются после тех, на которые ссылаются.
+FILES = (
+    (User, 'users.csv'),
+    (Genre, 'genre.csv'),
+    (Category, 'category.csv'),
+    (Title, 'titles.csv'),
+    (Affiliation, 'genre_title.csv'),
+    (Review, 'review.csv'),
+    (Comment, 'comments.csv'),
 )
 
-CSV_PATH = 'static/data/'
+MODE_INSERT = 'insert'
+MODE_SKIP = 'skip'
+MODE_UPSERT = 'upsert'
+MODES = (MODE_INSERT, MODE_SKIP, MODE_UPSERT)
 
-FOREIGN_KEY_FIELDS = ('category', 'author')
 
-DICT = {
-    User: 'users.csv',
-    Genre: 'genre.csv',
-    Category: 'category.csv',
-    Title: 'titles.csv',
-    Review: 'review.csv',
-    Comment: 'comments.csv'
-}
+def read_chunks(csv_file, chunk_size):
+    """
+    Построчное чтение CSV пачками фиксированного размера.
+    Вместе с пачкой возвращается номер строки файла, с которой она начинается.
+    """
+    reader = csv.DictReader(csv_file)
+    line = 2
+    while True:
+        chunk = list(islice(reader, chunk_size))
+        if not chunk:
+            return
+        yield line, chunk
+        line += len(chunk)
 
 
-def csv_serializer(csv_data, model):
-    objs = []
-    for row in csv_data:
+def csv_serializer(model_label, start_line, csv_data):
+    """
+    Разбор и валидация пачки строк CSV: переименование внешних ключей,
+    приведение типов и валидаторы полей (validate_for_year, диапазон оценки).
+    Возвращает имена колонок и список кортежей значений, поэтому может
+    выполняться в отдельном процессе.
+    """
+    model = apps.get_model(model_label)
+    attnames = None
+    fields = None
+    values = []
+    for line, row in enumerate(csv_data, start_line):
         for field in FOREIGN_KEY_FIELDS:
             if field in row:
-                row[f'{field}_id'] = row[field]
-                del row[field]
-        objs.append(model(**row))
-    model.objects.bulk_create(objs)
+                row[f'{field}_id'] = row.pop(field)
+        if attnames is None:
+            attnames = tuple(row)
+            fields = [model._meta.get_field(name) for name in attnames]
+        try:
+            values.append(tuple(
+                clean_value(field, row[name])
+                for field, name in zip(fields, attnames)
+            ))
+        except ValidationError as error:
+            raise ValueError(f'line {line}: {"; ".join(error.messages)}')
+    return attnames, values
+
+
+def clean_value(field, raw):
+    if raw == '' and field.null:
+        return None
+    value = field.to_python(raw)
+    field.run_validators(value)
+    return value
+
+
+def init_worker():
+    if not apps.ready:
+        django.setup()
+
+
+def parse_chunks(model, chunks, executor=None, workers=1):
+    """
+    Разбор пачек в пуле процессов. Одновременно в обработке находится не
+    более 2 * workers пачек, результаты возвращаются в исходном порядке.
+    """
+    model_label = model._meta.label
+    if executor is None:
+        for start_line, chunk in chunks:
+            yield csv_serializer(model_label, start_line, chunk)
+        return
+    pending = deque()
+    for start_line, chunk in chunks:
+        pending.append(
+            executor.submit(csv_serializer, model_label, start_line, chunk)
+        )
+        if len(pending) >= 2 * workers:
+            yield pending.popleft().result()
+    while pending:
+        yield pending.popleft().result()
+
+
+def write_chunk(model, objs, mode):
+    """Запись пачки объектов в отдельной транзакции."""
+    batch_size = get_batch_size(model, objs)
+    with transaction.atomic():
+        if mode == MODE_UPSERT:
+            existing = set(model.objects.filter(
+                pk__in=[obj.pk for obj in objs]
+            ).values_list('pk', flat=True))
+            if existing:
+                model.objects.bulk_update(
+                    [obj for obj in objs if obj.pk in existing],
+                    [
+                        field.attname for field in model._meta.concrete_fields
+                        if not field.primary_key
+                    ],
+                    batch_size=batch_size
+                )
+                objs = [obj for obj in objs if obj.pk not in existing]
+        model.objects.bulk_create(
+            objs,
+            batch_size=batch_size,
+            ignore_conflicts=(mode == MODE_SKIP)
+        )
 
 
 class Command(BaseCommand):
     help = 'Load data from csv file into the database'
 
-    def handle(self, *args, **kwargs):
-        for model in DICT:
-            try:
-                with open(
-                    CSV_PATH + DICT[model],
-                    newline='',
-                    encoding='utf8'
-                ) as csv_file:
-                    csv_serializer(csv.DictReader(csv_file), model)
-            except Exception as error:
-                CommandError(error)
-        logging.info('Successfully loaded all data into database')
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--path',
+            default=CSV_PATH,
+            help='Directory with csv files.'
+        )
+        parser.add_argument(
+            '--chunk-size',
+            type=int,
+            default=CHUNK_SIZE,
+            help='Number of rows read and written per transaction.'
+        )
+        parser.add_argument(
+            '--workers',
+            type=int,
+            default=1,
+            help='Number of processes parsing and validating csv chunks.'
+        )
+        parser.add_argument(
+            '--mode',
+            choices=MODES,
+            default=MODE_SKIP,
+            help=(
+                'insert: fail on existing rows, skip: ignore existing rows, '
+                'upsert: update existing rows by id.'
+            )
+        )
+
+    def handle(self, *args, **options):
+        # Журнал настраивается при запуске команды, а не при импорте модуля.
+        logging.basicConfig(
+            level=logging.INFO,
+            filename='main.log',
+            format='%(asctime)s, %(levelname)s, %(name)s, %(message)s',
+            filemode='w',
+            encoding='utf-8'
+        )
+        if options['chunk_size'] < 1:
+            raise CommandError('--chunk-size must be positive.')
+        if options['workers'] < 1:
+            raise CommandError('--workers must be positive.')
+        executor = None
+        if options['workers'] > 1:
+            executor = ProcessPoolExecutor(
+                max_workers=options['workers'],
+                initializer=init_worker
+            )
+        started = time.monotonic()
+        total = 0
+        try:
+            for model, filename in FILES:
+                total += self.load_file(
+                    model,
+                    os.path.join(options['path'], filename),
+                    options,
+                    executor
+                )
+        finally:
+            if executor is not None:
+                executor.shutdown(cancel_futures=True)
+        reset_sequences([model for model, _ in FILES])
+        finish_bulk_load()
+        elapsed = time.monotonic() - started
+        message = (
+            f'Successfully loaded {total} rows in {elapsed:.1f}s '
+            f'({total / max(elapsed, 1e-6):.0f} rows/s)'
+        )
+        logging.info(message)
+        self.stdout.write(self.style.SUCCESS(message))
+
+    def load_file(self, model, path, options, executor):
+        started = time.monotonic()
+        rows = 0
+        try:
+            with open(path, newline='', encoding='utf8') as csv_file:
+                chunks = parse_chunks(
+                    model,
+                    read_chunks(csv_file, options['chunk_size']),
+                    executor,
+                    options['workers']
+                )
+                with keep_auto_now(model):
+                    for attnames, values in chunks:
+                        write_chunk(
+                            model,
+                            [model(**dict(zip(attnames, row)))
+                             for row in values],
+                            options['mode']
+                        )
+                        rows += len(values)
+        except (OSError, ValueError, TypeError, DatabaseError) as error:
+            logging.error(f'{path}: {error}')
+            raise CommandError(
+                f'Error loading {path} after {rows} rows: {error}'
+            )
+        elapsed = time.monotonic() - started
+        message = (
+            f'{os.path.basename(path)}: {rows} rows in {elapsed:.1f}s '
+            f'({rows / max(elapsed, 1e-6):.0f} rows/s)'
+        )
+        logging.info(message)
+        self.stdout.write(message)
+        return rows
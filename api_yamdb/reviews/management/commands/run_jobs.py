@@ -0,0 +1,42 @@
+import logging
+import time
+
+from django.core.management.base import BaseCommand
+
+from reviews.jobs import run_pending
+
+
+class Command(BaseCommand):
+    help = 'Run queued background jobs (confirmation emails etc.)'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--once',
+            action='store_true',
+            help='Process jobs that are due now and exit.'
+        )
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=100,
+            help='Maximum number of jobs run per pass over the queue; '
+                 'each job is leased right before it runs.'
+        )
+        parser.add_argument(
+            '--sleep',
+            type=float,
+            default=1.0,
+            help='Seconds to wait when the queue is empty.'
+        )
+
+    def handle(self, *args, **options):
+        while True:
+            done, failed = run_pending(options['batch_size'])
+            if done or failed:
+                message = f'Jobs done: {done}, failed: {failed}'
+                logging.info(message)
+                self.stdout.write(message)
+            if options['once'] and not (done or failed):
+                return
+            if not (done or failed):
+                time.sleep(options['sleep'])
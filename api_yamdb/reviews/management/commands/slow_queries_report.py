@@ -0,0 +1,109 @@
+import json
+import os
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from api.nplusone import normalize_sql
+
+SQL_WIDTH = 100
+
+
+def get_log_files(path):
+    """Журнал и его копии после ротации: path, path.1, path.2, ..."""
+    files = [path] if os.path.exists(path) else []
+    index = 1
+    while os.path.exists(f'{path}.{index}'):
+        files.append(f'{path}.{index}')
+        index += 1
+    return files
+
+
+def read_records(files):
+    """Записи журнала и количество строк, которые не удалось разобрать."""
+    records, broken = [], 0
+    for name in files:
+        with open(name, encoding='utf-8') as log:
+            for line in log:
+                try:
+                    record = json.loads(line)
+                    record['duration_ms'] = float(record['duration_ms'])
+                    record['sql'] = str(record['sql'])
+                except (ValueError, KeyError, TypeError):
+                    broken += 1
+                    continue
+                records.append(record)
+    return records, broken
+
+
+def aggregate(records):
+    """
+    Статистика по формам запросов (параметры и списки IN свернуты),
+    отсортированная по суммарному времени.
+    """
+    shapes = {}
+    for record in records:
+        shape = normalize_sql(record['sql'])
+        stats = shapes.setdefault(shape, {
+            'shape': shape, 'count': 0, 'total': 0.0, 'max': 0.0,
+            'views': set(), 'plan': None,
+        })
+        stats['count'] += 1
+        stats['total'] += record['duration_ms']
+        if record.get('view'):
+            stats['views'].add(record['view'])
+        if record['duration_ms'] >= stats['max']:
+            stats['max'] = record['duration_ms']
+            stats['plan'] = record.get('plan')
+    return sorted(
+        shapes.values(), key=lambda stats: stats['total'], reverse=True
+    )
+
+
+class Command(BaseCommand):
+    help = (
+        'Aggregate the slow query log by query shape and print the queries '
+        'with the largest total time.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--path',
+            help='Slow query log, rotated copies (.1, .2, ...) are read '
+                 'too. Defaults to SLOW_QUERY_LOG.'
+        )
+        parser.add_argument(
+            '--top', type=int, default=20,
+            help='Number of query shapes to show (default: 20).'
+        )
+
+    def handle(self, *args, **options):
+        path = options['path'] or settings.SLOW_QUERY_LOG
+        files = get_log_files(path)
+        if not files:
+            raise CommandError(f'No slow query log at {path}.')
+        records, broken = read_records(files)
+        if broken:
+            self.stderr.write(f'Skipped {broken} malformed lines.')
+        shapes = aggregate(records)
+        self.stdout.write(
+            f'{len(records)} slow queries, {len(shapes)} shapes '
+            f'in {len(files)} files.'
+        )
+        self.stdout.write(
+            f'{"total ms":>10} {"count":>6} {"avg ms":>8} {"max ms":>8}  '
+            f'query'
+        )
+        for stats in shapes[:options['top']]:
+            shape = stats['shape']
+            if len(shape) > SQL_WIDTH:
+                shape = shape[:SQL_WIDTH - 3] + '...'
+            self.stdout.write(
+                f'{stats["total"]:>10.1f} {stats["count"]:>6} '
+                f'{stats["total"] / stats["count"]:>8.1f} '
+                f'{stats["max"]:>8.1f}  {shape}'
+            )
+            for view in sorted(stats['views']):
+                self.stdout.write(f'{"":>36}view: {view}')
+            for line in stats['plan'] or ():
+                self.stdout.write(f'{"":>36}plan: {line}')
@@ -0,0 +1,38 @@
+# Generated by Django 3.2 on 2026-10-18 19:24
+
+from django.db import migrations, models
+from django.db.models import Count, Sum
+
+
+def fill_title_scores(apps, schema_editor):
+    Title = apps.get_model('reviews', 'Title')
+    for title in Title.objects.annotate(
+        reviews_sum=Sum('reviews__score'),
+        reviews_count=Count('reviews')
+    ).filter(reviews_count__gt=0).iterator():
+        Title.objects.filter(pk=title.pk).update(
+            score_sum=title.reviews_sum,
+            score_count=title.reviews_count,
+            rating=title.reviews_sum // title.reviews_count
+        )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('reviews', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='title',
+            name='score_count',
+            field=models.PositiveIntegerField(default=0, verbose_name='Количество оценок'),
+        ),
+        migrations.AddField(
+            model_name='title',
+            name='score_sum',
+            field=models.PositiveIntegerField(default=0, verbose_name='Сумма оценок'),
+        ),
+        migrations.RunPython(fill_title_scores, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,53 @@
+# Generated by Django 3.2 on 2026-10-18 19:30
+
+from django.db import migrations, models
+from django.db.models import Count, Max, Q
+import django.db.models.deletion
+
+
+def fill_title_statistics(apps, schema_editor):
+    Review = apps.get_model('reviews', 'Review')
+    TitleStatistics = apps.get_model('reviews', 'TitleStatistics')
+    rows = Review.objects.order_by().values('title').annotate(
+        last_review=Max('pub_date'),
+        **{
+            f'score_{score}': Count('pk', filter=Q(score=score))
+            for score in range(1, 11)
+        }
+    )
+    TitleStatistics.objects.bulk_create(
+        TitleStatistics(title_id=row.pop('title'), **row)
+        for row in rows.iterator()
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('reviews', '0003_keyset_indexes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='TitleStatistics',
+            fields=[
+                ('title', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='statistics', serialize=False, to='reviews.title', verbose_name='Произведение')),
+                ('score_1', models.PositiveIntegerField(default=0, verbose_name='Количество оценок 1')),
+                ('score_2', models.PositiveIntegerField(default=0, verbose_name='Количество оценок 2')),
+                ('score_3', models.PositiveIntegerField(default=0, verbose_name='Количество оценок 3')),
+                ('score_4', models.PositiveIntegerField(default=0, verbose_name='Количество оценок 4')),
+                ('score_5', models.PositiveIntegerField(default=0, verbose_name='Количество оценок 5')),
+                ('score_6', models.PositiveIntegerField(default=0, verbose_name='Количество оценок 6')),
+                ('score_7', models.PositiveIntegerField(default=0, verbose_name='Количество оценок 7')),
+                ('score_8', models.PositiveIntegerField(default=0, verbose_name='Количество оценок 8')),
+                ('score_9', models.PositiveIntegerField(default=0, verbose_name='Количество оценок 9')),
+                ('score_10', models.PositiveIntegerField(default=0, verbose_name='Количество оценок 10')),
+                ('last_review', models.DateTimeField(default=None, null=True, verbose_name='Последний отзыв')),
+            ],
+            options={
+                'verbose_name': 'Статистика произведения',
+                'verbose_name_plural': 'Статистика произведений',
+            },
+        ),
+        migrations.RunPython(fill_title_statistics, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 3.2 on 2026-10-18 19:39
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('reviews', '0004_titlestatistics'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='user',
+            name='auth_version',
+            field=models.PositiveIntegerField(default=0, verbose_name='Версия прав доступа'),
+        ),
+    ]
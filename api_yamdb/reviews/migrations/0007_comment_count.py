@@ -0,0 +1,40 @@
+# Generated by Django 3.2 on 2026-10-18 19:52
+
+from django.db import migrations, models
+from django.db.models import Count, OuterRef, Subquery, Value
+from django.db.models.functions import Coalesce
+
+
+def fill_comment_counts(apps, schema_editor):
+    Comment = apps.get_model('reviews', 'Comment')
+    Review = apps.get_model('reviews', 'Review')
+    comments = Comment.objects.filter(
+        review=OuterRef('pk')
+    ).order_by().values('review').annotate(total=Count('pk')).values('total')
+    Review.objects.update(
+        comment_count=Coalesce(Subquery(comments), Value(0))
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('reviews', '0006_job'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='review',
+            name='comment_count',
+            field=models.PositiveIntegerField(default=0, verbose_name='Количество комментариев'),
+        ),
+        migrations.RunPython(fill_comment_counts, migrations.RunPython.noop),
+        migrations.AddIndex(
+            model_name='review',
+            index=models.Index(fields=['title', 'comment_count', 'id'], name='review_title_comments_id_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='title',
+            index=models.Index(fields=['score_count', 'id'], name='title_score_count_id_idx'),
+        ),
+    ]
@@ -0,0 +1,29 @@
+# Generated by Django 3.2 on 2026-10-18 19:54
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('reviews', '0007_comment_count'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='category',
+            index=models.Index(fields=['name'], name='category_name_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='genre',
+            index=models.Index(fields=['name'], name='genre_name_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='title',
+            index=models.Index(fields=['category', 'name', 'id'], name='title_category_name_id_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='title',
+            index=models.Index(fields=['year', 'name', 'id'], name='title_year_name_id_idx'),
+        ),
+    ]
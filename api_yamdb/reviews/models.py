@@ -1,9 +1,10 @@
-from django.db import models
+from django.db import models, transaction
 from django.contrib.auth.models import AbstractUser
 from django.core.validators import (
     MaxValueValidator,
     MinValueValidator
 )
+from django.utils import timezone
 
 from reviews.validators import validate_for_year
 
@@ -38,6 +39,10 @@ class User(AbstractUser):
         default='user',
         verbose_name='Роль'
     )
+    auth_version = models.PositiveIntegerField(
+        default=0,
+        verbose_name='Версия прав доступа'
+    )
 
     def __str__(self):
         return self.username
@@ -74,6 +79,9 @@ class BaseModel(models.Model):
     class Meta:
         abstract = True
         ordering = ('name',)
+        indexes = (
+            models.Index(fields=('name',), name='%(class)s_name_idx'),
+        )
 
     def __str__(self):
         return self.name
@@ -132,11 +140,32 @@ class Title(models.Model):
         null=True,
         default=None
     )
+    score_sum = models.PositiveIntegerField(
+        verbose_name='Сумма оценок',
+        default=0
+    )
+    score_count = models.PositiveIntegerField(
+        verbose_name='Количество оценок',
+        default=0
+    )
 
     class Meta:
         ordering = ('name',)
         verbose_name = 'Произведение'
         verbose_name_plural = 'Произведения'
+        indexes = (
+            models.Index(fields=('name', 'id'), name='title_name_id_idx'),
+            models.Index(
+                fields=('score_count', 'id'), name='title_score_count_id_idx'
+            ),
+            models.Index(
+                fields=('category', 'name', 'id'),
+                name='title_category_name_id_idx'
+            ),
+            models.Index(
+                fields=('year', 'name', 'id'), name='title_year_name_id_idx'
+            ),
+        )
 
     def __str__(self):
         return self.name
@@ -190,6 +219,13 @@ class CommentReview(models.Model):
     class Meta:
         abstract = True
 
+    def save(self, *args, **kwargs):
+        # Счетчики произведения и отзыва обновляются в сигнале post_save,
+        # который отправляется после записи: запись и счетчики сохраняются
+        # в одной транзакции.
+        with transaction.atomic():
+            super().save(*args, **kwargs)
+
 
 class Review(CommentReview):
     """Модель отзыва на произведения.
@@ -208,11 +244,25 @@ class Review(CommentReview):
             MaxValueValidator(10, 'Допустимы значения от 1 до 10')
         ]
     )
+    comment_count = models.PositiveIntegerField(
+        verbose_name='Количество комментариев',
+        default=0
+    )
 
     class Meta:
         ordering = ('pub_date',)
         verbose_name = 'Отзыв'
         verbose_name_plural = 'Отзывы'
+        indexes = (
+            models.Index(
+                fields=('title', 'pub_date', 'id'),
+                name='review_title_pub_date_id_idx'
+            ),
+            models.Index(
+                fields=('title', 'comment_count', 'id'),
+                name='review_title_comments_id_idx'
+            ),
+        )
         constraints = (
             models.UniqueConstraint(
                 fields=('title', 'author',),
@@ -221,6 +271,108 @@ class Review(CommentReview):
         )
 
 
+class TitleStatistics(models.Model):
+    """Сводка по отзывам на произведение: количество каждой оценки
+       и время последнего отзыва. Обновляется при записи отзывов.
+    """
+    SCORES = range(1, 11)
+
+    title = models.OneToOneField(
+        Title,
+        verbose_name='Произведение',
+        on_delete=models.CASCADE,
+        primary_key=True,
+        related_name='statistics'
+    )
+    score_1 = models.PositiveIntegerField(
+        verbose_name='Количество оценок 1',
+        default=0
+    )
+    score_2 = models.PositiveIntegerField(
+        verbose_name='Количество оценок 2',
+        default=0
+    )
+    score_3 = models.PositiveIntegerField(
+        verbose_name='Количество оценок 3',
+        default=0
+    )
+    score_4 = models.PositiveIntegerField(
+        verbose_name='Количество оценок 4',
+        default=0
+    )
+    score_5 = models.PositiveIntegerField(
+        verbose_name='Количество оценок 5',
+        default=0
+    )
+    score_6 = models.PositiveIntegerField(
+        verbose_name='Количество оценок 6',
+        default=0
+    )
+    score_7 = models.PositiveIntegerField(
+        verbose_name='Количество оценок 7',
+        default=0
+    )
+    score_8 = models.PositiveIntegerField(
+        verbose_name='Количество оценок 8',
+        default=0
+    )
+    score_9 = models.PositiveIntegerField(
+        verbose_name='Количество оценок 9',
+        default=0
+    )
+    score_10 = models.PositiveIntegerField(
+        verbose_name='Количество оценок 10',
+        default=0
+    )
+    last_review = models.DateTimeField(
+        verbose_name='Последний отзыв',
+        null=True,
+        default=None
+    )
+
+    class Meta:
+        verbose_name = 'Статистика произведения'
+        verbose_name_plural = 'Статистика произведений'
+
+    def __str__(self):
+        return f'Статистика {self.title_id}'
+
+    @property
+    def histogram(self):
+        return {
+            score: getattr(self, f'score_{score}') for score in self.SCORES
+        }
+
+    @property
+    def review_count(self):
+        return sum(self.histogram.values())
+
+    @property
+    def mean(self):
+        count = self.review_count
+        if not count:
+            return None
+        return sum(
+            score * number for score, number in self.histogram.items()
+        ) / count
+
+    @property
+    def median(self):
+        """Медиана по гистограмме: среднее двух центральных оценок."""
+        count = self.review_count
+        if not count:
+            return None
+        middle = ((count - 1) // 2, count // 2)
+        values = []
+        seen = 0
+        for score, number in self.histogram.items():
+            for position in middle:
+                if seen <= position < seen + number:
+                    values.append(score)
+            seen += number
+        return sum(values) / len(values)
+
+
 class Comment(CommentReview):
     """Модель комментария к отзывам.
     Комментарий привязан к определённому отзыву.
@@ -235,3 +387,66 @@ class Comment(CommentReview):
         ordering = ('pub_date',)
         verbose_name = 'Комментарий'
         verbose_name_plural = 'Комментарии'
+        indexes = (
+            models.Index(
+                fields=('review', 'pub_date', 'id'),
+                name='comment_review_pub_date_id_idx'
+            ),
+        )
+
+
+class Job(models.Model):
+    """Фоновая задача (например, отправка письма) для обработчика run_jobs."""
+    PENDING = 'pending'
+    RUNNING = 'running'
+    FAILED = 'failed'
+    STATUS_CHOICES = (
+        (PENDING, 'Ожидает'),
+        (RUNNING, 'Выполняется'),
+        (FAILED, 'Ошибка'),
+    )
+
+    task = models.CharField(
+        verbose_name='Задача',
+        max_length=100
+    )
+    payload = models.JSONField(
+        verbose_name='Параметры',
+        default=dict
+    )
+    status = models.CharField(
+        verbose_name='Статус',
+        choices=STATUS_CHOICES,
+        max_length=16,
+        default=PENDING
+    )
+    attempts = models.PositiveSmallIntegerField(
+        verbose_name='Попыток',
+        default=0
+    )
+    run_at = models.DateTimeField(
+        verbose_name='Время запуска',
+        default=timezone.now
+    )
+    last_error = models.TextField(
+        verbose_name='Последняя ошибка',
+        blank=True
+    )
+    created = models.DateTimeField(
+        verbose_name='Дата создания',
+        auto_now_add=True
+    )
+
+    class Meta:
+        ordering = ('run_at',)
+        verbose_name = 'Задача'
+        verbose_name_plural = 'Задачи'
+        indexes = (
+            models.Index(
+                fields=('status', 'run_at'),
+                name='job_status_run_at_idx'
+            ),
+        )
+
+    def __str__(self):
+        return f'{self.task} ({self.status})'
@@ -0,0 +1,143 @@
+import re
+
+from django.db import DEFAULT_DB_ALIAS, connections
+from django.db.models import Q
+from django.db.utils import OperationalError
+
+from reviews.models import Review, Title
+
+# Модели и поля, по которым строится полнотекстовый индекс.
+INDEXED_FIELDS = {
+    Title: ('name', 'description'),
+    Review: ('text',),
+}
+
+TOKEN_PATTERN = re.compile(r'\w+')
+
+# Наличие индекса для (alias, таблица) проверяется один раз на процесс.
+_index_available = {}
+
+
+def get_index_table(model):
+    return f'{model._meta.db_table}_fts'
+
+
+def get_trigger_sql(model):
+    """
+    Триггеры, синхронизирующие FTS5-таблицу с таблицей модели
+    (external content, см. документацию SQLite FTS5).
+    """
+    table = model._meta.db_table
+    index = get_index_table(model)
+    columns = INDEXED_FIELDS[model]
+    names = ', '.join(columns)
+    new = ', '.join(f'new.{column}' for column in columns)
+    old = ', '.join(f'old.{column}' for column in columns)
+    insert = (
+        f'INSERT INTO {index}(rowid, {names}) VALUES (new.id, {new});'
+    )
+    delete = (
+        f"INSERT INTO {index}({index}, rowid, {names}) "
+        f"VALUES ('delete', old.id, {old});"
+    )
+    return {
+        f'{index}_ai': (
+            f'CREATE TRIGGER IF NOT EXISTS {index}_ai AFTER INSERT ON {table} '
+            f'BEGIN {insert} END'
+        ),
+        f'{index}_ad': (
+            f'CREATE TRIGGER IF NOT EXISTS {index}_ad AFTER DELETE ON {table} '
+            f'BEGIN {delete} END'
+        ),
+        f'{index}_au': (
+            f'CREATE TRIGGER IF NOT EXISTS {index}_au '
+            f'AFTER UPDATE OF {names} ON {table} '
+            f'BEGIN {delete} {insert} END'
+        ),
+    }
+
+
+def create_search_indexes(using=DEFAULT_DB_ALIAS, **kwargs):
+    """
+    Создание FTS5-индексов и триггеров (обработчик post_migrate).
+
+    SQLite пересоздает таблицу при изменении ее схемы, и триггеры при
+    этом удаляются, поэтому после каждой миграции они проверяются заново,
+    а индекс при необходимости перестраивается.
+    """
+    connection = connections[using]
+    if connection.vendor != 'sqlite':
+        return
+    with connection.cursor() as cursor:
+        try:
+            cursor.execute(
+                'CREATE VIRTUAL TABLE temp.fts5_check USING fts5(a)'
+            )
+            cursor.execute('DROP TABLE temp.fts5_check')
+        except OperationalError:
+            return
+        cursor.execute(
+            "SELECT name FROM sqlite_master WHERE type IN ('table', 'trigger')"
+        )
+        existing = {row[0] for row in cursor.fetchall()}
+        for model, columns in INDEXED_FIELDS.items():
+            index = get_index_table(model)
+            triggers = get_trigger_sql(model)
+            if index in existing and existing.issuperset(triggers):
+                _index_available[(using, index)] = True
+                continue
+            cursor.execute(
+                f'CREATE VIRTUAL TABLE IF NOT EXISTS {index} USING fts5('
+                f'{", ".join(columns)}, '
+                f"content='{model._meta.db_table}', content_rowid='id', "
+                f"tokenize='unicode61 remove_diacritics 2')"
+            )
+            for sql in triggers.values():
+                cursor.execute(sql)
+            cursor.execute(f"INSERT INTO {index}({index}) VALUES ('rebuild')")
+            _index_available[(using, index)] = True
+
+
+def has_search_index(model, using=DEFAULT_DB_ALIAS):
+    index = get_index_table(model)
+    key = (using, index)
+    if key not in _index_available:
+        connection = connections[using]
+        _index_available[key] = (
+            connection.vendor == 'sqlite'
+            and index in connection.introspection.table_names()
+        )
+    return _index_available[key]
+
+
+def search(queryset, query):
+    """
+    Полнотекстовый поиск по полям INDEXED_FIELDS модели queryset.
+
+    В SQLite используется FTS5 с сортировкой по релевантности (bm25),
+    в остальных СУБД - поиск всех слов запроса через icontains.
+    """
+    model = queryset.model
+    tokens = TOKEN_PATTERN.findall(query)
+    if not tokens:
+        return queryset.none()
+    if not has_search_index(model, queryset.db):
+        condition = Q()
+        for token in tokens:
+            token_condition = Q()
+            for field in INDEXED_FIELDS[model]:
+                token_condition |= Q(**{f'{field}__icontains': token})
+            condition &= token_condition
+        return queryset.filter(condition)
+    index = get_index_table(model)
+    match = ' '.join(f'"{token}"' for token in tokens)
+    return queryset.extra(
+        tables=[index],
+        where=[
+            f'{index}.rowid = {model._meta.db_table}.id',
+            f'{index} MATCH %s',
+        ],
+        params=[match],
+        select={'search_rank': f'{index}.rank'},
+        order_by=['search_rank'],
+    )
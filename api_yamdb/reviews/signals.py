@@ -0,0 +1,232 @@
+import threading
+
+from django.core.signals import request_finished
+from django.db import transaction
+from django.db.models import (
+    Case,
+    Count,
+    F,
+    Max,
+    OuterRef,
+    Q,
+    Subquery,
+    Sum,
+    Value,
+    When
+)
+from django.db.models.functions import Coalesce
+from django.db.models.signals import (
+    post_delete,
+    post_save,
+    pre_delete,
+    pre_save
+)
+from django.dispatch import Signal, receiver
+
+from reviews.models import Comment, Review, Title, TitleStatistics
+
+# Отправляется после массовой загрузки данных через bulk_create, при которой
+# сигналы моделей не отправляются (например, для сброса кэша API).
+bulk_loaded = Signal()
+
+# Произведения и отзывы, удаляемые сейчас в этом потоке (pre_delete -
+# post_delete). При каскадном удалении счетчики удаляемого родителя не
+# обновляются: иначе каждый отзыв и комментарий выполнял бы UPDATE строк,
+# которые будут удалены в той же транзакции. Отметки удаления, которое
+# завершилось ошибкой, снимаются в конце запроса.
+deleting = threading.local()
+
+RATING = Case(
+    When(score_count=0, then=None),
+    default=F('score_sum') / F('score_count')
+)
+
+
+def update_rating(title_id, score_delta, count_delta):
+    """Инкрементальное обновление суммы, количества оценок и рейтинга
+       произведения без пересчета по всем отзывам.
+    """
+    with transaction.atomic():
+        Title.objects.filter(pk=title_id).update(
+            score_sum=F('score_sum') + score_delta,
+            score_count=F('score_count') + count_delta
+        )
+        Title.objects.filter(pk=title_id).update(rating=RATING)
+
+
+def recalculate_ratings(titles=None):
+    """Полный пересчет рейтингов по отзывам (например, после bulk_create,
+       при котором сигналы не отправляются).
+    """
+    if titles is None:
+        titles = Title.objects.all()
+    reviews = Review.objects.filter(
+        title=OuterRef('pk')
+    ).order_by().values('title')
+    with transaction.atomic():
+        titles.update(
+            score_sum=Coalesce(
+                Subquery(reviews.annotate(total=Sum('score')).values('total')),
+                Value(0)
+            ),
+            score_count=Coalesce(
+                Subquery(reviews.annotate(total=Count('pk')).values('total')),
+                Value(0)
+            )
+        )
+        titles.update(rating=RATING)
+
+
+def recalculate_comment_counts(reviews=None):
+    """Полный пересчет количества комментариев к отзывам."""
+    if reviews is None:
+        reviews = Review.objects.all()
+    comments = Comment.objects.filter(
+        review=OuterRef('pk')
+    ).order_by().values('review').annotate(total=Count('pk')).values('total')
+    reviews.update(comment_count=Coalesce(Subquery(comments), Value(0)))
+
+
+def recalculate_statistics(titles=None):
+    """Полный пересчет сводок по отзывам для произведений."""
+    if titles is None:
+        titles = Title.objects.all()
+    aggregates = {
+        f'score_{score}': Count('pk', filter=Q(score=score))
+        for score in TitleStatistics.SCORES
+    }
+    rows = Review.objects.filter(
+        title__in=titles
+    ).order_by().values('title').annotate(
+        last_review=Max('pub_date'), **aggregates
+    )
+    with transaction.atomic():
+        TitleStatistics.objects.filter(title__in=titles).delete()
+        TitleStatistics.objects.bulk_create(
+            TitleStatistics(
+                title_id=row.pop('title'), **row
+            ) for row in rows.iterator()
+        )
+
+
+def finish_bulk_load(titles=None, reviews=None):
+    """
+    Завершение массовой загрузки: пересчет рейтингов, сводок и количества
+    комментариев для загруженных произведений и отзывов (по умолчанию для
+    всех) и сигнал bulk_loaded.
+    """
+    recalculate_ratings(titles)
+    recalculate_statistics(titles)
+    recalculate_comment_counts(reviews)
+    bulk_loaded.send(sender=None)
+
+
+def update_statistics(title_id, score, delta, pub_date=None):
+    """
+    Изменение количества оценки `score` на `delta`. Если сводки еще нет
+    (например, после импорта), она собирается заново по отзывам.
+    """
+    changes = {f'score_{score}': F(f'score_{score}') + delta}
+    if pub_date is not None:
+        changes['last_review'] = Case(
+            When(
+                Q(last_review__isnull=True) | Q(last_review__lt=pub_date),
+                then=Value(pub_date)
+            ),
+            default=F('last_review')
+        )
+    updated = TitleStatistics.objects.filter(
+        title_id=title_id
+    ).update(**changes)
+    if not updated and delta > 0:
+        recalculate_statistics(Title.objects.filter(pk=title_id))
+
+
+def get_deleting():
+    if not hasattr(deleting, 'objects'):
+        deleting.objects = set()
+    return deleting.objects
+
+
+def is_deleting(model, pk):
+    return (model, pk) in get_deleting()
+
+
+@receiver(pre_delete, sender=Title)
+@receiver(pre_delete, sender=Review)
+def remember_deleting(sender, instance, **kwargs):
+    get_deleting().add((sender, instance.pk))
+
+
+@receiver(post_delete, sender=Title)
+@receiver(post_delete, sender=Review)
+def forget_deleting(sender, instance, **kwargs):
+    get_deleting().discard((sender, instance.pk))
+
+
+@receiver(request_finished)
+def forget_all_deleting(sender, **kwargs):
+    get_deleting().clear()
+
+
+@receiver(pre_save, sender=Review)
+def remember_previous_score(sender, instance, **kwargs):
+    """Запоминаем прежнюю оценку при редактировании отзыва."""
+    instance._previous_score = None
+    if instance.pk is not None:
+        instance._previous_score = Review.objects.filter(
+            pk=instance.pk
+        ).values_list('score', flat=True).first()
+
+
+@receiver(post_save, sender=Review)
+def update_rating_on_save(sender, instance, created, **kwargs):
+    previous_score = getattr(instance, '_previous_score', None)
+    with transaction.atomic():
+        if created or previous_score is None:
+            update_rating(instance.title_id, instance.score, 1)
+            update_statistics(
+                instance.title_id, instance.score, 1, instance.pub_date
+            )
+        elif previous_score != instance.score:
+            update_rating(
+                instance.title_id, instance.score - previous_score, 0
+            )
+            update_statistics(instance.title_id, previous_score, -1)
+            update_statistics(instance.title_id, instance.score, 1)
+
+
+@receiver(post_delete, sender=Review)
+def update_rating_on_delete(sender, instance, **kwargs):
+    if is_deleting(Title, instance.title_id):
+        return
+    with transaction.atomic():
+        update_rating(instance.title_id, -instance.score, -1)
+        update_statistics(instance.title_id, instance.score, -1)
+        TitleStatistics.objects.filter(
+            title_id=instance.title_id,
+            last_review=instance.pub_date
+        ).update(
+            last_review=Subquery(
+                Review.objects.filter(
+                    title=OuterRef('title')
+                ).order_by('-pub_date').values('pub_date')[:1]
+            )
+        )
+
+
+@receiver(post_save, sender=Comment)
+def update_comment_count_on_save(sender, instance, created, **kwargs):
+    if created:
+        Review.objects.filter(pk=instance.review_id).update(
+            comment_count=F('comment_count') + 1
+        )
+
+
+@receiver(post_delete, sender=Comment)
+def update_comment_count_on_delete(sender, instance, **kwargs):
+    if is_deleting(Review, instance.review_id):
+        return
+    Review.objects.filter(pk=instance.review_id).update(
+        comment_count=F('comment_count') - 1
+    )
@@ -31,5 +31,8 @@ if FILENAME not in project_dir_content:
 assert get_version() < '4.0.0', 'Пожалуйста, используйте версию Django < 4.0.0'
 
 pytest_plugins = [
+    'tests.fixtures.fixture_cache',
+    'tests.fixtures.fixture_jobs',
+    'tests.fixtures.fixture_nplusone',
     'tests.fixtures.fixture_user',
 ]
@@ -0,0 +1,18 @@
+import pytest
+from django.core.cache import cache
+
+
+@pytest.fixture(autouse=True)
+def clear_cache(settings):
+    """
+    Тесты выполняются в одном процессе, поэтому вместо общего кэша
+    (таблица в базе данных) используется кэш в памяти.
+    """
+    settings.CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        }
+    }
+    cache.clear()
+    yield
+    cache.clear()
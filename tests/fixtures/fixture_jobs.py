@@ -0,0 +1,7 @@
+import pytest
+
+
+@pytest.fixture(autouse=True)
+def jobs_eager(settings):
+    """Фоновые задачи выполняются сразу, как при синхронной отправке."""
+    settings.JOBS_EAGER = True
@@ -0,0 +1,7 @@
+import pytest
+
+
+@pytest.fixture(autouse=True)
+def nplusone(settings):
+    """Повторяющиеся запросы одной формы в запросе к API - ошибка теста."""
+    settings.NPLUSONE_DETECTION = 'raise'
@@ -373,3 +373,241 @@ class Test00UserRegistration:
             'пользователя, созданного администратором,  возвращает ответ '
             'со статусом 200.'
         )
+
+    def test_signup_email_is_queued(self, client, settings, monkeypatch):
+        from django.core.management import call_command
+
+        from reviews import jobs
+        from reviews.models import Job
+
+        settings.JOBS_EAGER = False
+        valid_data = {
+            'email': 'valid@yamdb.fake',
+            'username': 'valid_username'
+        }
+        outbox_before_count = len(mail.outbox)
+        response = client.post(self.url_signup, data=valid_data)
+        assert response.status_code == HTTPStatus.OK
+        assert len(mail.outbox) == outbox_before_count, (
+            'Проверьте, что письмо с кодом подтверждения отправляется '
+            'фоновым обработчиком, а не в обработчике запроса.'
+        )
+        assert Job.objects.filter(task='send_mail').count() == 1
+
+        send_mail_task = jobs.TASKS['send_mail']
+
+        def failing_send_mail(**kwargs):
+            raise ConnectionError('SMTP is down')
+
+        monkeypatch.setitem(jobs.TASKS, 'send_mail', failing_send_mail)
+        call_command('run_jobs', once=True)
+        job = Job.objects.get()
+        assert job.attempts == 1 and job.status == Job.PENDING, (
+            'Проверьте, что неудачная задача возвращается в очередь для '
+            'повторной попытки.'
+        )
+        assert 'SMTP is down' in job.last_error
+
+        monkeypatch.setitem(jobs.TASKS, 'send_mail', send_mail_task)
+        Job.objects.update(run_at=job.created)
+        call_command('run_jobs', once=True)
+        assert not Job.objects.exists()
+        assert len(mail.outbox) == outbox_before_count + 1
+        assert valid_data['email'] in mail.outbox[-1].to
+
+    def test_jobs_leased_one_at_a_time(self, settings, monkeypatch):
+        from reviews import jobs
+        from reviews.models import Job
+
+        settings.JOBS_EAGER = False
+        statuses = []
+
+        def record_statuses(**kwargs):
+            statuses.append(sorted(
+                Job.objects.values_list('status', flat=True)
+            ))
+
+        monkeypatch.setitem(jobs.TASKS, 'record', record_statuses)
+        for _ in range(3):
+            jobs.enqueue('record')
+        assert jobs.run_pending() == (3, 0)
+        assert statuses[0] == [Job.PENDING, Job.PENDING, Job.RUNNING], (
+            'Проверьте, что обработчик захватывает задачу непосредственно '
+            'перед выполнением, а не всю пачку сразу.'
+        )
+
+    def test_jobs_abandoned_lease(self, settings, monkeypatch):
+        from django.utils import timezone
+
+        from reviews import jobs
+        from reviews.models import Job
+
+        settings.JOBS_EAGER = False
+        runs = []
+        monkeypatch.setitem(jobs.TASKS, 'record', lambda: runs.append(1))
+        jobs.enqueue('record')
+        # Обработчик падает на задаче, не успев записать результат.
+        for _ in range(settings.JOBS_MAX_ATTEMPTS):
+            assert jobs.claim_job() is not None
+            Job.objects.update(run_at=timezone.now())
+        assert jobs.run_pending() == (0, 0) and not runs
+        job = Job.objects.get()
+        assert (job.status, job.attempts) == (
+            Job.FAILED, settings.JOBS_MAX_ATTEMPTS
+        ), (
+            'Проверьте, что захват задачи после истечения аренды считается '
+            'попыткой и задача не повторяется бесконечно.'
+        )
+
+        job.delete()
+        jobs.enqueue('record')
+        stale = jobs.claim_job()
+        Job.objects.update(run_at=timezone.now())
+        assert jobs.run_pending() == (1, 0) and runs == [1]
+
+        def failing():
+            raise ConnectionError('SMTP is down')
+
+        monkeypatch.setitem(jobs.TASKS, 'record', failing)
+        assert jobs.run_job(stale) is False, (
+            'Проверьте, что результат задачи, которую после истечения аренды '
+            'выполнил и удалил другой обработчик, не вызывает ошибку.'
+        )
+        assert not Job.objects.exists()
+
+    def test_signup_throttled(self, client):
+        from rest_framework.settings import api_settings
+
+        rate = api_settings.DEFAULT_THROTTLE_RATES['auth']
+        capacity = int(rate.split('/')[0])
+        for idx in range(capacity):
+            response = client.post(self.url_signup, data={
+                'email': f'user{idx}@yamdb.fake',
+                'username': f'user{idx}'
+            })
+            assert response.status_code == HTTPStatus.OK
+        response = client.post(self.url_signup, data={
+            'email': 'another@yamdb.fake',
+            'username': 'another'
+        })
+        assert response.status_code == HTTPStatus.TOO_MANY_REQUESTS, (
+            f'Проверьте, что частота POST-запросов к `{self.url_signup}` '
+            'ограничена.'
+        )
+        assert int(response['Retry-After']) > 0
+        response = client.post(self.url_token, data={
+            'username': 'user0',
+            'confirmation_code': 12345
+        })
+        assert response.status_code == HTTPStatus.TOO_MANY_REQUESTS, (
+            f'Проверьте, что `{self.url_signup}` и `{self.url_token}` '
+            'используют общее ограничение частоты запросов.'
+        )
+
+    def test_throttle_bucket_is_atomic(self, monkeypatch):
+        import threading
+        from types import SimpleNamespace
+
+        from django.contrib.auth.models import AnonymousUser
+        from rest_framework.request import Request
+        from rest_framework.test import APIRequestFactory
+
+        from api import throttling
+        from api.cache import get_cache
+
+        bucket = throttling.BUCKET_KEY.format('reviews', 'ip:127.0.0.1')
+        lock = throttling.LOCK_KEY.format('reviews', 'ip:127.0.0.1')
+        entered = threading.Event()
+        contended = threading.Event()
+
+        class InterleavingCache:
+            """
+            Первый поток читает корзину под блокировкой и ждет, пока
+            второй не наткнется на занятую блокировку.
+            """
+
+            def __init__(self, cache):
+                self.cache = cache
+
+            def __getattr__(self, name):
+                return getattr(self.cache, name)
+
+            def add(self, key, *args, **kwargs):
+                added = self.cache.add(key, *args, **kwargs)
+                if key == lock and not added:
+                    contended.set()
+                return added
+
+            def get(self, key, *args, **kwargs):
+                value = self.cache.get(key, *args, **kwargs)
+                if key == bucket and not entered.is_set():
+                    entered.set()
+                    contended.wait(timeout=5)
+                return value
+
+        monkeypatch.setattr(
+            throttling, 'get_cache', lambda: InterleavingCache(get_cache())
+        )
+        monkeypatch.setattr(
+            throttling.TokenBucketThrottle, 'timer',
+            staticmethod(lambda: 1000.0)
+        )
+        get_cache().set(bucket, (1, 1000.0))
+        view = SimpleNamespace(throttle_scope='reviews')
+        allowed = []
+
+        def send():
+            request = Request(APIRequestFactory().post('/'))
+            request.user = AnonymousUser()
+            allowed.append(
+                throttling.TokenBucketThrottle().allow_request(request, view)
+            )
+
+        first = threading.Thread(target=send)
+        first.start()
+        assert entered.wait(timeout=5)
+        second = threading.Thread(target=send)
+        second.start()
+        first.join()
+        second.join()
+        assert contended.is_set(), (
+            'Проверьте, что второй запрос ждет блокировку корзины.'
+        )
+        assert allowed == [True, False], (
+            'Проверьте, что одновременные запросы клиента не тратят один и '
+            'тот же токен.'
+        )
+        assert get_cache().get(lock) is None, (
+            'Проверьте, что блокировка корзины снимается после запроса.'
+        )
+
+    def test_throttle_lock_timeout(self, monkeypatch, caplog):
+        from types import SimpleNamespace
+
+        from django.contrib.auth.models import AnonymousUser
+        from rest_framework.request import Request
+        from rest_framework.test import APIRequestFactory
+
+        from api import throttling
+        from api.cache import get_cache
+
+        monkeypatch.setattr(throttling, 'LOCK_TIMEOUT', 0)
+        lock = throttling.LOCK_KEY.format('reviews', 'ip:127.0.0.1')
+        get_cache().set(lock, 1)
+        request = Request(APIRequestFactory().post('/'))
+        request.user = AnonymousUser()
+        view = SimpleNamespace(throttle_scope='reviews')
+        with caplog.at_level('WARNING', logger='api.throttling'):
+            allowed = throttling.TokenBucketThrottle().allow_request(
+                request, view
+            )
+        assert allowed, (
+            'Проверьте, что занятая блокировка корзины не приводит к ответу '
+            '429, пока у клиента есть токены.'
+        )
+        assert lock in caplog.text, (
+            'Проверьте, что неудачный захват блокировки записывается в лог.'
+        )
+        assert get_cache().get(lock) == 1, (
+            'Проверьте, что чужая блокировка корзины не снимается.'
+        )
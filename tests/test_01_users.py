@@ -1,6 +1,8 @@
+import time
 from http import HTTPStatus
 
 import pytest
+from django.conf import settings
 
 from tests.utils import (check_pagination,
                          invalid_data_for_user_patch_and_creation)
@@ -552,3 +554,83 @@ class Test01UserAPI:
             'Проверьте, что PATCH-запрос к `/api/v1/users/me/` с ключом '
             '`role` не изменяет роль пользователя.'
         )
+
+    def test_11_cached_authentication(self, user, user_client, admin_client,
+                                      django_assert_num_queries):
+        user_client.get('/api/v1/users/me/')
+        with django_assert_num_queries(0):
+            response = user_client.get('/api/v1/users/me/')
+        assert response.json()['username'] == user.username, (
+            'Проверьте, что пользователь аутентифицированного запроса '
+            'берется из кэша.'
+        )
+        response = user_client.get('/api/v1/users/')
+        assert response.status_code == HTTPStatus.FORBIDDEN
+
+        admin_client.patch(
+            f'/api/v1/users/{user.username}/', data={'role': 'admin'}
+        )
+        response = user_client.get('/api/v1/users/')
+        assert response.status_code == HTTPStatus.OK, (
+            'Проверьте, что после изменения роли пользователя кэш '
+            'аутентификации сбрасывается.'
+        )
+
+        admin_client.delete(f'/api/v1/users/{user.username}/')
+        response = user_client.get('/api/v1/users/me/')
+        assert response.status_code == HTTPStatus.UNAUTHORIZED, (
+            'Проверьте, что удаленный пользователь не аутентифицируется '
+            'по кэшу.'
+        )
+
+    def test_12_role_claims_token(self, admin, user_superuser_client,
+                                  django_assert_num_queries, monkeypatch):
+        from rest_framework.test import APIClient
+
+        from api.authentication import RoleAccessToken
+
+        client = APIClient()
+        client.credentials(
+            HTTP_AUTHORIZATION=f'Bearer {RoleAccessToken.for_user(admin)}'
+        )
+        client.get('/api/v1/users/')
+        # Только страница пользователей: количество берется из кэша,
+        # пользователь - из токена.
+        with django_assert_num_queries(1):
+            response = client.get('/api/v1/users/')
+        assert response.status_code == HTTPStatus.OK, (
+            'Проверьте, что администратор с токеном, содержащим роль, '
+            'получает доступ к `/api/v1/users/`.'
+        )
+        response = client.get('/api/v1/users/me/')
+        assert response.json()['email'] == admin.email
+
+        user_superuser_client.patch(
+            f'/api/v1/users/{admin.username}/', data={'role': 'user'}
+        )
+        response = client.get('/api/v1/users/')
+        assert response.status_code == HTTPStatus.UNAUTHORIZED, (
+            'Проверьте, что после смены роли ранее выданный токен '
+            'отзывается.'
+        )
+        admin.refresh_from_db()
+        client.credentials(
+            HTTP_AUTHORIZATION=f'Bearer {RoleAccessToken.for_user(admin)}'
+        )
+        response = client.get('/api/v1/users/')
+        assert response.status_code == HTTPStatus.FORBIDDEN
+
+        # Блокировка в обход сигналов (как изменение, которое кэш не
+        # увидел) вступает в силу после AUTH_USER_CACHE_TIMEOUT.
+        client.get('/api/v1/users/me/')
+        type(admin).objects.filter(pk=admin.pk).update(is_active=False)
+        assert client.get('/api/v1/users/me/').status_code == HTTPStatus.OK
+        now = time.time()
+        monkeypatch.setattr(
+            time, 'time', lambda: now + settings.AUTH_USER_CACHE_TIMEOUT + 1
+        )
+        response = client.get('/api/v1/users/me/')
+        assert response.status_code == HTTPStatus.UNAUTHORIZED, (
+            'Проверьте, что состояние отзыва токенов хранится в кэше '
+            'ограниченное время.'
+        )
@@ -316,3 +316,445 @@ class Test04TitleAPI:
                           HTTPStatus.FORBIDDEN)
         check_permissions(moderator_client, url, data, 'модератора',
                           titles, HTTPStatus.FORBIDDEN)
+
+    def test_06_titles_cursor_pagination(self, client):
+        from reviews.models import Title
+
+        Title.objects.bulk_create(
+            Title(name=f'Произведение {idx % 7}', year=2000)
+            for idx in range(25)
+        )
+        expected = list(
+            Title.objects.order_by('name', 'id').values_list('id', flat=True)
+        )
+        url = '/api/v1/titles/?cursor='
+        received = []
+        while url:
+            response = client.get(url)
+            assert response.status_code == HTTPStatus.OK, (
+                'Проверьте, что GET-запрос к `/api/v1/titles/?cursor=` '
+                'возвращает ответ со статусом 200.'
+            )
+            data = response.json()
+            assert 'count' not in data, (
+                'Проверьте, что в режиме курсора не выполняется подсчет '
+                'общего количества объектов.'
+            )
+            received.extend(element['id'] for element in data['results'])
+            url = data['next']
+        assert received == expected, (
+            'Проверьте, что в режиме курсора страницы `/api/v1/titles/` '
+            'возвращают все произведения по порядку `(name, id)` без '
+            'пропусков и повторов.'
+        )
+
+        response = client.get(data['previous'])
+        assert [
+            element['id'] for element in response.json()['results']
+        ] == expected[10:20], (
+            'Проверьте, что ссылка `previous` в режиме курсора возвращает '
+            'предыдущую страницу.'
+        )
+
+    def test_07_titles_query_count(self, client, admin_client,
+                                   django_assert_num_queries):
+        create_titles(admin_client)
+        titles_data = [
+            {
+                'name': f'Произведение {idx}',
+                'year': 2000,
+                'genre': ['horror', 'comedy', 'drama'],
+                'category': 'films'
+            }
+            for idx in range(8)
+        ]
+        for data in titles_data:
+            admin_client.post('/api/v1/titles/', data=data)
+
+        # COUNT, страница произведений с категориями, жанры страницы.
+        with django_assert_num_queries(3):
+            response = client.get('/api/v1/titles/')
+        assert len(response.json()['results']) == 10, (
+            'Проверьте, что `/api/v1/titles/` возвращает полную страницу.'
+        )
+        title_id = response.json()['results'][0]['id']
+        with django_assert_num_queries(2):
+            client.get(f'/api/v1/titles/{title_id}/')
+
+    def test_08_titles_response_cache(self, client, admin_client,
+                                      user_client,
+                                      django_assert_num_queries):
+        titles, _, _ = create_titles(admin_client)
+        url = '/api/v1/titles/?genre=horror'
+        response = client.get(url)
+        with django_assert_num_queries(0):
+            cached_response = client.get(url)
+        assert cached_response.json() == response.json(), (
+            'Проверьте, что повторный анонимный GET-запрос к '
+            '`/api/v1/titles/` отдается из кэша.'
+        )
+
+        admin_client.patch(
+            f'/api/v1/titles/{titles[0]["id"]}/', data={'name': 'Новое'}
+        )
+        assert client.get(url).json()['results'][0]['name'] == 'Новое', (
+            'Проверьте, что кэш `/api/v1/titles/` сбрасывается при изменении '
+            'произведения.'
+        )
+
+        user_client.post(
+            f'/api/v1/titles/{titles[0]["id"]}/reviews/',
+            data={'text': 'text', 'score': 7}
+        )
+        assert client.get(url).json()['results'][0]['rating'] == 7, (
+            'Проверьте, что кэш `/api/v1/titles/` сбрасывается при добавлении '
+            'отзыва.'
+        )
+
+        admin_client.post(
+            '/api/v1/genres/', data={'name': 'Вестерн', 'slug': 'western'}
+        )
+        admin_client.patch(
+            f'/api/v1/titles/{titles[1]["id"]}/',
+            data={'genre': ['western']}
+        )
+        response = client.get('/api/v1/titles/?genre=western')
+        assert response.json()['count'] == 1
+        client.get('/api/v1/genres/')
+        with django_assert_num_queries(0):
+            client.get('/api/v1/genres/')
+
+    def test_09_titles_search(self, client, admin_client):
+        create_titles(admin_client)
+        admin_client.post('/api/v1/titles/', data={
+            'name': 'Терминатор 2',
+            'year': 1991,
+            'genre': ['horror'],
+            'category': 'films',
+            'description': 'Терминатор возвращается'
+        })
+        response = client.get('/api/v1/titles/?search=терминатор')
+        assert response.status_code == HTTPStatus.OK
+        names = [title['name'] for title in response.json()['results']]
+        assert names == ['Терминатор 2', 'Терминатор'], (
+            'Проверьте, что `/api/v1/titles/?search=` ищет по названию '
+            'и описанию без учета регистра и сортирует по релевантности.'
+        )
+
+        response = client.get('/api/v1/titles/?search=yippie')
+        names = [title['name'] for title in response.json()['results']]
+        assert names == ['Крепкий орешек'], (
+            'Проверьте, что `/api/v1/titles/?search=` ищет по описанию '
+            'произведения.'
+        )
+        response = client.get('/api/v1/titles/?search=yippie&genre=horror')
+        assert response.json()['count'] == 0
+
+    def test_10_titles_sparse_fields(self, client, admin_client,
+                                     django_assert_num_queries):
+        titles, _, _ = create_titles(admin_client)
+        url = '/api/v1/titles/'
+        # COUNT и страница произведений без JOIN категории и без жанров.
+        with django_assert_num_queries(2) as context:
+            response = client.get(url, {'fields': 'id,name,rating'})
+        assert response.status_code == HTTPStatus.OK
+        assert [
+            list(title) for title in response.json()['results']
+        ] == [['id', 'name', 'rating']] * 2, (
+            f'Проверьте, что `{url}?fields=` возвращает только '
+            'перечисленные поля.'
+        )
+        page_sql = context.captured_queries[-1]['sql']
+        assert 'description' not in page_sql, (
+            f'Проверьте, что `{url}?fields=` не загружает из базы столбцы '
+            'неперечисленных полей.'
+        )
+
+        response = client.get(
+            f'{url}{titles[0]["id"]}/', {'omit': 'description,genre'}
+        )
+        assert set(response.json()) == {
+            'id', 'name', 'year', 'rating', 'category', 'review_count'
+        }, f'Проверьте, что `{url}?omit=` исключает перечисленные поля.'
+
+        response = client.get(url, {'fields': 'name,unknown'})
+        assert response.status_code == HTTPStatus.BAD_REQUEST, (
+            f'Проверьте, что `{url}?fields=` с неизвестным полем '
+            'возвращает ответ со статусом 400.'
+        )
+
+    def test_11_titles_batch(self, client, admin_client,
+                             django_assert_num_queries):
+        titles, _, _ = create_titles(admin_client)
+        url = '/api/v1/titles/'
+        ids = f'{titles[1]["id"]},{titles[0]["id"]},100500'
+        # Произведения с категориями и жанры.
+        with django_assert_num_queries(2):
+            response = client.get(url, {'ids': ids})
+        assert response.status_code == HTTPStatus.OK
+        data = response.json()
+        assert [title['id'] for title in data['results']] == [
+            titles[1]['id'], titles[0]['id']
+        ], (
+            f'Проверьте, что `{url}?ids=` возвращает произведения в порядке '
+            'перечисления id.'
+        )
+        assert len(data['results'][1]['genre']) == 2, (
+            f'Проверьте, что `{url}?ids=` возвращает жанры произведений.'
+        )
+        assert data['missing'] == [100500], (
+            f'Проверьте, что `{url}?ids=` перечисляет ненайденные id '
+            'в поле `missing`.'
+        )
+        response = client.get(url, {'ids': '1,abc'})
+        assert response.status_code == HTTPStatus.BAD_REQUEST, (
+            f'Проверьте, что `{url}?ids=` с некорректным id возвращает '
+            'ответ со статусом 400.'
+        )
+
+    def test_12_titles_bulk(self, client, admin_client, user_client,
+                            django_assert_max_num_queries):
+        titles, categories, genres = create_titles(admin_client)
+        url = '/api/v1/titles/bulk/'
+        data = [
+            {
+                'name': f'Произведение {idx}',
+                'year': 2000 + idx,
+                'genre': [genres[0]['slug'], genres[1]['slug']],
+                'category': categories[idx % 2]['slug'],
+            }
+            for idx in range(20)
+        ]
+        response = user_client.post(
+            url, data=data, format='json'
+        )
+        assert response.status_code == HTTPStatus.FORBIDDEN, (
+            f'Проверьте, что POST-запрос к `{url}` доступен только '
+            'администратору.'
+        )
+        with django_assert_max_num_queries(10):
+            response = admin_client.post(
+                url, data=data, format='json'
+            )
+        assert response.status_code == HTTPStatus.CREATED, (
+            f'Проверьте, что POST-запрос администратора к `{url}` с '
+            'корректными данными возвращает ответ со статусом 201.'
+        )
+        created = response.json()
+        assert [title['name'] for title in created] == [
+            item['name'] for item in data
+        ]
+        assert sorted(created[3]['genre']) == sorted(
+            [genres[0]['slug'], genres[1]['slug']]
+        )
+        response = client.get(f'/api/v1/titles/{created[3]["id"]}/')
+        assert response.json()['category']['slug'] == categories[1]['slug'], (
+            f'Проверьте, что `{url}` сохраняет категории и жанры.'
+        )
+
+        response = admin_client.post(url, data=[
+            data[0], {**data[1], 'genre': ['unknown']}
+        ], format='json')
+        assert response.status_code == HTTPStatus.BAD_REQUEST
+        assert response.json()[0] == {} and 'genre' in response.json()[1], (
+            f'Проверьте, что `{url}` возвращает ошибки по каждому элементу.'
+        )
+        response = admin_client.post(url, data=[
+            {**data[0], 'category': 'unknown', 'genre': ['unknown']},
+            {**data[1], 'year': 3000},
+            {'year': 3000, 'category': 'unknown'},
+        ], format='json')
+        assert response.status_code == HTTPStatus.BAD_REQUEST
+        errors = response.json()
+        assert (
+            {'category', 'genre'} <= set(errors[0])
+            and 'year' in errors[1]
+            and {'name', 'year', 'category'} <= set(errors[2])
+        ), (
+            f'Проверьте, что `{url}` возвращает ошибки в слагах вместе с '
+            'ошибками полей всех элементов.'
+        )
+        assert client.get('/api/v1/titles/').json()['count'] == 22, (
+            f'Проверьте, что `{url}` ничего не сохраняет при ошибках.'
+        )
+
+        response = admin_client.patch(url, data=[
+            {'id': titles[0]['id'], 'name': 'Терминатор 2'},
+            {'id': titles[1]['id'], 'genre': [genres[0]['slug']]},
+        ], format='json')
+        assert response.status_code == HTTPStatus.OK, (
+            f'Проверьте, что PATCH-запрос администратора к `{url}` '
+            'возвращает ответ со статусом 200.'
+        )
+        assert response.json()[0]['name'] == 'Терминатор 2'
+        assert response.json()[1]['genre'] == [genres[0]['slug']], (
+            f'Проверьте, что PATCH-запрос к `{url}` заменяет жанры.'
+        )
+        response = admin_client.patch(
+            url, data=[{'id': 100500, 'name': 'Нет'}],
+            format='json'
+        )
+        assert response.status_code == HTTPStatus.BAD_REQUEST
+
+    def test_13_titles_count(self, client, admin_client, settings,
+                             django_assert_num_queries):
+        create_titles(admin_client)
+        url = '/api/v1/titles/'
+        client.get(url)
+        # Количество без фильтров берется из кэша: только страница и жанры.
+        with django_assert_num_queries(2):
+            response = client.get(url, {'fields': 'id,name,genre'})
+        assert (
+            response.json()['count'], response.json()['count_exact']
+        ) == (2, True), (
+            f'Проверьте, что `{url}` возвращает точное количество '
+            'произведений и признак `count_exact`.'
+        )
+        admin_client.post(url, data={
+            'name': 'Чужой', 'year': 1979, 'genre': ['drama'],
+            'category': 'films'
+        })
+        assert client.get(url).json()['count'] == 3, (
+            'Проверьте, что количество произведений в кэше обновляется при '
+            'добавлении произведения.'
+        )
+
+        admin_client.post(f'{url}bulk/', data=[
+            {
+                'name': f'Произведение {idx}',
+                'year': 2000,
+                'genre': ['drama'],
+                'category': 'films'
+            }
+            for idx in range(12)
+        ], format='json')
+        settings.API_COUNT_LIMIT = 5
+        response = client.get(url, {'year': 1984})
+        assert (
+            response.json()['count'], response.json()['count_exact']
+        ) == (1, True)
+        response = client.get(url, {'name': 'Произведение'})
+        data = response.json()
+        assert (data['count'], data['count_exact']) == (11, False), (
+            f'Проверьте, что при фильтрации `{url}` количество ограничено '
+            'API_COUNT_LIMIT и помечено как приблизительное.'
+        )
+        assert len(data['results']) == 10 and data['next'], (
+            f'Проверьте, что при приблизительном количестве `{url}` '
+            'возвращает ссылку на следующую страницу.'
+        )
+        response = client.get(url, {'name': 'Произведение', 'page': 2})
+        assert (
+            len(response.json()['results']), response.json()['count_exact']
+        ) == (2, True)
+
+    def test_14_titles_cursor_ordering(self, client):
+        from reviews.models import Title
+
+        Title.objects.bulk_create(
+            Title(name=f'Произведение {idx}', year=2000, score_count=idx % 4)
+            for idx in range(25)
+        )
+        expected = list(Title.objects.order_by(
+            '-score_count', '-id'
+        ).values_list('id', flat=True))
+        url = '/api/v1/titles/?ordering=-review_count&cursor='
+        received = []
+        while url:
+            data = client.get(url).json()
+            received.extend(element['id'] for element in data['results'])
+            url = data['next']
+        assert received == expected, (
+            'Проверьте, что в режиме курсора `/api/v1/titles/` учитывает '
+            'параметр `ordering`.'
+        )
+        response = client.get(data['previous'])
+        assert [
+            element['id'] for element in response.json()['results']
+        ] == expected[10:20]
+        response = client.get('/api/v1/titles/?search=Произведение&cursor=')
+        assert response.status_code == HTTPStatus.BAD_REQUEST, (
+            'Проверьте, что курсор вместе с поиском по релевантности '
+            'возвращает ответ со статусом 400.'
+        )
+
+    def test_15_shared_cache_check(self, settings):
+        from api.checks import check_fast_api_cache, check_shared_api_cache
+
+        errors = check_shared_api_cache(None)
+        assert [error.id for error in errors] == ['api.E001'], (
+            'Проверьте, что кэш в памяти процесса для API_CACHE_ALIAS '
+            'считается ошибкой конфигурации.'
+        )
+        settings.CACHES = {'default': {
+            'BACKEND': 'django.core.cache.backends.db.DatabaseCache',
+            'LOCATION': 'api_cache',
+        }}
+        assert check_shared_api_cache(None) == []
+        assert [error.id for error in check_fast_api_cache(None)] == [
+            'api.W001'
+        ], (
+            'Проверьте, что `check --deploy` предупреждает о кэше в базе '
+            'данных.'
+        )
+
+    def test_16_titles_cursor_plan(self, client):
+        from django.db import connection
+        from django.test.utils import CaptureQueriesContext
+
+        from reviews.models import Title
+
+        Title.objects.bulk_create(
+            Title(name=f'Произведение {idx}', year=2000, score_count=idx % 4)
+            for idx in range(25)
+        )
+        for params in ('', 'ordering=-review_count&'):
+            url = client.get(f'/api/v1/titles/?{params}cursor=').json()['next']
+            with CaptureQueriesContext(connection) as context:
+                client.get(url)
+            sql = next(
+                query['sql'] for query in context.captured_queries
+                if query['sql'].startswith('SELECT')
+                and 'FROM "reviews_title"' in query['sql']
+            )
+            with connection.cursor() as cursor:
+                cursor.execute(f'EXPLAIN QUERY PLAN {sql}')
+                plan = [row[-1] for row in cursor.fetchall()]
+            assert any(
+                line.startswith('SEARCH') and 'reviews_title' in line
+                and ('>' in line or '<' in line)
+                for line in plan
+            ), (
+                'Проверьте, что следующая страница в режиме курсора ищет '
+                f'строки по диапазону индекса, а не просматривает его: {plan}'
+            )
+
+    def test_17_cascade_delete_bumps_once(self, admin_client, monkeypatch):
+        from api import cache
+        from reviews.models import Comment, Review, Title, User
+
+        title = Title.objects.create(name='Удаляется', year=2000)
+        for idx in range(3):
+            author = User.objects.create(
+                username=f'author_{idx}', email=f'author_{idx}@yamdb.fake'
+            )
+            review = Review.objects.create(
+                title=title, author=author, text='Отзыв', score=5
+            )
+            for _ in range(3):
+                Comment.objects.create(
+                    review=review, author=author, text='Комментарий'
+                )
+        bumped = []
+        original = cache.bump_version
+        monkeypatch.setattr(
+            cache, 'bump_version',
+            lambda namespace: bumped.append(namespace) or original(namespace)
+        )
+        admin_client.delete(f'/api/v1/titles/{title.pk}/')
+        assert sorted(bumped) == sorted(set(bumped)) and {
+            'title', 'review', 'comment'
+        } <= set(bumped), (
+            'Проверьте, что каскадное удаление сбрасывает версию каждого '
+            f'пространства имен кэша один раз: {bumped}.'
+        )
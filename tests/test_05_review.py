@@ -4,7 +4,8 @@ import pytest
 from django.db.utils import IntegrityError
 
 from tests.utils import (check_fields, check_pagination, create_reviews,
-                         create_single_review, create_titles)
+                         create_single_comment, create_single_review,
+                         create_titles)
 
 
 @pytest.mark.django_db(transaction=True)
@@ -384,3 +385,193 @@ class Test05ReviewAPI:
                 f'Проверьте, что DELETE-запрос {role} к чужому отзыву через '
                 f'`{url_template}` удаляет отзыв.'
             )
+
+    def test_06_review_rating_update(self, admin_client, admin, user_client,
+                                     user, moderator_client, moderator):
+        author_map = {
+            admin: admin_client,
+            user: user_client,
+            moderator: moderator_client
+        }
+        reviews, titles = create_reviews(admin_client, author_map)
+        title_url = f'/api/v1/titles/{titles[0]["id"]}/'
+        review_url = title_url + 'reviews/{review_id}/'
+
+        response = admin_client.get(title_url)
+        assert response.json().get('rating') == 5, (
+            'Проверьте, что рейтинг произведения пересчитывается при '
+            'создании отзывов.'
+        )
+
+        admin_client.patch(
+            review_url.format(review_id=reviews[0]['id']),
+            data={'score': 8}
+        )
+        response = admin_client.get(title_url)
+        assert response.json().get('rating') == 6, (
+            'Проверьте, что рейтинг произведения пересчитывается при '
+            'изменении оценки в отзыве.'
+        )
+
+        for review in reviews:
+            admin_client.delete(review_url.format(review_id=review['id']))
+        response = admin_client.get(title_url)
+        assert response.json().get('rating') is None, (
+            'Проверьте, что после удаления всех отзывов рейтинг '
+            'произведения становится `None`.'
+        )
+
+    def test_07_title_stats(self, client, admin_client, admin, user_client,
+                            user, moderator_client, moderator,
+                            django_assert_num_queries):
+        author_map = {
+            admin: admin_client,
+            user: user_client,
+            moderator: moderator_client
+        }
+        reviews, titles = create_reviews(admin_client, author_map)
+        url = f'/api/v1/titles/{titles[0]["id"]}/stats/'
+        review_url = (
+            f'/api/v1/titles/{titles[0]["id"]}/reviews/{reviews[0]["id"]}/'
+        )
+        admin_client.patch(review_url, data={'score': 8})
+
+        with django_assert_num_queries(1):
+            response = client.get(url)
+        assert response.status_code == HTTPStatus.OK, (
+            'Проверьте, что GET-запрос неавторизованного пользователя к '
+            '`/api/v1/titles/{title_id}/stats/` возвращает ответ со '
+            'статусом 200.'
+        )
+        data = response.json()
+        expected_scores = {str(score): 0 for score in range(1, 11)}
+        expected_scores.update({'5': 2, '8': 1})
+        assert data['scores'] == expected_scores, (
+            'Проверьте, что `/api/v1/titles/{title_id}/stats/` возвращает '
+            'количество каждой оценки с учетом изменения отзывов.'
+        )
+        assert data['review_count'] == 3
+        assert data['mean'] == 6
+        assert data['median'] == 5
+        assert data['last_review'], (
+            'Проверьте, что `/api/v1/titles/{title_id}/stats/` возвращает '
+            'время последнего отзыва.'
+        )
+
+        admin_client.delete(review_url)
+        data = client.get(url).json()
+        assert data['scores']['8'] == 0 and data['review_count'] == 2, (
+            'Проверьте, что сводка по оценкам обновляется при удалении '
+            'отзыва.'
+        )
+
+        data = client.get(f'/api/v1/titles/{titles[1]["id"]}/stats/').json()
+        assert data['review_count'] == 0 and data['mean'] is None, (
+            'Проверьте, что для произведения без отзывов '
+            '`/api/v1/titles/{title_id}/stats/` возвращает пустую сводку.'
+        )
+
+    def test_08_reviews_conditional_get(self, client, admin_client, admin,
+                                        user_client, user,
+                                        django_assert_num_queries):
+        reviews, titles = create_reviews(admin_client, {admin: admin_client})
+        url = f'/api/v1/titles/{titles[0]["id"]}/reviews/'
+        response = client.get(url)
+        etag = response.get('ETag')
+        assert etag and response.get('Last-Modified'), (
+            f'Проверьте, что ответ на GET-запрос к `{url}` содержит '
+            'заголовки `ETag` и `Last-Modified`.'
+        )
+
+        with django_assert_num_queries(0):
+            response = client.get(url, HTTP_IF_NONE_MATCH=etag)
+        assert response.status_code == HTTPStatus.NOT_MODIFIED, (
+            f'Проверьте, что GET-запрос к `{url}` с актуальным '
+            '`If-None-Match` возвращает ответ со статусом 304.'
+        )
+        assert response.get('ETag') == etag
+
+        from reviews.models import User
+        User.objects.create(username='newcomer', email='newcomer@yamdb.fake')
+        response = client.get(url, HTTP_IF_NONE_MATCH=etag)
+        assert response.status_code == HTTPStatus.NOT_MODIFIED, (
+            f'Проверьте, что регистрация пользователя не меняет `ETag` '
+            f'ответа на GET-запрос к `{url}`.'
+        )
+        admin.username = 'renamed_admin'
+        admin.save()
+        response = client.get(url, HTTP_IF_NONE_MATCH=etag)
+        assert response.status_code == HTTPStatus.OK, (
+            f'Проверьте, что после смены имени автора GET-запрос к `{url}` '
+            'со старым `If-None-Match` возвращает ответ со статусом 200.'
+        )
+        assert response.json()['results'][0]['author'] == 'renamed_admin'
+        etag = response.get('ETag')
+
+        create_single_review(user_client, titles[1]['id'], 'other title', 3)
+        response = client.get(url, HTTP_IF_NONE_MATCH=etag)
+        assert response.status_code == HTTPStatus.NOT_MODIFIED, (
+            'Проверьте, что отзыв на другое произведение не меняет `ETag` '
+            f'ответа на GET-запрос к `{url}`.'
+        )
+
+        create_single_review(user_client, titles[0]['id'], 'new review', 3)
+        response = client.get(url, HTTP_IF_NONE_MATCH=etag)
+        assert response.status_code == HTTPStatus.OK, (
+            f'Проверьте, что после добавления отзыва GET-запрос к `{url}` '
+            'со старым `If-None-Match` возвращает ответ со статусом 200.'
+        )
+        assert response.get('ETag') != etag
+
+        etag = response.get('ETag')
+        create_single_comment(
+            user_client, titles[0]['id'], reviews[0]['id'], 'comment'
+        )
+        response = client.get(url, HTTP_IF_NONE_MATCH=etag)
+        assert response.status_code == HTTPStatus.OK, (
+            'Проверьте, что после добавления комментария (меняется '
+            f'`comment_count`) GET-запрос к `{url}` со старым '
+            '`If-None-Match` возвращает ответ со статусом 200.'
+        )
+
+    def test_09_reviews_search(self, client, admin_client, admin,
+                               user_client, user):
+        reviews, titles = create_reviews(
+            admin_client, {admin: admin_client, user: user_client}
+        )
+        url = f'/api/v1/titles/{titles[0]["id"]}/reviews/'
+        response = client.get(url + '?search=NUMBER 2')
+        assert [
+            review['id'] for review in response.json()['results']
+        ] == [reviews[1]['id']], (
+            f'Проверьте, что `{url}?search=` ищет по тексту отзыва.'
+        )
+        admin_client.patch(
+            url + f'{reviews[1]["id"]}/', data={'text': 'updated text'}
+        )
+        response = client.get(url + '?search=updated')
+        assert response.json()['count'] == 1, (
+            'Проверьте, что поисковый индекс обновляется при изменении '
+            'отзыва.'
+        )
+
+    def test_10_reviews_sparse_fields(self, client, admin_client, admin,
+                                      user_client, user,
+                                      django_assert_num_queries):
+        reviews, titles = create_reviews(
+            admin_client, {admin: admin_client, user: user_client}
+        )
+        url = f'/api/v1/titles/{titles[0]["id"]}/reviews/'
+        # Произведение (с количеством отзывов) и страница отзывов без JOIN
+        # автора.
+        with django_assert_num_queries(2):
+            response = client.get(url, {'fields': 'id,score'})
+        assert response.json()['results'] == [
+            {'id': review['id'], 'score': review['score']}
+            for review in reviews
+        ], f'Проверьте, что `{url}?fields=` возвращает только эти поля.'
+        response = client.get(url, {'omit': 'text'})
+        assert all(
+            'text' not in review and 'author' in review
+            for review in response.json()['results']
+        ), f'Проверьте, что `{url}?omit=` исключает перечисленные поля.'
@@ -381,3 +381,78 @@ class Test06CommentAPI:
             'Проверьте, что DELETE-запрос неавторизованного пользователя к '
             f'`{url}` возвращает ответ со статусом 401.'
         )
+
+    def test_07_comment_count(self, client, admin_client, admin,
+                              user_client, user):
+        comments, reviews, titles = create_comments(
+            admin_client, {admin: admin_client, user: user_client}
+        )
+        url = f'/api/v1/titles/{titles[0]["id"]}/reviews/'
+        response = client.get(url, {'ordering': '-comment_count'})
+        assert [
+            (review['id'], review['comment_count'])
+            for review in response.json()['results']
+        ] == [(reviews[0]['id'], 2), (reviews[1]['id'], 0)], (
+            'Проверьте, что отзыв содержит поле `comment_count` и что '
+            f'`{url}?ordering=-comment_count` сортирует по нему.'
+        )
+
+        admin_client.delete(
+            f'{url}{reviews[0]["id"]}/comments/{comments[0]["id"]}/'
+        )
+        response = client.get(f'{url}{reviews[0]["id"]}/')
+        assert response.json()['comment_count'] == 1, (
+            'Проверьте, что `comment_count` уменьшается при удалении '
+            'комментария.'
+        )
+
+        response = client.get(
+            '/api/v1/titles/', {'ordering': '-review_count'}
+        )
+        assert [
+            (title['id'], title['review_count'])
+            for title in response.json()['results']
+        ] == [(titles[0]['id'], 2), (titles[1]['id'], 0)], (
+            'Проверьте, что произведение содержит поле `review_count` и что '
+            '`/api/v1/titles/?ordering=-review_count` сортирует по нему.'
+        )
+
+    def test_08_cascade_delete_queries(self, admin_client):
+        from django.db import connection
+        from django.test.utils import CaptureQueriesContext
+
+        from reviews.models import Comment, Review, Title, User
+
+        users = [
+            User.objects.create(username=f'author_{idx}',
+                                email=f'author_{idx}@yamdb.fake')
+            for idx in range(6)
+        ]
+        kept = Title.objects.create(name='Остается', year=2000)
+        # Первый запрос кэширует состояние администратора для аутентификации.
+        admin_client.get('/api/v1/titles/')
+        Review.objects.create(title=kept, author=users[0], text='1', score=5)
+        queries = []
+        for reviews in (2, 6):
+            title = Title.objects.create(name=f'Удаляется {reviews}',
+                                         year=2000)
+            for author in users[:reviews]:
+                review = Review.objects.create(
+                    title=title, author=author, text='Отзыв', score=7
+                )
+                for _ in range(3):
+                    Comment.objects.create(
+                        review=review, author=author, text='Комментарий'
+                    )
+            with CaptureQueriesContext(connection) as context:
+                response = admin_client.delete(f'/api/v1/titles/{title.pk}/')
+            assert response.status_code == 204
+            queries.append(len(context))
+        assert queries[0] == queries[1], (
+            'Проверьте, что при каскадном удалении произведения счетчики '
+            'удаляемых отзывов и произведения не обновляются по одному '
+            f'запросу на строку: {queries} запросов.'
+        )
+        kept.refresh_from_db()
+        assert (kept.score_count, kept.score_sum) == (1, 5)
+        assert not Comment.objects.exists()
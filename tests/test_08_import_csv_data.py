@@ -0,0 +1,64 @@
+import os
+import shutil
+
+import pytest
+from django.core.management import call_command
+
+
+@pytest.mark.django_db(transaction=True)
+class Test08ImportCsvData:
+
+    def test_01_import_csv_data(self):
+        from reviews.models import Affiliation, Comment, Review, Title
+
+        call_command('import_csv_data', chunk_size=7)
+        assert Title.objects.count() == 32, (
+            'Проверьте, что команда `import_csv_data` загружает все '
+            'произведения из `titles.csv`.'
+        )
+        assert Affiliation.objects.count() == 42, (
+            'Проверьте, что команда `import_csv_data` загружает связи '
+            'произведений и жанров из `genre_title.csv`.'
+        )
+        review = Review.objects.get(pk=1)
+        assert review.pub_date.year == 2019, (
+            'Проверьте, что команда `import_csv_data` сохраняет дату '
+            'публикации из выгрузки.'
+        )
+        title = Title.objects.get(pk=review.title_id)
+        scores = list(title.reviews.values_list('score', flat=True))
+        assert title.rating == sum(scores) // len(scores), (
+            'Проверьте, что после загрузки отзывов пересчитывается рейтинг '
+            'произведений.'
+        )
+
+        counts = (Review.objects.count(), Comment.objects.count())
+        call_command('import_csv_data', mode='skip')
+        call_command('import_csv_data', mode='upsert')
+        assert (Review.objects.count(), Comment.objects.count()) == counts, (
+            'Проверьте, что повторный запуск `import_csv_data` не создает '
+            'дубликаты.'
+        )
+
+    def test_02_import_csv_data_workers(self, tmp_path):
+        from django.conf import settings
+        from django.core.management.base import CommandError
+
+        from reviews.models import Affiliation, Review
+
+        call_command('import_csv_data', chunk_size=10, workers=2)
+        assert Review.objects.count() == 72, (
+            'Проверьте, что команда `import_csv_data --workers` загружает все '
+            'отзывы из `review.csv`.'
+        )
+        assert Affiliation.objects.count() == 42
+
+        data_path = os.path.join(settings.BASE_DIR, 'static', 'data')
+        for filename in os.listdir(data_path):
+            shutil.copy(os.path.join(data_path, filename), tmp_path)
+        with open(tmp_path / 'review.csv', 'a', encoding='utf8') as file:
+            file.write('999,1,text,100,11,2020-01-01T00:00:00Z\n')
+        with pytest.raises(CommandError, match='line'):
+            call_command(
+                'import_csv_data', path=str(tmp_path), workers=2
+            )
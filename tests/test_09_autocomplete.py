@@ -0,0 +1,75 @@
+from http import HTTPStatus
+
+import pytest
+
+from tests.utils import create_titles
+
+
+@pytest.mark.django_db(transaction=True)
+class Test09AutocompleteAPI:
+
+    def test_01_autocomplete(self, client, admin_client,
+                             django_assert_num_queries):
+        titles, categories, genres = create_titles(admin_client)
+        url = '/api/v1/autocomplete/'
+        response = client.get(url, {'q': 'тер'})
+        assert response.status_code == HTTPStatus.OK, (
+            f'Проверьте, что GET-запрос неавторизованного пользователя к '
+            f'`{url}` возвращает ответ со статусом 200.'
+        )
+        assert response.json() == [
+            {'type': 'title', 'id': titles[0]['id'], 'name': 'Терминатор'}
+        ], (
+            f'Проверьте, что `{url}?q=` возвращает произведения, название '
+            'которых начинается с запроса.'
+        )
+
+        with django_assert_num_queries(0):
+            response = client.get(url, {'q': 'ОРЕШ'})
+        assert [item['name'] for item in response.json()] == [
+            'Крепкий орешек'
+        ], (
+            f'Проверьте, что `{url}?q=` ищет по началу каждого слова без '
+            'учета регистра.'
+        )
+
+        admin_client.patch(
+            f'/api/v1/titles/{titles[0]["id"]}/', data={'name': 'Чужой'}
+        )
+        admin_client.delete(f'/api/v1/genres/{genres[2]["slug"]}/')
+        response = client.get(url, {'q': 'чу'})
+        assert [item['name'] for item in response.json()] == ['Чужой'], (
+            f'Проверьте, что индекс `{url}` обновляется при изменении '
+            'произведения.'
+        )
+        response = client.get(url, {'q': 'д'})
+        assert response.json() == [], (
+            f'Проверьте, что индекс `{url}` обновляется при удалении жанра.'
+        )
+        response = client.get(url, {'q': 'ком'})
+        assert response.json() == [
+            {'type': 'genre', 'slug': 'comedy', 'name': 'Комедия'}
+        ]
+
+    def test_02_autocomplete_other_process(self, client, admin_client):
+        from api.cache import bump_version
+        from reviews.models import Genre, Title
+
+        titles, _, _ = create_titles(admin_client)
+        url = '/api/v1/autocomplete/'
+        client.get(url, {'q': 'а'})
+        # Другой процесс добавляет жанр без сигналов и сбрасывает версию.
+        Genre.objects.bulk_create([Genre(name='Альбатрос', slug='albatross')])
+        bump_version('genre')
+        admin_client.patch(
+            f'/api/v1/titles/{titles[0]["id"]}/', data={'name': 'Чужой'}
+        )
+        response = client.get(url, {'q': 'аль'})
+        assert response.json() == [
+            {'type': 'genre', 'slug': 'albatross', 'name': 'Альбатрос'}
+        ], (
+            f'Проверьте, что индекс `{url}` перестраивается, если данные '
+            'изменил другой процесс, даже после изменения в этом процессе.'
+        )
+        response = client.get(url, {'q': 'чу'})
+        assert [item['name'] for item in response.json()] == ['Чужой']
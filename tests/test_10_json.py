@@ -0,0 +1,63 @@
+import io
+from decimal import Decimal
+from http import HTTPStatus
+
+import pytest
+from rest_framework.exceptions import ParseError
+from rest_framework.renderers import JSONRenderer
+
+from api.parsers import FastJSONParser
+from api.renderers import FastJSONRenderer
+from tests.utils import create_titles
+
+
+class Test10FastJSON:
+
+    def test_01_renderer_matches_stdlib(self):
+        data = {
+            'name': 'Пикник на обочине ',
+            'rating': None,
+            'score': Decimal('7.5'),
+            1: [True, 1.5],
+        }
+        assert FastJSONRenderer().render(data) == JSONRenderer().render(
+            data
+        ), (
+            'Проверьте, что FastJSONRenderer возвращает тот же JSON, что и '
+            'стандартный JSONRenderer.'
+        )
+        assert FastJSONRenderer().render(None) == b'', (
+            'Проверьте, что FastJSONRenderer возвращает пустое тело для None.'
+        )
+
+    def test_02_parser(self):
+        body = '{"name": "Сталкер", "year": 1979}'.encode()
+        assert FastJSONParser().parse(io.BytesIO(body)) == {
+            'name': 'Сталкер', 'year': 1979
+        }, 'Проверьте, что FastJSONParser разбирает тело запроса.'
+        with pytest.raises(ParseError):
+            FastJSONParser().parse(io.BytesIO(b'{"name": '))
+
+    @pytest.mark.django_db(transaction=True)
+    def test_03_api(self, client, admin_client):
+        titles, _, _ = create_titles(admin_client)
+        response = client.get(f'/api/v1/titles/{titles[0]["id"]}/')
+        assert response.status_code == HTTPStatus.OK
+        assert response['Content-Type'] == 'application/json', (
+            'Проверьте, что API по умолчанию отвечает в формате JSON.'
+        )
+        data = response.json()
+        assert (data['id'], data['name']) == (
+            titles[0]['id'], titles[0]['name']
+        ), (
+            'Проверьте, что ответ FastJSONRenderer совпадает с данными '
+            'произведения.'
+        )
+        response = admin_client.post(
+            '/api/v1/categories/', data='{"name": "Игры"',
+            content_type='application/json'
+        )
+        assert response.status_code == HTTPStatus.BAD_REQUEST, (
+            'Проверьте, что некорректный JSON в теле запроса возвращает '
+            'ответ со статусом 400.'
+        )
@@ -0,0 +1,46 @@
+from io import StringIO
+
+import pytest
+from django.core.management import call_command
+
+
+@pytest.mark.django_db(transaction=True)
+class Test11QueryPlans:
+
+    def test_01_check_query_plans(self):
+        call_command('import_csv_data')
+        out = StringIO()
+        call_command('check_query_plans', stdout=out)
+        assert 'All query plans use indexes.' in out.getvalue(), (
+            'Проверьте, что запросы списков API используют индексы.'
+        )
+
+    def test_02_plan_problems(self):
+        from reviews.management.commands.check_query_plans import (
+            get_plan_problems
+        )
+
+        sql = 'SELECT * FROM "reviews_title" WHERE "year" = 2000 ORDER BY name'
+        assert get_plan_problems(sql, [
+            '2 0 0 SCAN reviews_title', '9 0 0 USE TEMP B-TREE FOR ORDER BY'
+        ], {'reviews_title'}) == [
+            'full scan of reviews_title', 'USE TEMP B-TREE FOR ORDER BY'
+        ], (
+            'Проверьте, что `check_query_plans` находит полный просмотр '
+            'таблицы и сортировку во временном B-дереве.'
+        )
+        assert get_plan_problems(sql, [
+            '3 0 0 SEARCH reviews_title USING INDEX title_year_name_id_idx '
+            '(year=?)', '15 0 0 SCAN subquery'
+        ], {'reviews_title'}) == []
+        assert get_plan_problems(sql, [
+            '2 0 0 SCAN reviews_title USING INDEX title_name_id_idx'
+        ], {'reviews_title'}) == ['full scan of reviews_title'], (
+            'Проверьте, что `check_query_plans` считает просмотр всего '
+            'индекса в запросе с условием WHERE полным просмотром.'
+        )
+        assert get_plan_problems(
+            'SELECT * FROM "reviews_title" ORDER BY name LIMIT 10',
+            ['2 0 0 SCAN reviews_title USING COVERING INDEX title_name_id_idx'],
+            {'reviews_title'}
+        ) == []
@@ -0,0 +1,61 @@
+from http import HTTPStatus
+
+import pytest
+
+from tests.utils import create_titles
+
+
+@pytest.mark.django_db(transaction=True)
+class Test12Metrics:
+
+    def test_01_metrics(self, client, admin_client, settings):
+        from api.metrics import registry
+
+        settings.API_METRICS_ENABLED = True
+        registry.clear()
+        titles, _, _ = create_titles(admin_client)
+        response = client.get('/api/v1/titles/')
+        client.get(f'/api/v1/titles/{titles[0]["id"]}/')
+        assert response.status_code == HTTPStatus.OK
+        assert 'db;dur=' in response['Server-Timing'], (
+            'Проверьте, что ответ содержит заголовок `Server-Timing` со '
+            'временем SQL-запросов.'
+        )
+        timings = dict(
+            entry.strip().split(';')[:2]
+            for entry in response['Server-Timing'].split(',')
+        )
+        assert float(timings['serialize'].split('=')[1]) > 0, (
+            'Проверьте, что `Server-Timing` содержит время serializer.data '
+            'отдельно от рендеринга ответа.'
+        )
+
+        response = client.get('/metrics')
+        assert response.status_code == HTTPStatus.OK, (
+            'Проверьте, что `/metrics` доступен при API_METRICS_ENABLED.'
+        )
+        metrics = response.content.decode()
+        for line in (
+            'api_requests_total{route="titles-list",method="GET"} 1',
+            'api_requests_total{route="titles-detail",method="GET"} 1',
+            'api_request_duration_seconds_count'
+            '{route="titles-list",method="GET"} 1',
+            'api_db_queries_total{route="titles-list",method="GET"} 3',
+        ):
+            assert line in metrics, (
+                f'Проверьте, что `/metrics` содержит строку `{line}`.'
+            )
+        assert 'api_render_duration_seconds_total{route="titles-list"' in (
+            metrics
+        )
+        assert 'api_serialize_duration_seconds_total{route="titles-list"' in (
+            metrics
+        )
+
+    def test_02_metrics_disabled(self, client):
+        response = client.get('/metrics')
+        assert response.status_code == HTTPStatus.NOT_FOUND, (
+            'Проверьте, что без API_METRICS_ENABLED `/metrics` недоступен.'
+        )
+        response = client.get('/api/v1/genres/')
+        assert 'Server-Timing' not in response
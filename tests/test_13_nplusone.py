@@ -0,0 +1,39 @@
+import pytest
+
+from tests.utils import create_reviews
+
+
+@pytest.mark.django_db(transaction=True)
+class Test13NPlusOne:
+
+    def test_01_detect_nplusone(self, admin_client, admin, user_client,
+                                user, moderator_client, moderator):
+        from api.nplusone import NPlusOneError, detect_nplusone
+        from api.serializers import ReviewSerializer
+        from reviews.models import Review
+
+        create_reviews(admin_client, {
+            admin: admin_client, user: user_client, moderator: moderator_client
+        })
+        with pytest.raises(NPlusOneError) as error:
+            with detect_nplusone():
+                ReviewSerializer(Review.objects.all(), many=True).data
+        assert 'ReviewSerializer.author' in str(error.value), (
+            'Проверьте, что детектор N+1 запросов называет поле '
+            'сериализатора, вызвавшее повторяющиеся запросы.'
+        )
+        with detect_nplusone():
+            ReviewSerializer(
+                Review.objects.select_related('author', 'title'), many=True
+            ).data
+
+    def test_02_nplusone_log(self, caplog):
+        from api.nplusone import detect_nplusone
+        from reviews.models import Genre
+
+        with detect_nplusone('genres', mode='log'):
+            for _ in range(3):
+                Genre.objects.filter(slug='horror').first()
+        assert 'N+1 queries in genres' in caplog.text, (
+            'Проверьте, что в режиме `log` детектор пишет предупреждение.'
+        )
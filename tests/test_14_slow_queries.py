@@ -0,0 +1,76 @@
+import json
+import logging
+from io import StringIO
+
+import pytest
+from django.core.management import call_command
+from django.db import connection
+
+
+@pytest.mark.django_db(transaction=True)
+class Test14SlowQueries:
+
+    def test_01_slow_query_log(self, client, settings, caplog, monkeypatch):
+        from api.slow_queries import install
+
+        install(connection)
+        settings.SLOW_QUERY_THRESHOLD_MS = 0
+        monkeypatch.setattr(
+            logging.getLogger('api.slow_queries'), 'handlers', [caplog.handler]
+        )
+        response = client.get('/api/v1/titles/')
+        assert response.status_code == 200
+        records = [
+            json.loads(record.getMessage()) for record in caplog.records
+            if record.name == 'api.slow_queries'
+        ]
+        titles = [
+            record for record in records
+            if record['view'] and 'titles-list' in record['view']
+            and 'reviews_title' in record['sql']
+        ]
+        assert titles, (
+            'Проверьте, что при SLOW_QUERY_THRESHOLD_MS = 0 запросы '
+            'пишутся в журнал с именем маршрута.'
+        )
+        assert all(record['plan'] for record in titles), (
+            'Проверьте, что для SELECT-запросов в журнал пишется план '
+            'выполнения.'
+        )
+        assert 'api.views.TitleViewSet' in titles[0]['view'], (
+            'Проверьте, что в журнале указано представление запроса.'
+        )
+        assert not any('EXPLAIN' in record['sql'] for record in records), (
+            'Проверьте, что запросы EXPLAIN сами не пишутся в журнал.'
+        )
+
+    def test_02_slow_queries_report(self, tmp_path):
+        path = tmp_path / 'slow.log'
+        fast = 'SELECT * FROM reviews_genre WHERE id IN (%s, %s)'
+        slow = 'SELECT * FROM reviews_title WHERE year = %s'
+        path.write_text('\n'.join((
+            json.dumps({'duration_ms': 120, 'sql': fast, 'view': 'GET a'}),
+            json.dumps({'duration_ms': 300, 'sql': slow, 'view': 'GET b',
+                        'plan': ['2 0 0 SCAN reviews_title']}),
+            'not json',
+        )) + '\n')
+        (tmp_path / 'slow.log.1').write_text(json.dumps({
+            'duration_ms': 130, 'sql': fast.replace('%s, %s', '%s'),
+            'view': 'GET c'
+        }) + '\n')
+        out, err = StringIO(), StringIO()
+        call_command(
+            'slow_queries_report', path=str(path), top=1,
+            stdout=out, stderr=err
+        )
+        output = out.getvalue()
+        assert '3 slow queries, 2 shapes in 2 files' in output, (
+            'Проверьте, что команда читает журнал вместе с копиями после '
+            'ротации и сворачивает списки IN в одну форму запроса.'
+        )
+        assert 'reviews_title' in output and 'reviews_genre' not in output, (
+            'Проверьте, что команда выводит top-N форм по суммарному '
+            'времени.'
+        )
+        assert 'SCAN reviews_title' in output
+        assert 'Skipped 1 malformed lines' in err.getvalue()
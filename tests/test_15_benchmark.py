@@ -0,0 +1,102 @@
+import json
+from io import StringIO
+
+import pytest
+from django.core.management import call_command
+
+
+@pytest.mark.django_db(transaction=True)
+class Test15Benchmark:
+
+    def generate(self, seed=1):
+        call_command(
+            'generate_data', titles=20, reviews=200, comments=100, users=30,
+            genres=5, categories=3, seed=seed, stdout=StringIO()
+        )
+
+    def test_01_generate_data(self, client):
+        from reviews.models import Affiliation, Comment, Review, Title
+
+        assert client.get('/api/v1/titles/').json()['count'] == 0
+        self.generate()
+        assert client.get('/api/v1/titles/').json()['count'] == 20, (
+            'Проверьте, что после генерации сбрасывается кэш API.'
+        )
+        assert Title.objects.count() == 20
+        counts = sorted(
+            Title.objects.values_list('score_count', flat=True), reverse=True
+        )
+        assert sum(counts) == Review.objects.count() > 0
+        assert counts[0] > 3 * sum(counts) / len(counts), (
+            'Проверьте, что отзывы распределены по произведениям '
+            'неравномерно (популярные произведения получают больше отзывов).'
+        )
+        assert Title.objects.filter(rating__isnull=True).count() < 20, (
+            'Проверьте, что после генерации пересчитываются рейтинги.'
+        )
+        assert Comment.objects.exists() and Affiliation.objects.exists()
+        first = self.get_reviews()
+        Review.objects.all().delete()
+        Title.objects.all().delete()
+        self.generate()
+        assert self.get_reviews() == first, (
+            'Проверьте, что генерация с тем же --seed воспроизводима.'
+        )
+
+    def get_reviews(self):
+        """Отзывы с id произведений и авторов относительно первых id."""
+        from reviews.models import Review, Title, User
+
+        title = Title.objects.order_by('pk').first().pk
+        user = User.objects.order_by('-pk')[29].pk
+        return [
+            (title_id - title, author_id - user, score)
+            for title_id, author_id, score in Review.objects.order_by(
+                'pk'
+            ).values_list('title_id', 'author_id', 'score')
+        ]
+
+    def test_02_benchmark_api(self, tmp_path):
+        self.generate()
+        output = tmp_path / 'run.json'
+        out = StringIO()
+        call_command(
+            'benchmark_api', requests=3, warmup=0, output=str(output),
+            endpoint=['titles-list', 'reviews-list', 'comments-list'],
+            stdout=out
+        )
+        report = json.loads(output.read_text())
+        assert set(report['endpoints']) == {
+            'titles-list', 'reviews-list', 'comments-list'
+        }
+        result = report['endpoints']['titles-list']
+        for key in ('p50_ms', 'p95_ms', 'p99_ms', 'queries'):
+            assert key in result, (
+                f'Проверьте, что результаты содержат `{key}`.'
+            )
+        assert result['requests'] == 3 and result['queries'] > 0
+        assert report['dataset']['Title'] == 20
+        out = StringIO()
+        call_command(
+            'benchmark_api', requests=2, warmup=1, anonymous=True,
+            output=str(tmp_path / 'cached.json'), compare=str(output),
+            endpoint=['titles-list'], stdout=out
+        )
+        assert 'Compared with' in out.getvalue()
+        cached = json.loads((tmp_path / 'cached.json').read_text())
+        assert cached['endpoints']['titles-list']['queries'] == 0, (
+            'Проверьте, что анонимные запросы после прогрева отдаются '
+            'из кэша ответов.'
+        )
+
+    def test_03_benchmark_token(self):
+        from rest_framework_simplejwt.tokens import AccessToken
+
+        from reviews.management.commands.benchmark_api import Command
+
+        header = Command().get_auth_headers()['HTTP_AUTHORIZATION']
+        token = AccessToken(header.split()[1])
+        assert token.get('role') == 'admin', (
+            'Проверьте, что бенчмарк использует токен с ролью, как API, '
+            'а не запасной путь с загрузкой пользователя.'
+        )